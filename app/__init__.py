@@ -12,20 +12,21 @@ if not os.environ.get("RAILWAY_ENVIRONMENT") and not os.environ.get("RAILWAY_PRO
     print("📝 Loaded .env file for local development")
 
 # Initialize extensions at module level
-db = SQLAlchemy()
+from .replica import RoutingSession
+
+db = SQLAlchemy(session_options={"class_": RoutingSession})
 login_manager = LoginManager()
 
 
-def create_app():
-    app = Flask(__name__, static_folder="static", template_folder="templates")
+def _env_flag(name, default="false"):
+    return os.environ.get(name, default).strip().lower() in ("1", "true", "yes", "on")
 
-    # ============ DEBUG: ENVIRONMENT CHECK ============
+
+def print_environment_diagnostics(is_railway):
+    """Dump DB-related environment variables (skipped in fast-boot mode)"""
     print(f"\n{'=' * 60}")
     print("🔍 ENVIRONMENT DIAGNOSTICS")
     print(f"{'=' * 60}")
-
-    # Check if we're on Railway
-    is_railway = bool(os.environ.get("RAILWAY_ENVIRONMENT") or os.environ.get("RAILWAY_PROJECT_NAME"))
     print(f"Running on Railway: {is_railway}")
 
     # Check DATABASE_URL specifically
@@ -49,7 +50,27 @@ def create_app():
         print("  ❌ No database environment variables found!")
 
     print(f"{'=' * 60}\n")
-    # ============ END DEBUG ============
+
+
+def create_app(fast_boot=None):
+    """
+    Build the Flask app.
+
+    fast_boot (or FAST_BOOT=true) is meant for gunicorn workers, CLI and
+    benchmark runs: no environment dump, a schema fingerprint check instead
+    of create_all(), no seeding (use `flask seed`) and no scheduler unless
+    RUN_SCHEDULER=true.
+    """
+    app = Flask(__name__, static_folder="static", template_folder="templates")
+
+    if fast_boot is None:
+        fast_boot = _env_flag("FAST_BOOT")
+    app.config["FAST_BOOT"] = fast_boot
+
+    # Check if we're on Railway
+    is_railway = bool(os.environ.get("RAILWAY_ENVIRONMENT") or os.environ.get("RAILWAY_PROJECT_NAME"))
+    if not fast_boot:
+        print_environment_diagnostics(is_railway)
 
     # Secret key
     app.secret_key = os.environ.get("SECRET_KEY", "dev-secret-key")
@@ -99,10 +120,13 @@ def create_app():
         print(f"   Connection: {database_url.split('@')[-1].split('?')[0]}")
 
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
-        'pool_recycle': 300,
-        'pool_pre_ping': True,
-    }
+    # Optional read replica for @read_only views (see app/replica.py)
+    from .replica import replica_bind_config
+    app.config['SQLALCHEMY_BINDS'] = replica_bind_config()
+
+    # Pool sized from WEB_CONCURRENCY/GUNICORN_THREADS/DB_MAX_CONNECTIONS, no per-checkout ping
+    from .dbpool import engine_options
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config['SQLALCHEMY_DATABASE_URI'])
 
     # Initialize extensions with app
     db.init_app(app)
@@ -121,167 +145,9 @@ def create_app():
             return None
 
     # ============ JINJA2 FILTERS ============
-    # These filters are used in templates
-
-    @app.template_filter('format_date')
-    def format_date_filter(value, format_string='%Y-%m-%d %H:%M:%S'):
-        """Format a datetime object or string"""
-        if value is None:
-            return ''
-
-        # If it's already a datetime object
-        if isinstance(value, datetime):
-            return value.strftime(format_string)
-
-        # If it's a string, try to parse it
-        try:
-            # Try common datetime formats
-            for fmt in ('%Y-%m-%d %H:%M:%S', '%Y-%m-%d', '%Y-%m-%d %H:%M:%S.%f'):
-                try:
-                    dt = datetime.strptime(str(value), fmt)
-                    return dt.strftime(format_string)
-                except ValueError:
-                    continue
-            # If none work, return original
-            return str(value)
-        except:
-            return str(value)
-
-    @app.template_filter('format_currency')
-    def format_currency_filter(value, currency='ZAR'):
-        """Format a number as currency"""
-        if value is None:
-            return f'0.00'
-        try:
-            # For ZAR (South African Rand)
-            if currency == 'ZAR':
-                return f'R {float(value):,.2f}'
-            # For USD
-            elif currency == 'USD':
-                return f'$ {float(value):,.2f}'
-            # Default
-            else:
-                return f'{float(value):,.2f} {currency}'
-        except (ValueError, TypeError):
-            return str(value)
-
-    @app.template_filter('format_number')
-    def format_number_filter(value):
-        """Format a number with commas"""
-        if value is None:
-            return '0'
-        try:
-            return f'{float(value):,.0f}'
-        except (ValueError, TypeError):
-            return str(value)
-
-    @app.template_filter('format_float')
-    def format_float_filter(value, decimals=2):
-        """Format a float with specified decimals"""
-        if value is None:
-            return f'0.{"0" * decimals}'
-        try:
-            return f'{float(value):,.{decimals}f}'
-        except (ValueError, TypeError):
-            return str(value)
-
-    @app.template_filter('truncate')
-    def truncate_filter(value, length=50, killwords=False, end='...'):
-        """Truncate a string with optional killwords parameter"""
-        if not value:
-            return ''
-
-        value_str = str(value)
-
-        # If string is already shorter than or equal to length, return as-is
-        if len(value_str) <= length:
-            return value_str
-
-        # If killwords is True or killwords is passed as a string (legacy support)
-        if killwords is True or (isinstance(killwords, str) and killwords.lower() == 'true'):
-            # Truncate exactly at length
-            return value_str[:length] + end
-
-        # Handle case where killwords might be passed as end parameter (backward compatibility)
-        if isinstance(killwords, str) and killwords not in ('true', 'false', 'True', 'False'):
-            # This means killwords was actually passed as the 'end' parameter
-            return value_str[:length] + killwords
-
-        # Otherwise, try to truncate at word boundary
-        truncated = value_str[:length]
-        last_space = truncated.rfind(' ')
-
-        if last_space > 0:
-            return truncated[:last_space] + end
-        else:
-            return truncated + end
-
-    @app.template_filter('yesno')
-    def yesno_filter(value):
-        """Convert boolean to Yes/No"""
-        if value in (True, 'true', 'True', '1', 1):
-            return 'Yes'
-        return 'No'
-
-    @app.template_filter('format_datetime')
-    def format_datetime_filter(value):
-        """Alias for format_date for compatibility"""
-        return format_date_filter(value)
-
-    @app.template_filter('time_ago')
-    def time_ago_filter(value):
-        """Show relative time (e.g., '2 hours ago')"""
-        if not value:
-            return ''
-
-        if isinstance(value, str):
-            try:
-                value = datetime.strptime(value, '%Y-%m-%d %H:%M:%S')
-            except:
-                return str(value)
-
-        if not isinstance(value, datetime):
-            return str(value)
-
-        now = datetime.utcnow()
-        diff = now - value
-
-        if diff.days > 365:
-            years = diff.days // 365
-            return f'{years} year{"s" if years > 1 else ""} ago'
-        elif diff.days > 30:
-            months = diff.days // 30
-            return f'{months} month{"s" if months > 1 else ""} ago'
-        elif diff.days > 0:
-            return f'{diff.days} day{"s" if diff.days > 1 else ""} ago'
-        elif diff.seconds > 3600:
-            hours = diff.seconds // 3600
-            return f'{hours} hour{"s" if hours > 1 else ""} ago'
-        elif diff.seconds > 60:
-            minutes = diff.seconds // 60
-            return f'{minutes} minute{"s" if minutes > 1 else ""} ago'
-        else:
-            return 'just now'
-
-    @app.template_filter('format_phone')
-    def format_phone_filter(value):
-        """Format phone number"""
-        if not value:
-            return ''
-        phone = str(value).replace(' ', '').replace('-', '').replace('(', '').replace(')', '')
-        if len(phone) == 10 and phone.startswith('0'):
-            return f'+27 {phone[1:4]} {phone[4:7]} {phone[7:]}'
-        return phone
-
-    @app.template_filter('format_percent')
-    def format_percent_filter(value):
-        """Format as percentage"""
-        if value is None:
-            return '0%'
-        try:
-            return f'{float(value):.1f}%'
-        except:
-            return str(value)
+    # format_date, format_currency, format_phone, time_ago, ... (app/filters.py)
+    from . import filters
+    filters.init_app(app)
 
     # ============ CONTEXT PROCESSORS ============
     # Add variables to all templates
@@ -305,6 +171,14 @@ def create_app():
         from flask_login import current_user
         return {'current_user': current_user}
 
+    # Shared compiled-template cache and {% cache %} fragments (app/fragments.py)
+    from . import fragments
+    fragments.init_app(app)
+
+    # Hashed, precompressed static files once `flask build-assets` has run (app/assets.py)
+    from . import assets
+    assets.init_app(app)
+
     # Register blueprints
     from .auth import auth_bp
     from .admin import admin_bp
@@ -314,51 +188,96 @@ def create_app():
     app.register_blueprint(admin_bp, url_prefix="/admin")
     app.register_blueprint(agent_bp, url_prefix="/agent")
 
+    # Per-request SQL counts/timings (Server-Timing header, N+1 warnings)
+    if _env_flag("SQL_STATS", "true"):
+        from .sqlstats import sql_stats
+        sql_stats.init_app(app)
+
+    # Prometheus /metrics: route latency, DB pool, provider calls, caches
+    if _env_flag("METRICS", "true"):
+        from .metrics import metrics
+        metrics.init_app(app)
+
+    # Retry GET views once on a dropped connection; pool saturation gauge
+    from . import dbpool
+    dbpool.init_app(app)
+
+    # gzip/brotli for HTML and JSON; registered last so it runs first and
+    # the latency metrics include it (app/compression.py)
+    from . import compression
+    compression.init_app(app)
+
+    # flask CLI commands (migrations, maintenance)
+    from .cli import register_cli
+    register_cli(app)
+
     # ===== DATABASE SETUP WITH CONDITIONAL SEEDING =====
     with app.app_context():
-        try:
-            print("🛠️ Creating database tables if they don't exist...")
-            db.create_all()
-            print("✅ Database tables ready")
-
-            # Only seed if no users exist (first-time setup)
-            from .models import User
-            if not User.query.first():
-                print("🌱 First-time setup: Seeding database...")
-                seed_database()
-            else:
-                print("📊 Database already has data, skipping seed")
-                # Just print how many users exist
-                user_count = User.query.count()
-                print(f"   Found {user_count} existing user(s)")
+        if fast_boot:
+            try:
+                from .schema import ensure_schema
+                if ensure_schema():
+                    print("🛠️ Schema changed: tables created/updated")
+            except Exception as e:
+                print(f"❌ Error checking database schema: {e}")
+        else:
+            setup_database()
 
+    # Initialize scheduler (one process should own it; see RUN_SCHEDULER)
+    if _env_flag("RUN_SCHEDULER", "false" if fast_boot else "true"):
+        try:
+            from .scheduler import schedule_rate_updates
+            schedule_rate_updates(app)
+            print("⏰ Scheduler initialized")
         except Exception as e:
-            print(f"❌ Error during database setup: {e}")
-            import traceback
-            traceback.print_exc()
+            print(f"⚠️ Could not initialize scheduler: {e}")
+
+    if not fast_boot:
+        print(f"\n{'=' * 60}")
+        print("🚀 Application initialized successfully")
+        if is_railway:
+            print("🌐 Running on Railway with PostgreSQL")
+        else:
+            print("💻 Running locally with SQLite")
+        print(f"{'=' * 60}")
+
+    return app
+
 
-    # Initialize scheduler
+def setup_database():
+    """Create tables and seed a brand new database (slow boot path)"""
     try:
-        from .scheduler import schedule_rate_updates
-        schedule_rate_updates(app)
-        print("⏰ Scheduler initialized")
-    except Exception as e:
-        print(f"⚠️ Could not initialize scheduler: {e}")
+        print("🛠️ Creating database tables if they don't exist...")
+        db.create_all()
+        print("✅ Database tables ready")
 
-    print(f"\n{'=' * 60}")
-    print("🚀 Application initialized successfully")
-    if is_railway:
-        print("🌐 Running on Railway with PostgreSQL")
-    else:
-        print("💻 Running locally with SQLite")
-    print(f"{'=' * 60}")
+        try:
+            from .search import create_search_index
+            create_search_index()
+        except Exception as e:
+            print(f"⚠️ Search index not created (run `flask search-index`): {e}")
 
-    return app
+        # Only seed if no users exist (first-time setup)
+        from .models import User
+        if not User.query.first():
+            print("🌱 First-time setup: Seeding database...")
+            seed_database()
+        else:
+            print("📊 Database already has data, skipping seed")
+            # Just print how many users exist
+            user_count = User.query.count()
+            print(f"   Found {user_count} existing user(s)")
+
+    except Exception as e:
+        print(f"❌ Error during database setup: {e}")
+        import traceback
+        traceback.print_exc()
 
 
 def seed_database():
     """Seed initial data - ONLY RUNS ONCE"""
     from .models import Currency, ExchangeRate, Setting, User, DollarBalance
+    from .money import Money
 
     try:
         print("  Starting database seeding...")
@@ -424,7 +343,7 @@ def seed_database():
 
         # Create initial dollar balance
         if not DollarBalance.query.first():
-            balance = DollarBalance(current_balance=0.00)
+            balance = DollarBalance(current_balance=Money.zero())
             db.session.add(balance)
             print("    Created initial dollar balance: $0.00")
         else:
@@ -1,21 +1,38 @@
 import json
-from datetime import datetime, timedelta
-from flask import Blueprint, render_template, session, redirect, request, url_for, flash, current_app, jsonify
+import math
+import os
+from datetime import date, datetime, timedelta
+from flask import Blueprint, render_template, session, redirect, request, url_for, flash, current_app, jsonify, \
+    Response, abort
 from sqlalchemy import func, desc, or_, and_, extract, cast, Date
-from aws_sns import send_sns_notification, sns_client
+from .aws_sns import send_sns_notification, send_transaction_notification
 
 from .helpers import generate_unique_txid
 from .sms import send_sms, build_sms_template
-from .utils import require_role, update_rate_if_needed, get_latest_rate, set_setting, get_setting
+from .utils import require_role, require_session_role, update_rate_if_needed, get_latest_rate, set_setting, get_setting
 from .models import db, User, Transaction, Branch, Currency, ExchangeRate, Setting, DollarBalance, Log, Notification, \
-    Agent
+    Agent, FeeSchedule
+from .money import Money
+from .dbcompat import day_of, period_of
+from .replica import read_only
+from .search import search_transactions, autocomplete
+from .phones import to_e164, history_summary, phone_history as find_phone_history
+from .customers import autocomplete_customers, customer_index, record_customers
 from .rates import update_usd_zar
+from .pricing import rate_table
+from .fees import MAX_PERCENT, fee_engine
+from .reports import agent_names, available_years, closed_response, day_rows, period_totals, summaries
+from .snapshots import day_breakdown
+from . import exports, quotes
 
 admin_bp = Blueprint("admin", __name__, template_folder="templates")
 
+TRANSACTIONS_PER_PAGE = 50
+
 
 @admin_bp.route("/dashboard")
 @require_role("admin")
+@read_only
 def dashboard():
     # stats
     total_transactions = Transaction.query.count()
@@ -24,19 +41,19 @@ def dashboard():
     # Today's volume
     today = datetime.utcnow().date()
     today_volume_result = db.session.query(func.coalesce(func.sum(Transaction.amount_local), 0)).filter(
-        cast(Transaction.timestamp, Date) == today
+        day_of(Transaction.timestamp) == today
     ).first()
-    today_volume = float(today_volume_result[0]) if today_volume_result else 0.0
+    today_volume = today_volume_result[0] if today_volume_result else Money.zero()
 
     # charts last 7 days
     seven_days_ago = today - timedelta(days=7)
     daily_stats = db.session.query(
-        cast(Transaction.timestamp, Date).label('d'),
+        day_of(Transaction.timestamp).label('d'),
         func.coalesce(func.sum(Transaction.amount_local), 0).label('s')
     ).filter(
-        cast(Transaction.timestamp, Date) >= seven_days_ago
+        day_of(Transaction.timestamp) >= seven_days_ago
     ).group_by(
-        cast(Transaction.timestamp, Date)
+        day_of(Transaction.timestamp)
     ).order_by(text('d DESC')).limit(7).all()
 
     labels = [row.d.strftime('%Y-%m-%d') for row in reversed(daily_stats)]
@@ -58,28 +75,105 @@ def dashboard():
 # transactions list & management
 @admin_bp.route("/transactions")
 @require_role("admin")
+@read_only
 def transactions():
     # Get search parameters
     txid_suffix = request.args.get('txid', '').upper().strip()
     status = request.args.get('status', '')
+    q = request.args.get('q', '').strip()
+    page = request.args.get('page', 1, type=int)
 
-    # Simple query - no joins
-    query = Transaction.query
-
-    # Add TXID filter (exact match for suffix)
+    # Exact transaction id lookup
     if txid_suffix:
-        query = query.filter(Transaction.transaction_id == 'ISA-' + txid_suffix)
+        query = Transaction.query.filter(Transaction.transaction_id == 'ISA-' + txid_suffix)
+        if status:
+            query = query.filter(Transaction.status == status)
+        txs = query.all()
+        return render_template("admin/transactions.html", txs=txs, page=1, has_next=False)
 
-    # Add status filter
-    if status:
-        query = query.filter(Transaction.status == status)
+    # Partial search over names, phones and txid fragments (ranked), or the latest transactions
+    txs, has_next = search_transactions(q, status=status, page=page, per_page=TRANSACTIONS_PER_PAGE)
 
-    # Always order by most recent first
-    txs = query.order_by(Transaction.timestamp.desc()).all()
+    return render_template("admin/transactions.html", txs=txs, page=max(page, 1), has_next=has_next)
 
-    return render_template("admin/transactions.html", txs=txs)
+
+@admin_bp.route("/api/phone-history")
+@require_role("admin")
+@read_only
+def phone_history():
+    """Recent transactions sent or received by ?phone= (create screen lookup)"""
+    phone = request.args.get('phone', '')
+    limit = min(request.args.get('limit', 10, type=int), 50)
+    return jsonify({'phone': to_e164(phone), 'transactions': history_summary(find_phone_history(phone, limit), phone)})
+
+
+@admin_bp.route("/api/quote", methods=["POST"])
+@require_session_role("admin")
+def quote_api():
+    """
+    Price one amount or a batch ({"items": [...]}) from cached rates and
+    fees: no database work. A single quote comes with a rate-locking quote_token.
+    """
+    payload = request.get_json(silent=True)
+    try:
+        if not isinstance(payload, dict):
+            raise ValueError("Expected a JSON object")
+        if "items" in payload:
+            if not isinstance(payload["items"], list):
+                raise ValueError("items must be a list")
+            return jsonify({'quotes': quotes.quote_items(payload["items"])})
+        return jsonify(quotes.quote_items([payload], tokens=True)[0])
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+
+@admin_bp.route("/export/<name>.<fmt>")
+@require_role("admin")
+def export(name, fmt):
+    """Stream transactions / logs / dollar_balance_logs as CSV or JSONL (?start=&end=&status=)"""
+    try:
+        start = exports.parse_date(request.args.get('start'))
+        end = exports.parse_date(request.args.get('end'))
+        status = request.args.get('status') or None
+        gzip = 'gzip' in request.headers.get('Accept-Encoding', '')
+        chunks = exports.export_chunks(name, fmt, start, end, status, gzip=gzip)
+    except ValueError as e:
+        abort(400, description=str(e))
+
+    db.session.add(Log(
+        user_id=session.get("user_id"),
+        action="export",
+        details=f"{name}.{fmt} start={start} end={end} status={status}"
+    ))
+    db.session.commit()
+
+    response = Response(chunks, mimetype=exports.FORMATS[fmt], direct_passthrough=True)
+    response.headers['Content-Disposition'] = f'attachment; filename="{exports.filename(name, fmt, start, end)}"'
+    response.headers['Cache-Control'] = 'no-store'
+    if gzip:
+        response.headers['Content-Encoding'] = 'gzip'
+        response.headers['Vary'] = 'Accept-Encoding'
+    return response
+
+
+@admin_bp.route("/api/customers")
+@require_role("admin")
+@read_only
+def customer_autocomplete():
+    """Customers whose name or phone starts with ?q= (create screen autofill)"""
+    limit = min(request.args.get('limit', 10, type=int), 50)
+    return jsonify({'customers': autocomplete_customers(request.args.get('q', ''), limit)})
 
 
+@admin_bp.route("/api/transactions/search")
+@require_role("admin")
+@read_only
+def transactions_autocomplete():
+    """Search-as-you-type results for the transactions page"""
+    q = request.args.get('q', '')
+    limit = min(request.args.get('limit', 10, type=int), 50)
+    return jsonify({'q': q, 'results': autocomplete(q, limit=limit)})
+
 
 @admin_bp.route("/transactions/create", methods=["GET", "POST"])
 @require_role("admin")
@@ -98,7 +192,7 @@ def create_transaction():
             # Amount parsing
             raw_amount = request.form.get("amount_local") or request.form.get("amount") or "0"
             try:
-                amount_local = float(raw_amount)
+                amount_local = Money.parse(raw_amount)
             except ValueError:
                 flash("Invalid amount", "warning")
                 return redirect(url_for("admin.create_transaction"))
@@ -127,16 +221,14 @@ def create_transaction():
             # Status
             status = request.form.get("status") or "pending"
 
-            # Get exchange rate
-            exchange_rate = ExchangeRate.query.filter_by(
-                from_currency=currency_code,
-                to_currency="ZAR"
-            ).order_by(ExchangeRate.updated_at.desc()).first()
-
-            rate = float(exchange_rate.rate) if exchange_rate else 1.0
-            if rate == 0:
-                rate = 1.0
-            amount_foreign = round(amount_local / rate, 6)
+            # The quoted rate and fees if the quote token is still good, else the
+            # effective rate for the branch: global rate + margin, or the branch override
+            locked = quotes.redeem(request.form.get("quote_token"), amount_local.minor, currency_code, branch_id)
+            if locked:
+                rate = locked["rate"]
+            else:
+                rate = rate_table.rate(currency_code, branch_id) or 1.0
+            amount_foreign = amount_local / rate  # Money, rounded to the cent
 
             # Generate unique transaction ID
             txid = generate_unique_txid()
@@ -148,7 +240,7 @@ def create_transaction():
             try:
                 # First, check if we have enough balance (only if subtracting)
                 dollar_balance = DollarBalance.query.first()
-                current_balance = float(dollar_balance.current_balance) if dollar_balance else 0.0
+                current_balance = Money.of(dollar_balance.current_balance if dollar_balance else None)
 
                 # Optional: Add balance check warning (don't block transaction, just warn)
                 if amount_foreign > current_balance:
@@ -188,6 +280,7 @@ def create_transaction():
                 db.session.add(tx)
                 db.session.flush()  # Get the ID without committing
                 transaction_created = True
+                seen_customers = record_customers(tx)
 
                 # ✅ NEW: Update dollar balance after successful transaction creation
                 try:
@@ -222,7 +315,7 @@ def create_transaction():
                                 balance_info = BalanceInfo()
 
                                 # Send low balance alert
-                                balance_notification_id = sns_client.send_transaction_notification(
+                                balance_notification_id = send_transaction_notification(
                                     transaction=balance_info,
                                     action='low_balance',
                                     agent_id=None
@@ -246,8 +339,10 @@ def create_transaction():
                     new_balance = current_balance  # Keep old balance if update failed
 
                 db.session.commit()
+                customer_index.note(seen_customers)
 
                 # ✅ NEW: Send SNS Notification after successful transaction creation
+                # (available-to-all transactions go out in per-agent digests, see app/fanout.py)
                 try:
                     # Get agent name for notification
                     if agent_id:
@@ -256,18 +351,13 @@ def create_transaction():
                     else:
                         agent_display = "Unassigned"
 
-                    # Determine notification action type
-                    if available_to_all:
-                        action_type = 'created_available'  # Available to all agents
-                    else:
-                        action_type = 'created_assigned'  # Assigned to specific agent
-
-                    # Send SNS notification
-                    notification_id = sns_client.send_transaction_notification(
-                        transaction=tx,
-                        action=action_type,
-                        agent_id=agent_id
-                    )
+                    notification_id = None
+                    if not available_to_all:
+                        notification_id = send_transaction_notification(
+                            transaction=tx,
+                            action='created_assigned',
+                            agent_id=agent_id
+                        )
 
                     if notification_id:
                         print(f"✅ SNS notification sent: {notification_id}")
@@ -320,7 +410,7 @@ def create_transaction():
                 )
 
                 try:
-                    resp = send_sms(receiver_phone, msg)
+                    resp = send_sms(tx.receiver_phone_e164 or receiver_phone, msg)
 
                     # Log SMS attempt
                     log = Log(
@@ -333,7 +423,7 @@ def create_transaction():
 
                     # ✅ Optional: Send SMS sent notification to SNS
                     try:
-                        sms_notification_id = sns_client.send_transaction_notification(
+                        sms_notification_id = send_transaction_notification(
                             transaction=tx,
                             action='sms_sent',
                             agent_id=agent_id
@@ -354,14 +444,16 @@ def create_transaction():
                     db.session.commit()
 
             # Calculate quote for success message
-            pct = float(current_app.config.get("FEE_PERCENT", 0.01))
-            flat = float(current_app.config.get("FEE_FLAT", 10.0))
-            fee_percent = round(amount_local * pct, 2)
-            subtotal = round(amount_local + fee_percent + flat, 2)
+            if locked:
+                pct, fee_cents, flat_cents = locked["fee_percent"], locked["fee"], locked["flat_fee"]
+            else:
+                pct, fee_cents, flat_cents = fee_engine.fee(amount_local.minor, currency_code, branch_id)
+            fee_percent, flat = Money(fee_cents), Money(flat_cents)
+            subtotal = amount_local + fee_percent + flat
 
             # Get final balance for display
             final_balance = DollarBalance.query.first()
-            final_balance_amount = float(final_balance.current_balance) if final_balance else 0.0
+            final_balance_amount = Money.of(final_balance.current_balance if final_balance else None)
 
             flash(f"""
             ✅ Transaction created successfully!
@@ -380,7 +472,7 @@ def create_transaction():
             • Fee ({pct * 100}%): ZAR {fee_percent:.2f}
             • Flat Fee: ZAR {flat:.2f}
             • Total: ZAR {subtotal:.2f}
-            • Exchange Rate: {rate:.4f}
+            • Exchange Rate: {rate:.4f} ({'as quoted' if locked else 'current rate'})
             • Foreign Amount: {currency_code} {amount_foreign:.2f}
 
             💵 Dollar Balance Impact:
@@ -395,8 +487,9 @@ def create_transaction():
 
     # GET request - show the form
     agents = User.query.filter_by(role='agent').all()
-    branches = Branch.query.all()
-    currencies = Currency.query.all()
+    # Left as queries: they only run when the cached dropdowns are re-rendered
+    branches = Branch.query
+    currencies = Currency.query
 
     return render_template("admin/create_transaction.html",
                            agents=agents,
@@ -435,7 +528,7 @@ def edit_transaction(txid):
         raw_amount = request.form.get("amount_local")
         if raw_amount is not None and raw_amount != "":
             try:
-                tx.amount_local = float(raw_amount)
+                tx.amount_local = Money.parse(raw_amount)
             except ValueError:
                 flash("Invalid amount", "warning")
                 return redirect(url_for("admin.edit_transaction", txid=txid))
@@ -468,7 +561,7 @@ def edit_transaction(txid):
         ).order_by(ExchangeRate.updated_at.desc()).first()
 
         rate = float(exchange_rate.rate) if exchange_rate else 1.0
-        tx.amount_foreign = round(tx.amount_local / rate, 6) if rate else tx.amount_local
+        tx.amount_foreign = tx.amount_local / rate if rate else tx.amount_local
 
         db.session.commit()
         flash("Transaction updated successfully", "success")
@@ -641,6 +734,7 @@ def delete_branch(branch_id):
 # logs & reports
 @admin_bp.route("/logs")
 @require_role("admin")
+@read_only
 def logs():
     logs = Log.query.order_by(Log.id.desc()).limit(500).all()
     return render_template("admin/logs.html", logs=logs)
@@ -694,27 +788,24 @@ def transaction_quote():
     # read amount safely
     raw_amount = request.form.get("amount_local") or request.form.get("amount") or "0"
     try:
-        amount_local = float(raw_amount)
+        amount_local = Money.parse(raw_amount)
     except ValueError:
         flash("Invalid amount", "warning")
         return redirect(url_for("admin.transactions"))
 
     currency = request.form.get("currency_code") or "ZAR"
-
-    # fees
-    pct = float(current_app.config.get("FEE_PERCENT", 0.01))
-    flat = float(current_app.config.get("FEE_FLAT", 10.0))
-    fee_percent = round(amount_local * pct, 2)
-    subtotal = round(amount_local + fee_percent + flat, 2)
-
-    # get latest rate for currency -> ZAR (fallback 1)
-    exchange_rate = ExchangeRate.query.filter_by(
-        from_currency=currency,
-        to_currency="ZAR"
-    ).order_by(ExchangeRate.updated_at.desc()).first()
-
-    rate = float(exchange_rate.rate) if exchange_rate else 1.0
-    amount_foreign = round(subtotal / rate, 6)
+    branch_val = request.form.get("branch_id")
+    branch_id = int(branch_val) if branch_val not in (None, "", "None") else None
+
+    # fees and effective rate, the same ones the JSON quote API uses
+    priced = quotes.price([amount_local.minor], currency, branch_id)
+    flat = Money(priced["flats"][0])
+    fee_percent = Money(priced["fees"][0])
+    subtotal = Money(priced["totals"][0])
+    rate = priced["rate"]
+    amount_foreign = subtotal / rate
+    quote_token = quotes.issue_token(amount_local.minor, currency.upper(), branch_id, rate,
+                                     priced["percents"][0], fee_percent.minor, flat.minor)
 
     breakdown = {
         "amount_local": amount_local,
@@ -723,7 +814,8 @@ def transaction_quote():
         "subtotal": subtotal,
         "rate": rate,
         "amount_foreign": amount_foreign,
-        "currency": currency
+        "currency": currency,
+        "quote_token": quote_token,
     }
 
     # keep other form fields so Confirm POST can reuse them
@@ -732,32 +824,33 @@ def transaction_quote():
 
 @admin_bp.route("/reports")
 @require_role("admin")
+@read_only
 def reports_main():
     # Daily stats
     daily = db.session.query(
-        cast(Transaction.timestamp, Date).label('day'),
+        day_of(Transaction.timestamp).label('day'),
         func.count().label('ct'),
         func.coalesce(func.sum(Transaction.amount_local), 0).label('total')
     ).group_by(
-        cast(Transaction.timestamp, Date)
+        day_of(Transaction.timestamp)
     ).order_by(text('day DESC')).limit(30).all()
 
     # Monthly stats
     monthly = db.session.query(
-        func.to_char(Transaction.timestamp, 'YYYY-MM').label('month'),
+        period_of(Transaction.timestamp, 'YYYY-MM').label('month'),
         func.count().label('ct'),
         func.coalesce(func.sum(Transaction.amount_local), 0).label('total')
     ).group_by(
-        func.to_char(Transaction.timestamp, 'YYYY-MM')
+        period_of(Transaction.timestamp, 'YYYY-MM')
     ).order_by(text('month DESC')).limit(24).all()
 
     # Yearly stats
     yearly = db.session.query(
-        func.to_char(Transaction.timestamp, 'YYYY').label('year'),
+        period_of(Transaction.timestamp, 'YYYY').label('year'),
         func.count().label('ct'),
         func.coalesce(func.sum(Transaction.amount_local), 0).label('total')
     ).group_by(
-        func.to_char(Transaction.timestamp, 'YYYY')
+        period_of(Transaction.timestamp, 'YYYY')
     ).order_by(text('year DESC')).all()
 
     return render_template("admin/reports.html", daily=daily, monthly=monthly, yearly=yearly)
@@ -770,6 +863,7 @@ from sqlalchemy import cast, Date, func, text
 from sqlalchemy.orm import aliased
 @admin_bp.route("/reports/daily")
 @require_role("admin")
+@read_only
 def reports_daily():
     # Get selected date from query parameter
     selected_date = request.args.get('date')
@@ -783,147 +877,93 @@ def reports_daily():
     else:
         filter_date = datetime.utcnow().date()
 
-    # Today's summary for selected date
-    today_result = db.session.query(
-        func.count(Transaction.id).label('count'),
-        func.coalesce(func.sum(Transaction.amount_local), 0).label('total')
-    ).filter(
-        cast(Transaction.timestamp, Date) == filter_date
-    ).first()
+    page = max(request.args.get('page', 1, type=int), 1)
+
+    # Cached per day; closed days come from their end-of-day snapshot
+    week = summaries(filter_date - timedelta(days=7), filter_date)
+    daily_summary = [week[day] for day in sorted(week, reverse=True) if week[day]['count']]
+
+    def render():
+        rows, has_next = day_rows(filter_date, page=page, per_page=TRANSACTIONS_PER_PAGE)
+        breakdown = day_breakdown(filter_date) if week[filter_date]['closed'] else []
+        return render_template("admin/reports_daily.html",
+                               today=week[filter_date],
+                               rows=rows,
+                               page=page,
+                               has_next=has_next,
+                               agent_names=agent_names(),
+                               branch_names=dict(db.session.query(Branch.id, Branch.name).all()) if breakdown else {},
+                               breakdown=breakdown,
+                               daily_summary=daily_summary,
+                               filter_date=filter_date,
+                               next_date=filter_date + timedelta(days=1),
+                               selected_date=selected_date if selected_date else filter_date.strftime('%Y-%m-%d'),
+                               now=datetime.utcnow())
+
+    # Nothing on a closed page can change until the day is reopened
+    if all(summary['closed'] for summary in week.values()):
+        return closed_response(render)
+    return render()
 
-    # Convert result to dictionary for template
-    today_dict = {
-        'count': today_result.count if today_result else 0,
-        'total': float(today_result.total) if today_result and today_result.total else 0.0
-    }
-
-    # Get transactions for selected date
-    transactions = db.session.query(
-        Transaction,
-        User.full_name.label('agent_name')
-    ).outerjoin(
-        User, Transaction.agent_id == User.id
-    ).filter(
-        cast(Transaction.timestamp, Date) == filter_date
-    ).order_by(Transaction.timestamp.desc()).all()
-
-    # Convert transactions to list of dictionaries for template
-    rows_list = []
-    for tx, agent_name in transactions:
-        tx_dict = {
-            'transaction_id': tx.transaction_id,
-            'sender_name': tx.sender_name,
-            'sender_phone': tx.sender_phone or '',
-            'receiver_name': tx.receiver_name,
-            'receiver_phone': tx.receiver_phone or '',
-            'amount_local': float(tx.amount_local) if tx.amount_local else 0.0,
-            'currency_code': tx.currency_code or 'ZAR',
-            'status': tx.status or 'pending',
-            'timestamp': tx.timestamp,
-            'agent_name': agent_name or 'Unassigned'
-        }
-        rows_list.append(tx_dict)
-
-    # Get last 7 days summary for chart
-    seven_days_ago = datetime.utcnow().date() - timedelta(days=7)
-    daily_summary = db.session.query(
-        cast(Transaction.timestamp, Date).label('day'),
-        func.count(Transaction.id).label('count'),
-        func.coalesce(func.sum(Transaction.amount_local), 0).label('total')
-    ).filter(
-        cast(Transaction.timestamp, Date) >= seven_days_ago
-    ).group_by(
-        cast(Transaction.timestamp, Date)
-    ).order_by(text('day DESC')).all()
-
-    # Convert daily_summary to list of dictionaries
-    daily_summary_list = []
-    for day in daily_summary:
-        daily_summary_list.append({
-            'day': day.day,
-            'count': day.count,
-            'total': float(day.total) if day.total else 0.0
-        })
-
-    return render_template("admin/reports_daily.html",
-                           today=today_dict,
-                           rows=rows_list,
-                           daily_summary=daily_summary_list,
-                           selected_date=selected_date if selected_date else filter_date.strftime('%Y-%m-%d'),
-                           now=datetime.utcnow())
 
 @admin_bp.route("/reports/monthly")
 @require_role("admin")
+@read_only
 def reports_monthly():
     selected_year = request.args.get('year')
     selected_month = request.args.get('month')
 
-    query = db.session.query(
-        func.to_char(Transaction.timestamp, 'YYYY-MM').label('month'),
-        func.count().label('count'),
-        func.coalesce(func.sum(Transaction.amount_local), 0).label('total')
-    )
-
-    if selected_year:
-        query = query.filter(func.to_char(Transaction.timestamp, 'YYYY') == selected_year)
-
-        if selected_month:
-            query = query.filter(func.to_char(Transaction.timestamp, 'MM') == selected_month)
-    else:
-        # Default to last 12 months
-        one_year_ago = datetime.utcnow() - timedelta(days=365)
-        query = query.filter(Transaction.timestamp >= one_year_ago)
+    # Whole days, so closed ones can come from their snapshots
+    try:
+        if selected_year and selected_month:
+            start = date(int(selected_year), int(selected_month), 1)
+            end = date(start.year + start.month // 12, start.month % 12 + 1, 1)
+        elif selected_year:
+            start, end = date(int(selected_year), 1, 1), date(int(selected_year) + 1, 1, 1)
+        else:
+            # Default to last 12 months
+            start, end = datetime.utcnow().date() - timedelta(days=365), None
+    except ValueError:
+        abort(400)
 
-    rows = query.group_by(
-        func.to_char(Transaction.timestamp, 'YYYY-MM')
-    ).order_by(text('month DESC')).all()
+    rows, closed = period_totals('YYYY-MM', 'month', start, end)
 
-    # Get available years for filter dropdown
-    available_years_result = db.session.query(
-        func.distinct(func.to_char(Transaction.timestamp, 'YYYY')).label('year')
-    ).order_by(text('year DESC')).all()
-    available_years = [row.year for row in available_years_result]
+    def render():
+        return render_template("admin/reports_monthly.html",
+                               rows=rows,
+                               selected_year=selected_year,
+                               selected_month=selected_month,
+                               available_years=available_years())
 
-    return render_template("admin/reports_monthly.html",
-                           rows=rows,
-                           selected_year=selected_year,
-                           selected_month=selected_month,
-                           available_years=available_years)
+    return closed_response(render) if closed else render()
 
 
 @admin_bp.route("/reports/yearly")
 @require_role("admin")
+@read_only
 def reports_yearly():
     start_year = request.args.get('start_year')
     end_year = request.args.get('end_year')
 
-    query = db.session.query(
-        func.to_char(Transaction.timestamp, 'YYYY').label('year'),
-        func.count().label('count'),
-        func.coalesce(func.sum(Transaction.amount_local), 0).label('total')
-    )
-
-    if start_year:
-        query = query.filter(func.to_char(Transaction.timestamp, 'YYYY') >= start_year)
-
-        if end_year:
-            query = query.filter(func.to_char(Transaction.timestamp, 'YYYY') <= end_year)
+    start = end = None
+    try:
+        if start_year:
+            start = date(int(start_year), 1, 1)
+            if end_year:
+                end = date(int(end_year) + 1, 1, 1)
+    except ValueError:
+        abort(400)
 
-    rows = query.group_by(
-        func.to_char(Transaction.timestamp, 'YYYY')
-    ).order_by(text('year DESC')).all()
+    rows, closed = period_totals('YYYY', 'year', start, end)
 
-    # Get available years for filter dropdown
-    available_years_result = db.session.query(
-        func.distinct(func.to_char(Transaction.timestamp, 'YYYY')).label('year')
-    ).order_by(text('year DESC')).all()
-    available_years = [row.year for row in available_years_result]
+    def render():
+        return render_template("admin/reports_yearly.html",
+                               rows=rows,
+                               start_year=start_year,
+                               end_year=end_year,
+                               available_years=available_years())
 
-    return render_template("admin/reports_yearly.html",
-                           rows=rows,
-                           start_year=start_year,
-                           end_year=end_year,
-                           available_years=available_years)
+    return closed_response(render) if closed else render()
 
 
 @admin_bp.route("/rates", methods=["GET", "POST"])
@@ -1006,6 +1046,62 @@ def rates():
                            needs_update=needs_update)
 
 
+@admin_bp.route("/fees", methods=["GET", "POST"])
+@require_role("admin")
+def fees():
+    """Fee tiers per currency and branch; every change is picked up by app.fees within seconds"""
+    if request.method == "POST":
+        if "add_tier" in request.form:
+            try:
+                currency = (request.form.get("currency_code") or "").strip().upper() or None
+                branch_val = request.form.get("branch_id")
+                tier = FeeSchedule(
+                    currency_code=currency,
+                    branch_id=int(branch_val) if branch_val not in (None, "", "None") else None,
+                    min_amount=Money.parse(request.form.get("min_amount") or "0"),
+                    percent=float(request.form.get("percent") or 0) / 100,
+                    flat_fee=Money.parse(request.form.get("flat_fee") or "0"),
+                )
+                if tier.min_amount < 0 or tier.percent < 0 or tier.flat_fee < 0:
+                    raise ValueError("Fees and amounts can't be negative")
+                if not math.isfinite(tier.percent) or tier.percent > MAX_PERCENT:
+                    raise ValueError(f"Percent must be a number from 0 to {MAX_PERCENT * 100:g}")
+            except ValueError as e:
+                flash(f"Invalid fee tier: {e}", "danger")
+                return redirect(url_for("admin.fees"))
+
+            duplicate = FeeSchedule.query.filter_by(
+                currency_code=tier.currency_code, branch_id=tier.branch_id, min_amount=tier.min_amount).first()
+            if duplicate:
+                duplicate.percent, duplicate.flat_fee = tier.percent, tier.flat_fee
+                flash("Fee tier updated", "success")
+            else:
+                db.session.add(tier)
+                flash("Fee tier added", "success")
+            db.session.commit()
+
+        elif "delete_tier" in request.form:
+            tier = db.session.get(FeeSchedule, request.form.get("tier_id", type=int))
+            if tier:
+                db.session.delete(tier)
+                db.session.commit()
+                flash("Fee tier deleted", "success")
+            else:
+                flash("Fee tier not found", "warning")
+
+        return redirect(url_for("admin.fees"))
+
+    tiers = FeeSchedule.query.order_by(
+        FeeSchedule.currency_code, FeeSchedule.branch_id, FeeSchedule.min_amount).all()
+    branches = Branch.query.order_by(Branch.name).all()
+    return render_template("admin/fees.html",
+                           tiers=tiers,
+                           branches=branches,
+                           branch_names={b.id: b.name for b in branches},
+                           default_percent=float(current_app.config.get("FEE_PERCENT", 0.01)),
+                           default_flat=Money.of(current_app.config.get("FEE_FLAT", 10.0)))
+
+
 @admin_bp.route("/rates/fetch_now", methods=["POST"])
 @require_role("admin")
 def rates_fetch_now():
@@ -1041,6 +1137,7 @@ def delete_agent(agent_id):
 
 @admin_bp.route("/transactions/<txid>")
 @require_role("admin")
+@read_only
 def view_transaction(txid):
     """View transaction details including who completed it"""
 
@@ -1365,6 +1462,27 @@ def get_dollar_balance():
         return jsonify({'error': str(e)}), 500
 
 
+@admin_bp.route("/api/provider-stats")
+@require_role("admin")
+def provider_stats():
+    """Per-provider call latency and connection reuse for this worker"""
+    from .providers import registry
+    return jsonify({'pid': os.getpid(), 'providers': registry.stats()})
+
+
+@admin_bp.route("/api/sql-stats")
+@require_role("admin")
+def sql_stats_view():
+    """Statement counts per endpoint and the most recent requests for this worker"""
+    from .sqlstats import sql_stats
+    limit = request.args.get('limit', 50, type=int)
+    return jsonify({
+        'pid': os.getpid(),
+        'endpoints': sql_stats.by_endpoint(),
+        'recent': sql_stats.recent(limit),
+    })
+
+
 # Note: DollarBalanceLog routes are removed since the model doesn't exist
 # If you need them, you'll need to create the DollarBalanceLog model first
 
@@ -1374,7 +1492,11 @@ def manage_dollar_balance():
     """Page to manually adjust dollar balance"""
     if request.method == "POST":
         action = request.form.get("action")
-        amount = float(request.form.get("amount", 0))
+        try:
+            amount = Money.parse(request.form.get("amount", 0))
+        except ValueError:
+            flash("Invalid amount", "warning")
+            return redirect(url_for("admin.manage_dollar_balance"))
         notes = request.form.get("notes", "")
 
         if amount <= 0:
@@ -1385,10 +1507,10 @@ def manage_dollar_balance():
             # Get current balance
             balance = DollarBalance.query.first()
             if not balance:
-                balance = DollarBalance(current_balance=0.0)
+                balance = DollarBalance(current_balance=Money.zero())
                 db.session.add(balance)
 
-            current_balance = float(balance.current_balance)
+            current_balance = Money.of(balance.current_balance)
 
             if action == "add":
                 new_balance = current_balance + amount
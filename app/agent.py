@@ -1,8 +1,13 @@
-from flask import Blueprint, render_template, request, session, redirect, url_for, flash, current_app
+from flask import Blueprint, render_template, request, session, redirect, url_for, flash, current_app, jsonify
 from .utils import require_role
 from .sms import send_sms
 from datetime import datetime
-from .models import db, Transaction, User, Branch, Log, Notification, Currency, ExchangeRate
+from .models import db, Transaction, User, Branch, Log, Notification, Currency
+from .money import Money
+from .replica import read_only
+from .phones import phone_history, history_summary, to_e164
+from .customers import autocomplete_customers, customer_index, record_customers
+from .pricing import rate_table
 from sqlalchemy import func, case, or_, and_
 from decimal import Decimal
 
@@ -14,6 +19,7 @@ agent_bp = Blueprint("agent", __name__, url_prefix="/agent", template_folder="te
 # ---------------------------------------------------------
 @agent_bp.route("/dashboard")
 @require_role("agent")
+@read_only
 def dashboard():
     uid = session.get("user_id")
 
@@ -82,24 +88,27 @@ def dashboard():
     row = query.first()
 
     # Calculate totals including available transactions
+    # Volumes are exact integer-cent sums (Money), so adding them is exact too
+    assigned_pending_volume = Money.of(row.assigned_pending_volume)
+    available_pending_volume = Money.of(row.available_pending_volume)
     total_pending_count = (row.assigned_pending_count or 0) + (row.available_pending_count or 0)
-    total_pending_volume = float(row.assigned_pending_volume or 0.0) + float(row.available_pending_volume or 0.0)
+    total_pending_volume = assigned_pending_volume + available_pending_volume
     total_count = (row.total_assigned_count or 0) + (row.available_pending_count or 0)
-    total_volume = float(row.total_assigned_volume or 0.0) + float(row.available_pending_volume or 0.0)
+    total_volume = Money.of(row.total_assigned_volume) + available_pending_volume
 
     stats = {
         "pending_count": total_pending_count,
         "pending_volume": total_pending_volume,
         "completed_count": row.completed_count or 0,
-        "completed_volume": float(row.completed_volume) if row.completed_volume else 0.0,
+        "completed_volume": Money.of(row.completed_volume),
         "total_count": total_count,
         "total_volume": total_volume,
 
         # Additional stats for more detail if needed
         "assigned_pending_count": row.assigned_pending_count or 0,
         "available_pending_count": row.available_pending_count or 0,
-        "assigned_pending_volume": float(row.assigned_pending_volume) if row.assigned_pending_volume else 0.0,
-        "available_pending_volume": float(row.available_pending_volume) if row.available_pending_volume else 0.0,
+        "assigned_pending_volume": assigned_pending_volume,
+        "available_pending_volume": available_pending_volume,
     }
 
     return render_template("agent/dashboard.html", stats=stats)
@@ -110,6 +119,7 @@ def dashboard():
 # ---------------------------------------------------------
 @agent_bp.route("/completed")
 @require_role("agent")
+@read_only
 def completed_transactions():
     uid = session.get("user_id")
     txs = Transaction.query.filter_by(
@@ -124,6 +134,7 @@ def completed_transactions():
 # ---------------------------------------------------------
 @agent_bp.route("/available")
 @require_role("agent")
+@read_only
 def available_transactions():
     uid = session.get("user_id")
 
@@ -236,7 +247,11 @@ def create_transaction():
     if request.method == "POST":
         sender = request.form["sender_name"]
         receiver = request.form["receiver_name"]
-        amount = float(request.form["amount"])
+        try:
+            amount = Money.parse(request.form["amount"])
+        except ValueError:
+            flash("Invalid amount", "warning")
+            return redirect(url_for("agent.create_transaction"))
         currency = request.form["currency_code"]
         agent_id = session.get("user_id")
 
@@ -248,39 +263,17 @@ def create_transaction():
 
         txid = f"TX-{int(datetime.utcnow().timestamp())}"
 
-        # ✅ CRITICAL FIX: Calculate amount_foreign based on currency
+        # Effective USD rate for the agent's branch: global rate + margin, or the branch override
+        branch_id = rate_table.branch_of(agent_id)
+        rate = rate_table.rate('USD', branch_id) or 18.5  # Fallback rate
+
         if currency.upper() == 'USD':
-            # Get latest exchange rate USD -> ZAR
-            rate_obj = ExchangeRate.query.filter_by(
-                from_currency='USD',
-                to_currency='ZAR'
-            ).order_by(ExchangeRate.updated_at.desc()).first()
-
-            if rate_obj and rate_obj.rate > 0:
-                rate = rate_obj.rate
-                amount_foreign = amount  # Amount in USD (foreign)
-                amount_local = amount * rate  # Convert to ZAR (local)
-            else:
-                # Fallback rate
-                rate = 18.5
-                amount_foreign = amount  # Amount in USD
-                amount_local = amount * rate  # Convert to ZAR
+            amount_foreign = amount  # Amount in USD (foreign)
+            amount_local = amount * rate  # Convert to ZAR (local)
         else:
             # For ZAR transactions
             amount_local = amount  # Amount in ZAR (local)
-
-            # Get latest exchange rate ZAR -> USD (inverse)
-            rate_obj = ExchangeRate.query.filter_by(
-                from_currency='USD',
-                to_currency='ZAR'
-            ).order_by(ExchangeRate.updated_at.desc()).first()
-
-            if rate_obj and rate_obj.rate > 0:
-                rate = rate_obj.rate
-                amount_foreign = amount / rate  # Convert to USD
-            else:
-                rate = 18.5
-                amount_foreign = amount / rate  # Convert to USD
+            amount_foreign = amount / rate  # Convert to USD
 
         # ✅ FIXED: Now amount_foreign has a value
         tx = Transaction(
@@ -295,12 +288,14 @@ def create_transaction():
             status='pending',
             created_by=agent_id,
             agent_id=agent_id,
+            branch_id=branch_id,
             payment_method=payment_method,
             notes=notes or None,
             timestamp=datetime.utcnow()
         )
 
         db.session.add(tx)
+        seen_customers = record_customers(tx)
 
         # Log the creation
         log = Log(
@@ -311,6 +306,7 @@ def create_transaction():
         db.session.add(log)
 
         db.session.commit()
+        customer_index.note(seen_customers)
 
         flash(f"Transaction {txid} created successfully!", "success")
         return redirect(url_for("agent.pending_transactions"))
@@ -332,7 +328,27 @@ def verify_transaction(txid):  # Renamed to avoid conflict
         flash("Transaction not found", "warning")
         return redirect(url_for("agent.dashboard"))
 
-    return render_template("agent/verify.html", tx=tx)
+    history = phone_history(tx.sender_phone_e164, limit=10, exclude_id=tx.id)
+    return render_template("agent/verify.html", tx=tx, history=history)
+
+
+@agent_bp.route("/api/customers")
+@require_role("agent")
+@read_only
+def customer_autocomplete():
+    """Customers whose name or phone starts with ?q= (create screen autofill)"""
+    limit = min(request.args.get("limit", 10, type=int), 50)
+    return jsonify({"customers": autocomplete_customers(request.args.get("q", ""), limit)})
+
+
+@agent_bp.route("/api/phone-history")
+@require_role("agent")
+@read_only
+def phone_history_api():
+    """Recent transactions sent or received by ?phone="""
+    phone = request.args.get("phone", "")
+    limit = min(request.args.get("limit", 10, type=int), 50)
+    return jsonify({"phone": to_e164(phone), "transactions": history_summary(phone_history(phone, limit), phone)})
 
 
 # ---------------------------------------------------------
@@ -372,7 +388,7 @@ def complete_transaction(txid):  # Renamed to avoid conflict
         # Send SMS to sender if phone present
         if tx.sender_phone:
             msg = f"ISA Southern Solutions: Your transfer {txid} has been completed by {agent_name}. Amount: ZAR {tx.amount_local}."
-            resp = send_sms(tx.sender_phone, msg)
+            resp = send_sms(tx.sender_phone_e164 or tx.sender_phone, msg)
 
             # Log SMS
             sms_log = Log(
@@ -386,7 +402,7 @@ def complete_transaction(txid):  # Renamed to avoid conflict
         flash(f"Transaction {txid} marked as completed by {agent_name}", "success")
 
         # Notify admin
-        notify_admin_transaction_completed(txid, agent_name, uid)
+        notify_admin_transaction_completed(tx, agent_name, uid)
 
     except Exception as e:
         db.session.rollback()
@@ -395,13 +411,10 @@ def complete_transaction(txid):  # Renamed to avoid conflict
     return redirect(url_for("agent.available_transactions"))
 
 
-def notify_admin_transaction_completed(txid, agent_name, agent_id):
-    """Notify admin when a transaction is completed"""
+def notify_admin_transaction_completed(tx, agent_name, agent_id):
+    """Notify admin when a transaction is completed (tx is the already-loaded row)"""
     try:
-        # Get transaction details
-        tx = Transaction.query.filter_by(transaction_id=txid).first()
-        if not tx:
-            return
+        txid = tx.transaction_id
 
         # Notify the admin who created it
         notification = Notification(
@@ -497,6 +510,7 @@ def debug_available():
 # ---------------------------------------------------------
 @agent_bp.route("/pending")
 @require_role("agent")
+@read_only
 def pending_transactions():
     uid = session.get("user_id")
 
@@ -520,20 +534,28 @@ def pending_transactions():
     return render_template("agent/pending.html", txs=txs)
 @agent_bp.route("/view/<txid>")
 @require_role("agent")
+@read_only
 def view_transaction(txid):
-    # Get transaction with additional info
+    from sqlalchemy.orm import aliased
+
+    # Each user role needs its own alias, or the three joins collapse into one
+    agent_user = aliased(User, name='agent_user')
+    creator_user = aliased(User, name='creator_user')
+    completer_user = aliased(User, name='completer_user')
+
+    # Get transaction with additional info in a single statement
     result = db.session.query(
         Transaction,
-        User.full_name.label('agent_name'),
-        User.full_name.label('created_by_name'),
-        User.full_name.label('completed_by_name'),
+        agent_user.full_name.label('agent_name'),
+        creator_user.full_name.label('created_by_name'),
+        completer_user.full_name.label('completed_by_name'),
         Branch.name.label('branch_name')
     ).outerjoin(
-        User, Transaction.agent_id == User.id
+        agent_user, Transaction.agent_id == agent_user.id
     ).outerjoin(
-        User, Transaction.created_by == User.id
+        creator_user, Transaction.created_by == creator_user.id
     ).outerjoin(
-        User, Transaction.completed_by == User.id
+        completer_user, Transaction.completed_by == completer_user.id
     ).outerjoin(
         Branch, Transaction.branch_id == Branch.id
     ).filter(
@@ -0,0 +1,161 @@
+# app/assets.py
+"""
+Fingerprinted, precompressed static assets.
+
+    flask build-assets            # also run by gunicorn's master on start
+
+Copies every file under app/static to app/static/dist/ with a content
+hash in its name (admin.css -> dist/admin.3f2a9c81d0e4.css), writes
+.gz and, when the `brotli` package is installed, .br variants of text
+files, and records logical -> hashed names in dist/manifest.json.
+
+When a manifest exists, url_for('static', filename='admin.css') returns
+the hashed name, and hashed files are served with `Cache-Control:
+public, max-age=31536000, immutable`, as the smallest variant the
+client's Accept-Encoding allows. A changed file gets a new name, so
+browsers never revalidate an asset and never see a stale one. Files
+missing from the manifest are served by Flask as before. Old hashed
+files are kept so pages rendered before a deploy still load;
+`--clean` removes them.
+
+A manifest older than any file under app/static (an app preloaded before
+gunicorn's build, a HUP reload after a deploy) is rebuilt when the app
+loads, so a changed asset never keeps its old immutable URL.
+"""
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import shutil
+
+from flask import request, send_from_directory
+
+DIST = "dist"
+MANIFEST = "manifest.json"
+MAX_AGE = 31536000  # one year: hashed names never change content
+COMPRESSIBLE = {".css", ".js", ".json", ".map", ".svg", ".txt", ".html", ".ico"}
+MIN_COMPRESS_BYTES = 256  # smaller files aren't worth a variant
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))  # preferred first
+
+
+def brotli_module():
+    """The optional brotli package, or None"""
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli
+
+
+def _hashed_name(path, data):
+    stem, ext = os.path.splitext(path)
+    return f"{stem}.{hashlib.sha256(data).hexdigest()[:12]}{ext}"
+
+
+def _sources(static_folder):
+    for root, dirs, files in os.walk(static_folder):
+        if os.path.abspath(root) == os.path.abspath(static_folder):
+            dirs[:] = [d for d in dirs if d != DIST]
+        for name in files:
+            yield os.path.join(root, name)
+
+
+def build(static_folder, clean=False):
+    """Write dist/ and its manifest. Returns (manifest, variants written)."""
+    dist = os.path.join(static_folder, DIST)
+    if clean:
+        shutil.rmtree(dist, ignore_errors=True)
+    brotli = brotli_module()
+    manifest = {}
+    variants = 0
+    for source in sorted(_sources(static_folder)):
+        name = os.path.basename(source)
+        logical = os.path.relpath(source, static_folder).replace(os.sep, "/")
+        with open(source, "rb") as f:
+            data = f.read()
+        hashed = _hashed_name(logical, data)
+        target = os.path.join(dist, hashed)
+        manifest[logical] = f"{DIST}/{hashed}"
+        if os.path.exists(target):
+            continue  # content-addressed: already built
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        _write(target, data)
+        if os.path.splitext(name)[1].lower() in COMPRESSIBLE and len(data) >= MIN_COMPRESS_BYTES:
+            _write(target + ".gz", gzip.compress(data, compresslevel=9, mtime=0))
+            variants += 1
+            if brotli is not None:
+                _write(target + ".br", brotli.compress(data, quality=11))
+                variants += 1
+
+    _write(os.path.join(dist, MANIFEST), json.dumps(manifest, indent=2, sort_keys=True).encode())
+    return manifest, variants
+
+
+def _write(path, data):
+    """Write through a temp file so a worker never serves a half-written asset"""
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def is_stale(static_folder):
+    """True if a static file changed after the manifest was written"""
+    try:
+        built = os.path.getmtime(os.path.join(static_folder, DIST, MANIFEST))
+    except OSError:
+        return True
+    for path in _sources(static_folder):
+        try:
+            if os.path.getmtime(path) > built:
+                return True
+        except OSError:
+            continue  # removed while walking
+    return False
+
+
+def load_manifest(static_folder):
+    try:
+        with open(os.path.join(static_folder, DIST, MANIFEST)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def init_app(app):
+    manifest = load_manifest(app.static_folder)
+    if not manifest:
+        return
+    if is_stale(app.static_folder):
+        try:
+            manifest, _ = build(app.static_folder)
+        except OSError as e:
+            app.logger.warning(f"Static assets changed since the last build, serving them unhashed: {e}")
+            return
+    hashed = set(manifest.values())
+    send_static_file = app.view_functions["static"]
+
+    @app.url_defaults
+    def hashed_static_url(endpoint, values):
+        if endpoint == "static" and values.get("filename") in manifest:
+            values["filename"] = manifest[values["filename"]]
+
+    def static(filename):
+        if filename not in hashed:
+            return send_static_file(filename=filename)
+        for encoding, suffix in ENCODINGS:
+            variant = os.path.join(app.static_folder, filename + suffix)
+            if request.accept_encodings.quality(encoding) > 0 and os.path.exists(variant):
+                response = send_from_directory(app.static_folder, filename + suffix, max_age=MAX_AGE,
+                                               mimetype=mimetypes.guess_type(filename)[0])
+                response.headers["Content-Encoding"] = encoding
+                break
+        else:
+            response = send_from_directory(app.static_folder, filename, max_age=MAX_AGE)
+        response.headers["Cache-Control"] = f"public, max-age={MAX_AGE}, immutable"
+        response.vary.add("Accept-Encoding")
+        return response
+
+    app.view_functions["static"] = static
+
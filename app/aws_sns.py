@@ -1,18 +1,16 @@
 # app/aws_sns.py
-import boto3
 import os
-                            
-# Read credentials from environment variables
-sns_client = boto3.client(
-    "sns",
-    aws_access_key_id=os.environ.get("AWS_ACCESS_KEY_ID"),
-    aws_secret_access_key=os.environ.get("AWS_SECRET_ACCESS_KEY"),
-    region_name=os.environ.get("AWS_REGION", "us-east-1")
-)
+
+from .providers import registry
 
 SNS_TOPIC_ARN = os.environ.get("SNS_TOPIC_ARN")
 
 
+def get_sns_client():
+    """Pooled boto3 SNS client, created on first use (see app.providers)"""
+    return registry.get("sns")
+
+
 def send_sns_notification(txid, action, admin_name, amount=None, agent_id=None):
     message = f"Transaction {txid} {action} by {admin_name}"
     if amount:
@@ -21,11 +19,47 @@ def send_sns_notification(txid, action, admin_name, amount=None, agent_id=None):
         message += f", Agent: {agent_id}"
 
     try:
-        sns_client.publish(
-            TopicArn=SNS_TOPIC_ARN,
-            Message=message,
-            Subject=f"Transaction {action.capitalize()}"
-        )
+        with registry.timed("sns"):
+            get_sns_client().publish(
+                TopicArn=SNS_TOPIC_ARN,
+                Message=message,
+                Subject=f"Transaction {action.capitalize()}"
+            )
+    except Exception as e:
+        # Do NOT block your app if SNS fails
+        print(f"Failed to send SNS: {e}")
+
+
+def send_transaction_notification(transaction, action, agent_id=None, **extra):
+    """
+    Publish one transaction event (or a low-balance alert: any object with
+    current_balance). Returns the SNS MessageId, or None if the publish failed.
+    No agent_id message attribute: that is reserved for app.fanout's digests.
+    """
+    txid = getattr(transaction, "transaction_id", None)
+    if txid:
+        message = f"Transaction {txid} {action}"
+        amount = getattr(transaction, "amount_local", None)
+        if amount:
+            message += f", Amount: {amount}"
+    else:
+        message = f"{action}: balance {getattr(transaction, 'current_balance', '?')}"
+    if agent_id:
+        message += f", Agent: {agent_id}"
+    sms_result = extra.get("sms_result")
+    if sms_result and not sms_result.get("success"):
+        message += f", Error: {sms_result.get('error')}"
+
+    try:
+        with registry.timed("sns"):
+            response = get_sns_client().publish(
+                TopicArn=SNS_TOPIC_ARN,
+                Message=message,
+                Subject=f"Transaction {action.replace('_', ' ').capitalize()}",
+                MessageAttributes={"action": {"DataType": "String", "StringValue": action}},
+            )
     except Exception as e:
         # Do NOT block your app if SNS fails
         print(f"Failed to send SNS: {e}")
+        return None
+    return response.get("MessageId")
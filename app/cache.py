@@ -0,0 +1,116 @@
+# app/cache.py
+"""
+Small in-process caches.
+
+    agent_names = TTLCache("agent_names", ttl=60)
+    names = agent_names.get_or_set("all", load_agent_names)
+
+Each worker has its own copy; entries expire after `ttl` seconds (None:
+never, for values that can't change) and the least recently used entry
+is evicted past `maxsize`. Hits and misses are counted per cache name in
+app.metrics (cache_requests_total).
+
+A SettingStamp tells every worker that something cached changed:
+
+    rates_changed = SettingStamp("rates_changed_at")
+    rates_changed.bump(connection)     # in the writing transaction
+    if rates_changed.value() != built_from: rebuild()
+"""
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+from .metrics import metrics
+
+_MISSING = object()
+
+
+class TTLCache:
+
+    def __init__(self, name, ttl=60, maxsize=1024):
+        self.name = name
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._data = OrderedDict()  # key -> (expires_at or None, value)
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is not _MISSING:
+                expires_at, value = entry
+                if expires_at is None or expires_at > time.monotonic():
+                    self._data.move_to_end(key)
+                    metrics.cache_hit(self.name)
+                    return value
+                del self._data[key]
+        metrics.cache_miss(self.name)
+        return default
+
+    def set(self, key, value, ttl=_MISSING):
+        """Store value; ttl overrides the cache default (None: never expires)"""
+        ttl = self.ttl if ttl is _MISSING else ttl
+        expires_at = None if ttl is None else time.monotonic() + ttl
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def get_or_set(self, key, load, ttl=_MISSING):
+        """Cached value for key, calling load() on a miss (concurrent misses may each load)"""
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = load()
+            self.set(key, value, ttl)
+        return value
+
+    def invalidate(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class SettingStamp:
+    """A change marker in the settings table, re-read at most every `ttl` seconds"""
+
+    def __init__(self, key, ttl=5):
+        self.key = key
+        self._cache = TTLCache(key, ttl=ttl, maxsize=1)
+
+    def value(self):
+        return self._cache.get_or_set("value", self._load)
+
+    def _load(self):
+        from sqlalchemy import select
+        from . import db
+        from .models import Setting
+
+        return db.session.execute(select(Setting.value).where(Setting.key == self.key)).scalar() or "0"
+
+    def bump(self, connection):
+        """Record a change on connection, inside the caller's transaction"""
+        from sqlalchemy.exc import IntegrityError
+        from .models import Setting
+
+        table = Setting.__table__
+        values = {"value": repr(time.time()), "updated_at": datetime.utcnow()}
+        changed = table.update().where(table.c.key == self.key).values(**values)
+        if not connection.execute(changed).rowcount:
+            try:
+                with connection.begin_nested():
+                    connection.execute(table.insert().values(key=self.key, **values))
+            except IntegrityError:  # another worker created it first
+                connection.execute(changed)
+        self.clear()
+
+    def clear(self):
+        """Forget this worker's copy"""
+        self._cache.clear()
@@ -0,0 +1,197 @@
+# app/cli.py
+"""`flask` commands for maintenance jobs. Registered in create_app()."""
+import click
+
+
+def register_cli(app):
+
+    @app.cli.command("seed")
+    def seed():
+        """Create tables and seed a brand new database."""
+        from . import setup_database
+        setup_database()
+
+    @app.cli.command("init-schema")
+    def init_schema():
+        """Create missing tables and record the schema fingerprint."""
+        from .schema import ensure_schema, schema_fingerprint
+
+        changed = ensure_schema()
+        click.echo(f"Schema {schema_fingerprint()} {'updated' if changed else 'already current'}")
+
+    @app.cli.command("migrate-money")
+    @click.option("--swap", is_flag=True, help="Also swap the cents columns into place (release step).")
+    @click.option("--batch-size", default=5000, show_default=True, help="Rows per backfill transaction.")
+    def migrate_money(swap, batch_size):
+        """Convert Float money columns to integer cents."""
+        from .migrations import migrate_money_columns
+
+        for row in migrate_money_columns(swap=swap, batch_size=batch_size):
+            click.echo(
+                f"  {row['column']}: backfilled={row['backfilled']} "
+                f"sub-cent residue={row['residue']} swapped={row['swapped']}"
+            )
+        if not swap:
+            click.echo("Backfill done. Run again with --swap when deploying the cents-aware code.")
+
+    @app.cli.command("build-assets")
+    @click.option("--clean", is_flag=True, help="Remove hashed files from earlier builds first.")
+    def build_assets(clean):
+        """Fingerprint and precompress app/static into app/static/dist."""
+        from .assets import brotli_module, build
+
+        manifest, variants = build(app.static_folder, clean=clean)
+        click.echo(f"{len(manifest)} assets, {variants} compressed variants")
+        if brotli_module() is None:
+            click.echo("brotli is not installed: wrote gzip variants only")
+
+    @app.cli.command("generate-data")
+    @click.option("--transactions", default=100000, show_default=True)
+    @click.option("--agents", default=50, show_default=True)
+    @click.option("--branches", default=10, show_default=True)
+    @click.option("--days", default=365, show_default=True, help="History span ending at --end-date.")
+    @click.option("--seed", default=42, show_default=True, help="Same seed and end date give the same data.")
+    @click.option("--end-date", type=click.DateTime(formats=["%Y-%m-%d"]), default=None,
+                  help="Last day of generated history (default: today).")
+    @click.option("--chunk-size", default=10000, show_default=True, help="Rows per COPY/executemany batch.")
+    def generate_data(transactions, agents, branches, days, seed, end_date, chunk_size):
+        """Bulk-load a synthetic dataset for scale testing."""
+        import time
+        from datetime import timedelta
+        from .datagen import generate
+
+        if end_date is not None:
+            end_date = end_date + timedelta(days=1)
+        started = time.perf_counter()
+        summary = generate(transactions=transactions, agents=agents, branches=branches, days=days,
+                           seed=seed, end_date=end_date, chunk_size=chunk_size, progress=click.echo)
+        click.echo(f"Generated {summary['transactions']} transactions in {time.perf_counter() - started:.1f}s")
+
+    @app.cli.command("sync-replica")
+    def sync_replica():
+        """Copy the primary SQLite database into DATABASE_REPLICA_URL (local testing)."""
+        from . import db
+        from .replica import REPLICA_BIND, sync_sqlite_replica
+
+        if REPLICA_BIND not in app.config.get("SQLALCHEMY_BINDS", {}):
+            raise click.ClickException("DATABASE_REPLICA_URL is not set")
+        try:
+            sync_sqlite_replica(db)
+        except RuntimeError as e:
+            raise click.ClickException(str(e))
+        click.echo("Replica refreshed from primary")
+
+    @app.cli.command("search-index")
+    def search_index():
+        """Build the transaction search index (pg_trgm GIN / SQLite FTS5)."""
+        from .search import create_search_index
+
+        name = create_search_index()
+        click.echo(f"Search index ready: {name}" if name else "No search index for this database; using LIKE scans")
+
+    @app.cli.command("migrate-phones")
+    @click.option("--batch-size", default=5000, show_default=True, help="Rows per backfill transaction.")
+    def migrate_phones(batch_size):
+        """Add, backfill and index the E.164 phone columns."""
+        from .migrations import migrate_phone_columns
+
+        updated, unparseable = migrate_phone_columns(batch_size=batch_size)
+        click.echo(f"Backfilled {updated} transactions ({unparseable} numbers could not be normalized)")
+
+    @app.cli.command("report-indexes")
+    def report_indexes():
+        """Index transactions.timestamp for the daily report."""
+        from .migrations import create_report_indexes
+
+        if not create_report_indexes():
+            raise click.ClickException("No transactions table: run db.create_all() first")
+        click.echo("ix_transactions_timestamp is in place")
+
+    @app.cli.command("close-day")
+    @click.argument("day", required=False)
+    @click.option("--reopen", is_flag=True, help="Drop the day's snapshot so reports read it live again.")
+    def close_day(day, reopen):
+        """Freeze DAY (YYYY-MM-DD), or every finished day not closed yet."""
+        from datetime import date
+        from sqlalchemy.exc import IntegrityError
+        from . import db
+        from .snapshots import close_day as close, close_open_days, reopen_days
+
+        if day is None:
+            if reopen:
+                raise click.ClickException("--reopen needs a DAY")
+            closed = close_open_days()
+            click.echo(f"Closed {len(closed)} day(s)" + (f": {closed[0]} .. {closed[-1]}" if closed else ""))
+            return
+        try:
+            day = date.fromisoformat(day)
+        except ValueError:
+            raise click.ClickException(f"Invalid date {day!r}: use YYYY-MM-DD")
+        if reopen:
+            with db.engine.begin() as conn:
+                reopen_days(conn, [day])
+            click.echo(f"Reopened {day}")
+            return
+        try:
+            snapshot = close(day)
+        except ValueError as e:
+            raise click.ClickException(str(e))
+        except IntegrityError:
+            db.session.rollback()
+            raise click.ClickException(f"{day} was closed by another process at the same time; run again to replace it")
+        click.echo(f"Closed {day}: {snapshot.transaction_count} transactions, ZAR {snapshot.total_local}, "
+                   f"closing balance USD {snapshot.closing_dollar_balance}")
+
+    @app.cli.command("fanout-flush")
+    def fanout_flush():
+        """Send agents the digest of transactions made available since the last window."""
+        from .fanout import flush
+
+        result = flush()
+        if result is None:
+            click.echo("Nothing to announce (or SNS_TOPIC_ARN unset)")
+            return
+        click.echo(f"{result['transactions']} transaction(s) in {result['digests']} digest(s), "
+                   f"{result['calls']} PublishBatch call(s), {result['failed']} failed")
+
+    @app.cli.command("backfill-customers")
+    @click.option("--chunk-size", default=5000, show_default=True, help="Rows per insert batch.")
+    def backfill_customers(chunk_size):
+        """Build the customer directory from existing transactions (run migrate-phones first)."""
+        from .customers import backfill_customers as backfill
+
+        total = backfill(chunk_size=chunk_size, progress=click.echo)
+        click.echo(f"Customer directory holds {total} customers")
+
+    @app.cli.command("export")
+    @click.argument("name", type=click.Choice(["transactions", "logs", "dollar_balance_logs"]))
+    @click.option("--start", help="First day included (YYYY-MM-DD).")
+    @click.option("--end", help="First day excluded (YYYY-MM-DD).")
+    @click.option("--status", help="transactions.status / logs.action / dollar_balance_logs.change_type.")
+    @click.option("--format", "fmt", type=click.Choice(["csv", "jsonl"]), default="csv", show_default=True)
+    @click.option("-o", "--output", default="-", help="File to write; a .gz suffix compresses. Default stdout.")
+    @click.option("--chunk-size", default=5000, show_default=True, help="Rows fetched per cursor round trip.")
+    def export(name, start, end, status, fmt, output, chunk_size):
+        """Stream a table to CSV/JSONL with flat memory use."""
+        import sys
+        import time
+        from . import exports
+
+        try:
+            chunks = exports.export_chunks(name, fmt, exports.parse_date(start), exports.parse_date(end),
+                                           status, gzip=output.endswith(".gz"), chunk_size=chunk_size)
+        except ValueError as e:
+            raise click.ClickException(str(e))
+
+        started = time.perf_counter()
+        written = 0
+        out = sys.stdout.buffer if output == "-" else open(output, "wb")
+        try:
+            for chunk in chunks:
+                out.write(chunk)
+                written += len(chunk)
+        finally:
+            if out is not sys.stdout.buffer:
+                out.close()
+        if output != "-":
+            click.echo(f"Wrote {written / 1e6:.1f} MB to {output} in {time.perf_counter() - started:.1f}s")
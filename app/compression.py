@@ -0,0 +1,128 @@
+# app/compression.py
+"""
+Response compression for HTML, JSON and other text responses.
+
+Negotiated through Accept-Encoding: brotli when the client accepts it and
+the `brotli` package is installed, else gzip. Bodies under
+COMPRESS_MIN_BYTES are sent as they are (the headers would outweigh the
+saving). Streamed responses are compressed chunk by chunk, each chunk
+flushed as it is produced, so a streamed page still arrives
+progressively.
+
+Levels trade CPU for bytes: COMPRESS_GZIP_LEVEL (1-9, default 6) and
+COMPRESS_BROTLI_QUALITY (0-11, default 5) are where dynamic pages stop
+getting noticeably smaller for the CPU spent; raise them when agents'
+mobile data costs more than server time. COMPRESS=false turns it off.
+
+Skipped: responses that already carry a Content-Encoding (CSV/JSONL
+exports, precompressed static assets), file responses sent with
+direct_passthrough, 1xx/204/206/304 responses, non-text types, and
+`Cache-Control: no-transform`. A compressed response's ETag becomes weak,
+since its bytes differ from the uncompressed representation.
+"""
+import os
+import zlib
+
+from flask import request
+from werkzeug.wsgi import ClosingIterator
+
+from .assets import brotli_module
+
+ENABLED = os.environ.get("COMPRESS", "true").lower() in ("1", "true", "yes", "on")
+MIN_BYTES = int(os.environ.get("COMPRESS_MIN_BYTES", 1024))
+GZIP_LEVEL = int(os.environ.get("COMPRESS_GZIP_LEVEL", 6))
+BROTLI_QUALITY = int(os.environ.get("COMPRESS_BROTLI_QUALITY", 5))
+
+brotli = brotli_module()
+
+COMPRESSIBLE_TYPES = (
+    "text/", "application/json", "application/javascript", "application/xml",
+    "application/x-ndjson", "image/svg+xml",
+)
+
+
+def _gzip():
+    return zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)  # 31: gzip container
+
+
+class _Brotli:
+    """brotli.Compressor with zlib's compress()/flush() interface"""
+
+    def __init__(self):
+        self._compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+
+    def compress(self, data):
+        return self._compressor.process(data)
+
+    def flush(self, mode=None):
+        if mode == zlib.Z_SYNC_FLUSH:
+            return self._compressor.flush()
+        return self._compressor.finish()
+
+
+def choose_encoding():
+    """'br', 'gzip' or None for the current request"""
+    accepted = request.accept_encodings
+    if brotli is not None and accepted.quality("br") > 0:
+        return "br"
+    if accepted.quality("gzip") > 0:
+        return "gzip"
+    return None
+
+
+def _compressor(encoding):
+    return _Brotli() if encoding == "br" else _gzip()
+
+
+def _stream(chunks, compressor):
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode()
+        if chunk:
+            data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+            if data:
+                yield data
+    yield compressor.flush()
+
+
+def _compressible(response):
+    if response.status_code < 200 or response.status_code in (204, 206, 304):
+        return False
+    if response.direct_passthrough or "Content-Encoding" in response.headers:
+        return False
+    if "no-transform" in response.headers.get("Cache-Control", ""):
+        return False
+    return (response.mimetype or "").startswith(COMPRESSIBLE_TYPES)
+
+
+def compress_response(response):
+    if request.method == "HEAD" or not _compressible(response):
+        return response
+    response.vary.add("Accept-Encoding")
+    encoding = choose_encoding()
+    if encoding is None:
+        return response
+
+    if response.is_streamed:
+        # Forward close() to the original iterable, so its cleanup (server-side
+        # cursors, connections) still runs when a client disconnects mid-stream
+        chunks = response.response
+        response.response = ClosingIterator(_stream(chunks, _compressor(encoding)),
+                                            getattr(chunks, "close", None))
+        response.headers.pop("Content-Length", None)
+    else:
+        body = response.get_data()
+        if len(body) < MIN_BYTES:
+            return response
+        compressor = _compressor(encoding)
+        response.set_data(compressor.compress(body) + compressor.flush())
+    response.headers["Content-Encoding"] = encoding
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+
+def init_app(app):
+    if ENABLED:
+        app.after_request(compress_response)
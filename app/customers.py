@@ -0,0 +1,393 @@
+# app/customers.py
+"""
+Customer directory for the create-transaction forms.
+
+Every sender and receiver with a parseable phone is upserted into
+`customers`, deduplicated on (E.164 phone, normalized name), when a
+transaction is created. Autocomplete is served from CustomerIndex, two
+sorted key lists (names and phone digits) searched with bisect, so a
+prefix lookup is O(log n) plus the handful of rows it returns. Until a
+worker's index has finished loading, and with CUSTOMER_INDEX=false,
+lookups fall back to a range scan on the customers indexes.
+
+Each worker refreshes new customers from the database every
+CUSTOMER_INDEX_REFRESH seconds; its own creates show up immediately.
+Build the table from existing transactions with `flask backfill-customers`.
+"""
+import bisect
+import os
+import re
+import threading
+import time
+from array import array
+from datetime import datetime
+
+from sqlalchemy import func, select
+
+from . import db
+from .metrics import metrics
+from .models import Customer, Transaction
+from .phones import DEFAULT_COUNTRY, to_e164
+
+INDEX_ENABLED = os.environ.get("CUSTOMER_INDEX", "true").lower() not in ("0", "false", "no")
+REFRESH_INTERVAL = float(os.environ.get("CUSTOMER_INDEX_REFRESH", 30))
+# Prefix matches ranked per lookup; a 1-2 character prefix can match thousands
+SCAN_LIMIT = 200
+MIN_QUERY = 2
+# Above this many new rows a refresh re-sorts instead of inserting one by one
+RESORT_THRESHOLD = 2000
+
+_SEP = "\x00"  # sorts below every character, so "jo\0.." < "joe\0.."
+
+
+def normalize_name(name):
+    """Dedup/search key: casefolded with whitespace collapsed"""
+    return " ".join((name or "").split()).casefold()
+
+
+def phone_prefix(q):
+    """E.164 prefix for a partially typed number ('082 12' -> '+278212'), or None"""
+    compact = re.sub(r"[\s\-()]", "", q or "")
+    if not re.fullmatch(r"\+?\d+", compact):
+        return None
+    if compact.startswith("+"):
+        return compact
+    if compact.startswith("00"):
+        return "+" + compact[2:]
+    if compact.startswith("0"):
+        return "+" + DEFAULT_COUNTRY + compact[1:]
+    return "+" + compact
+
+
+def _upper_bound(prefix):
+    """Smallest string greater than every string starting with prefix"""
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def _rank(candidates, limit):
+    # Regulars first, then alphabetical
+    candidates.sort(key=lambda c: (-c["transaction_count"], c["name"].casefold()))
+    return candidates[:limit]
+
+
+# ---------------------------------------------------------
+# Writes
+# ---------------------------------------------------------
+def _upsert_statement(values):
+    dialect = db.engine.dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        return None
+    stmt = insert(Customer).values(**values)
+    return stmt.on_conflict_do_update(
+        index_elements=["phone_e164", "name_key"],
+        set_={
+            "transaction_count": Customer.transaction_count + 1,
+            "last_seen_at": stmt.excluded.last_seen_at,
+            "name": stmt.excluded.name,  # keep the latest spelling
+        },
+    ).returning(Customer.id, Customer.transaction_count)
+
+
+def record_customer(name, phone, seen_at=None):
+    """
+    Upsert one party in the current transaction.
+    Returns (id, name, name_key, phone_e164, is_new), or None when the
+    party has no usable name or phone.
+    """
+    number = to_e164(phone)
+    key = normalize_name(name)
+    if not number or not key:
+        return None
+    name = " ".join(name.split())
+    seen_at = seen_at or datetime.utcnow()
+    values = dict(name=name, name_key=key, phone_e164=number, transaction_count=1,
+                  last_seen_at=seen_at, created_at=seen_at)
+
+    stmt = _upsert_statement(values)
+    if stmt is not None:
+        # One atomic statement: concurrent creates for a new customer can't collide
+        customer_id, count = db.session.execute(stmt).one()
+        return customer_id, name, key, number, count == 1
+
+    customer = Customer.query.filter_by(phone_e164=number, name_key=key).first()
+    if customer:
+        customer.transaction_count = Customer.transaction_count + 1
+        customer.last_seen_at = seen_at
+        customer.name = name
+        db.session.flush()
+        return customer.id, name, key, number, False
+    customer = Customer(**values)
+    db.session.add(customer)
+    db.session.flush()
+    return customer.id, name, key, number, True
+
+
+def record_customers(tx):
+    """Upsert the sender and receiver of a new transaction; pass the result to customer_index.note() after commit"""
+    seen = [
+        record_customer(tx.sender_name, tx.sender_phone, tx.timestamp),
+        record_customer(tx.receiver_name, tx.receiver_phone, tx.timestamp),
+    ]
+    return [s for s in seen if s]
+
+
+def backfill_customers(chunk_size=5000, progress=None):
+    """
+    (Re)build `customers` from transactions: one row per (phone, name),
+    with transaction_count and last_seen_at recomputed. Idempotent.
+    Returns the number of distinct customers.
+    """
+    found = {}
+    for name_col, e164_col in (
+        (Transaction.sender_name, Transaction.sender_phone_e164),
+        (Transaction.receiver_name, Transaction.receiver_phone_e164),
+    ):
+        rows = db.session.execute(
+            select(name_col, e164_col, func.count(), func.max(Transaction.timestamp))
+            .where(e164_col.isnot(None))
+            .group_by(e164_col, name_col)
+        ).yield_per(chunk_size)
+        for name, number, count, last_seen in rows:
+            key = normalize_name(name)
+            if not key:
+                continue
+            entry = found.get((number, key))
+            if entry is None:
+                found[(number, key)] = [" ".join(name.split()), count, last_seen]
+            else:
+                entry[1] += count
+                if last_seen and (entry[2] is None or last_seen > entry[2]):
+                    entry[0], entry[2] = " ".join(name.split()), last_seen
+
+    now = datetime.utcnow()
+    existing = dict(
+        ((number, key), cid) for cid, number, key in
+        db.session.execute(select(Customer.id, Customer.phone_e164, Customer.name_key))
+    )
+    inserts, updates = [], []
+    for (number, key), (name, count, last_seen) in found.items():
+        row = dict(name=name, name_key=key, phone_e164=number, transaction_count=count,
+                   last_seen_at=last_seen or now)
+        if (number, key) in existing:
+            updates.append(dict(row, id=existing[(number, key)]))
+        else:
+            inserts.append(dict(row, created_at=now))
+
+    for i in range(0, len(inserts), chunk_size):
+        db.session.execute(Customer.__table__.insert(), inserts[i:i + chunk_size])
+        db.session.commit()
+        if progress:
+            progress(f"  customers: {min(i + chunk_size, len(inserts))}/{len(inserts)} inserted")
+    for i in range(0, len(updates), chunk_size):
+        db.session.bulk_update_mappings(Customer, updates[i:i + chunk_size])
+        db.session.commit()
+    return len(found)
+
+
+# ---------------------------------------------------------
+# Reads
+# ---------------------------------------------------------
+class CustomerIndex:
+    """
+    In-memory prefix index over every customer.
+
+    Records live in parallel arrays addressed by position; the two key
+    lists hold "<key>\\0<position>" strings kept sorted, so a lookup is a
+    bisect to the first key >= prefix and a forward walk while keys still
+    start with it. Readers take no lock: writers append records before
+    publishing their keys, and large refreshes swap in new lists.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._state = "empty"  # empty -> loading -> ready
+        self._refreshed_at = 0.0
+        self._max_id = 0
+        self._noted = set()  # ids added by this worker ahead of _max_id
+        self._ids = array("q")
+        self._counts = array("l")
+        self._names = []
+        self._phones = []
+        self._by_name = []
+        self._by_phone = []
+
+    @property
+    def ready(self):
+        return self._state == "ready"
+
+    def __len__(self):
+        return len(self._ids)
+
+    # --- loading ---
+    def _append(self, customer_id, name, key, number, count):
+        pos = len(self._ids)
+        self._ids.append(customer_id)
+        self._counts.append(count)
+        self._names.append(name)
+        self._phones.append(number)
+        return f"{key}{_SEP}{pos}", f"{number[1:]}{_SEP}{pos}"
+
+    def _load_since(self, last_id):
+        rows = db.session.execute(
+            select(Customer.id, Customer.name, Customer.name_key, Customer.phone_e164, Customer.transaction_count)
+            .where(Customer.id > last_id)
+            .order_by(Customer.id)
+        ).yield_per(20000)
+        names, phones, max_id = [], [], last_id
+        with self._lock:
+            for customer_id, name, key, number, count in rows:
+                max_id = customer_id
+                if customer_id in self._noted:
+                    self._noted.discard(customer_id)
+                    continue
+                by_name, by_phone = self._append(customer_id, name, key, number, count)
+                names.append(by_name)
+                phones.append(by_phone)
+            if len(names) > RESORT_THRESHOLD or not self._by_name:
+                self._by_name = sorted(self._by_name + names)
+                self._by_phone = sorted(self._by_phone + phones)
+            else:
+                for by_name, by_phone in zip(names, phones):
+                    bisect.insort(self._by_name, by_name)
+                    bisect.insort(self._by_phone, by_phone)
+            self._max_id = max_id
+            self._refreshed_at = time.monotonic()
+        return len(names)
+
+    def build(self):
+        """Load every customer (needs an app context). Returns the count."""
+        self._state = "loading"
+        try:
+            self._load_since(self._max_id)
+        except Exception:
+            self._state = "empty"
+            raise
+        self._state = "ready"
+        return len(self)
+
+    def warm(self, app):
+        """Build in a background thread; lookups use the database until it's done"""
+        with self._lock:
+            if self._state != "empty":
+                return
+            self._state = "loading"
+
+        def run():
+            with app.app_context():
+                try:
+                    self.build()
+                    app.logger.info("Customer index loaded: %d customers", len(self))
+                except Exception:
+                    app.logger.exception("Customer index build failed; using database lookups")
+                finally:
+                    db.session.remove()
+
+        threading.Thread(target=run, name="customer-index", daemon=True).start()
+
+    def refresh(self, force=False):
+        """Pick up customers created by other workers"""
+        if not self.ready:
+            return 0
+        if not force and time.monotonic() - self._refreshed_at < REFRESH_INTERVAL:
+            return 0
+        self._refreshed_at = time.monotonic()  # one refresher at a time
+        return self._load_since(self._max_id)
+
+    def note(self, seen):
+        """Apply this worker's own upserts (record_customers() results) after commit"""
+        if not self.ready:
+            return
+        with self._lock:
+            for customer_id, name, key, number, is_new in seen:
+                if is_new and customer_id > self._max_id and customer_id not in self._noted:
+                    self._noted.add(customer_id)
+                    by_name, by_phone = self._append(customer_id, name, key, number, 1)
+                    bisect.insort(self._by_name, by_name)
+                    bisect.insort(self._by_phone, by_phone)
+                    continue
+                pos = self._find(number, key)
+                if pos is not None:
+                    self._counts[pos] += 1
+                    self._names[pos] = name
+
+    def _find(self, number, key):
+        digits = number[1:] + _SEP
+        keys = self._by_phone
+        i = bisect.bisect_left(keys, digits)
+        while i < len(keys) and keys[i].startswith(digits):
+            pos = int(keys[i][len(digits):])
+            if normalize_name(self._names[pos]) == key:
+                return pos
+            i += 1
+        return None
+
+    # --- lookups ---
+    def search(self, q, limit=10):
+        phone = phone_prefix(q)
+        if phone:
+            keys, prefix = self._by_phone, phone[1:]
+        else:
+            keys, prefix = self._by_name, normalize_name(q)
+        if not prefix:
+            return []
+        positions = []
+        i = bisect.bisect_left(keys, prefix)
+        end = min(i + SCAN_LIMIT, len(keys))
+        while i < end:
+            key = keys[i]
+            if not key.startswith(prefix):
+                break
+            positions.append(int(key[key.rindex(_SEP) + 1:]))
+            i += 1
+        # Rank positions first; only the returned rows become dicts
+        counts = self._counts
+        positions.sort(key=lambda pos: -counts[pos])
+        return _rank([
+            {"id": self._ids[pos], "name": self._names[pos], "phone": self._phones[pos],
+             "transaction_count": counts[pos]}
+            for pos in positions[:limit * 3]
+        ], limit)
+
+
+customer_index = CustomerIndex()
+
+
+def search_customers_db(q, limit=10):
+    """Index range scan on customers (fallback while the in-memory index loads)"""
+    phone = phone_prefix(q)
+    if phone:
+        column, prefix = Customer.phone_e164, phone
+    else:
+        column, prefix = Customer.name_key, normalize_name(q)
+    if not prefix:
+        return []
+    rows = db.session.execute(
+        select(Customer.id, Customer.name, Customer.phone_e164, Customer.transaction_count)
+        .where(column >= prefix, column < _upper_bound(prefix))
+        .order_by(column)
+        .limit(SCAN_LIMIT)
+    )
+    return _rank([
+        {"id": cid, "name": name, "phone": number, "transaction_count": count}
+        for cid, name, number, count in rows
+    ], limit)
+
+
+def autocomplete_customers(q, limit=10):
+    """Customers whose name or phone starts with q, regulars first"""
+    q = (q or "").strip()
+    if len(q) < MIN_QUERY:
+        return []
+    if INDEX_ENABLED:
+        if customer_index.ready:
+            customer_index.refresh()
+            metrics.cache_hit("customers")
+            return customer_index.search(q, limit)
+        from flask import current_app
+        customer_index.warm(current_app._get_current_object())
+    metrics.cache_miss("customers")
+    return search_customers_db(q, limit)
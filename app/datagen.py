@@ -0,0 +1,273 @@
+# app/datagen.py
+"""
+Deterministic synthetic data for scale testing.
+
+    flask generate-data --transactions 1000000 --agents 200 --seed 42
+
+Rows are produced as plain tuples in chunks and loaded with executemany on
+SQLite or COPY on PostgreSQL, bypassing the ORM, so millions of rows load
+in minutes. The same --seed and --end-date always produce the same data.
+"""
+import csv
+import io
+import random
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+
+from . import db
+from .phones import to_e164
+
+FIRST_NAMES = [
+    "Tendai", "Farai", "Chipo", "Tatenda", "Rudo", "Blessing", "Kudzai", "Nyasha", "Tapiwa", "Tariro",
+    "Sipho", "Thabo", "Lerato", "Ayanda", "Nomsa", "Musa", "Zanele", "Bongani", "Precious", "Memory",
+    "John", "Mary", "Peter", "Grace", "David", "Ruth", "Joseph", "Esther", "Simon", "Faith",
+]
+LAST_NAMES = [
+    "Moyo", "Ncube", "Dube", "Sibanda", "Mpofu", "Nkomo", "Chikwanha", "Mutasa", "Marufu", "Gumbo",
+    "Ndlovu", "Khumalo", "Dlamini", "Nkosi", "Mokoena", "Mahlangu", "Zulu", "Banda", "Phiri", "Tembo",
+]
+CITIES = ["Johannesburg", "Pretoria", "Durban", "Cape Town", "Polokwane", "Musina", "Harare", "Bulawayo"]
+
+# status, weight
+STATUS_MIX = [("completed", 70), ("pending", 20), ("cancelled", 5), ("failed", 5)]
+
+OPENING_BALANCE_CENTS = 100_000_000_000  # $1bn
+
+
+class BulkLoader:
+    """Fast raw inserts: COPY on PostgreSQL, executemany elsewhere"""
+
+    def __init__(self, engine, chunk_size=10000):
+        self.engine = engine
+        self.dialect = engine.dialect.name
+        self.chunk_size = chunk_size
+
+    def _value(self, value):
+        if isinstance(value, datetime) and self.dialect == "sqlite":
+            # Same text format SQLAlchemy's SQLite DateTime writes
+            return value.strftime("%Y-%m-%d %H:%M:%S.%f")
+        return value
+
+    def load(self, table, columns, rows):
+        """Insert an iterable of tuples; returns the number of rows written"""
+        total = 0
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= self.chunk_size:
+                total += self._flush(table, columns, chunk)
+                chunk = []
+        if chunk:
+            total += self._flush(table, columns, chunk)
+        return total
+
+    def _flush(self, table, columns, chunk):
+        raw = self.engine.raw_connection()
+        try:
+            cur = raw.cursor()
+            if self.dialect == "postgresql":
+                buf = io.StringIO()
+                csv.writer(buf).writerows(chunk)
+                buf.seek(0)
+                cur.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buf)
+            else:
+                if self.dialect == "sqlite":
+                    cur.execute("PRAGMA synchronous = OFF")
+                marks = ", ".join(["?" if self.dialect == "sqlite" else "%s"] * len(columns))
+                cur.executemany(
+                    f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({marks})",
+                    [tuple(self._value(v) for v in row) for row in chunk]
+                )
+            raw.commit()
+        finally:
+            raw.close()
+        return len(chunk)
+
+
+def _name(rng):
+    return f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+
+
+def _sa_phone(rng):
+    return f"0{rng.choice('678')}{rng.randint(10_000_000, 99_999_999)}"
+
+
+def _zw_phone(rng):
+    return f"+26377{rng.randint(1_000_000, 9_999_999)}"
+
+
+def generate(transactions=100000, agents=50, branches=10, days=365, customers=None,
+             seed=42, end_date=None, chunk_size=10000, progress=None):
+    """
+    Generate a full dataset and return a summary dict including admin_id
+    and agent_ids. History covers `days` up to `end_date` (exclusive,
+    default: end of today). `customers` controls how often senders and
+    receivers repeat (default: one customer per 5 transactions).
+    """
+    rng = random.Random(seed)
+    engine = db.engine
+    loader = BulkLoader(engine, chunk_size)
+    end = end_date or datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+    start = end - timedelta(days=days)
+    tag = f"g{seed}"
+    say = progress or (lambda msg: None)
+
+    with engine.begin() as conn:
+        tx_offset = conn.execute(text("SELECT COALESCE(MAX(id), 0) FROM transactions")).scalar()
+        admin_id = conn.execute(text("SELECT id FROM users WHERE role = 'admin' ORDER BY id LIMIT 1")).scalar()
+
+    # --- reference data, admin, branches, agents ---
+    with engine.begin() as conn:
+        for code, name in (("USD", "US Dollar"), ("ZAR", "South African Rand")):
+            if conn.execute(text("SELECT 1 FROM currencies WHERE code = :c"), {"c": code}).first() is None:
+                conn.execute(text("INSERT INTO currencies (code, name) VALUES (:c, :n)"), {"c": code, "n": name})
+        opening = conn.execute(text("SELECT current_balance FROM dollar_balance ORDER BY id LIMIT 1")).scalar()
+
+    if admin_id is None:
+        loader.load("users", ("full_name", "username", "password", "role", "status", "created_at"),
+                    [("Admin User", "admin", "admin123", "admin", "active", start)])
+
+    branch_rows = [
+        (f"{CITIES[i % len(CITIES)]} {tag}-{i}", CITIES[i % len(CITIES)],
+         round(18.0 + rng.random(), 4) if rng.random() < 0.3 else None)
+        for i in range(branches)
+    ]
+    loader.load("branches", ("name", "location", "rate_override"), branch_rows)
+
+    with engine.begin() as conn:
+        admin_id = conn.execute(text("SELECT id FROM users WHERE role = 'admin' ORDER BY id LIMIT 1")).scalar()
+        branch_ids = [r[0] for r in conn.execute(
+            text("SELECT id FROM branches WHERE name LIKE :p ORDER BY id"), {"p": f"% {tag}-%"})]
+
+    agent_rows = [
+        (_name(rng), f"agent_{tag}_{i}", "agent123", "agent", _sa_phone(rng),
+         branch_ids[i % len(branch_ids)], "active", start)
+        for i in range(agents)
+    ]
+    loader.load("users", ("full_name", "username", "password", "role", "phone", "branch_id", "status", "created_at"),
+                agent_rows)
+    with engine.begin() as conn:
+        agent_users = conn.execute(
+            text("SELECT id, branch_id FROM users WHERE username LIKE :p ORDER BY id"), {"p": f"agent_{tag}_%"}
+        ).all()
+    loader.load("agents", ("user_id", "branch_id"), [(uid, bid) for uid, bid in agent_users])
+    agent_ids = [uid for uid, _ in agent_users]
+    agent_branch = dict(agent_users)
+    say(f"  {branches} branches, {agents} agents")
+
+    # --- exchange rate history: hourly random walk ---
+    def rate_rows():
+        rate = 18.5
+        hours = days * 24
+        for h in range(hours):
+            rate = min(max(rate + rng.gauss(0, 0.02), 16.0), 21.0)
+            yield ("USD", "ZAR", round(rate, 4), "generated", start + timedelta(hours=h))
+
+    n_rates = loader.load("exchange_rates", ("from_currency", "to_currency", "rate", "source", "updated_at"),
+                          rate_rows())
+    say(f"  {n_rates} exchange rates")
+
+    # --- transactions, logs and balance logs ---
+    customer_count = customers or max(transactions // 5, 10)
+    people = []
+    for _ in range(min(customer_count, 200000)):
+        sender, sender_phone, receiver, receiver_phone = _name(rng), _sa_phone(rng), _name(rng), _zw_phone(rng)
+        people.append((sender, sender_phone, to_e164(sender_phone), receiver, receiver_phone, to_e164(receiver_phone)))
+    statuses = [s for s, _ in STATUS_MIX]
+    weights = [w for _, w in STATUS_MIX]
+    span_s = int((end - start).total_seconds())
+
+    tx_columns = (
+        "transaction_id", "sender_name", "sender_phone", "receiver_name", "receiver_phone",
+        "amount_local", "amount_foreign", "currency_code", "status", "created_by", "completed_by",
+        "verified_by", "agent_id", "branch_id", "available_to_all", "picked_by", "picked_at",
+        "completed_at", "verified_at", "timestamp", "payment_method",
+        "sender_phone_e164", "receiver_phone_e164",
+    )
+    log_rows = []
+    balance_rows = []
+
+    def tx_rows():
+        # Generated in time order so ids follow timestamps like real traffic
+        offsets = sorted(rng.randrange(span_s) for _ in range(transactions))
+        for n, offset in enumerate(offsets):
+            ts = start + timedelta(seconds=offset)
+            status = rng.choices(statuses, weights)[0]
+            sender, sender_phone, sender_e164, receiver, receiver_phone, receiver_e164 = rng.choice(people)
+            amount_cents = int(rng.lognormvariate(7.5, 0.9)) * 100  # ZAR, median ~R1800
+            foreign_cents = round(amount_cents / 18.5)
+            agent_id = rng.choice(agent_ids)
+            available = rng.random() < 0.4
+            picked_by = picked_at = completed_by = completed_at = verified_by = verified_at = None
+
+            if status == "pending" and available:
+                agent_id = None
+            elif available:
+                picked_by = agent_id
+                picked_at = ts + timedelta(minutes=rng.expovariate(1 / 20.0))
+            if status == "completed":
+                completed_by = agent_id
+                completed_at = (picked_at or ts) + timedelta(minutes=rng.expovariate(1 / 90.0))
+                if rng.random() < 0.6:
+                    verified_by = admin_id
+                    verified_at = completed_at + timedelta(hours=rng.expovariate(1 / 6.0))
+
+            txid = f"ISA-GEN{tx_offset + n + 1:011d}"
+            log_rows.append((admin_id, "created_transaction", f"Created {txid}", ts))
+            if completed_at:
+                log_rows.append((agent_id, "completed_tx", f"{txid} completed", completed_at))
+            balance_rows.append((txid, -foreign_cents, "transaction", f"Transaction {txid}", admin_id, ts))
+
+            yield (
+                txid, sender, sender_phone, receiver, receiver_phone,
+                amount_cents, foreign_cents, "ZAR", status, admin_id, completed_by,
+                verified_by, agent_id, agent_branch.get(agent_id) or rng.choice(branch_ids), available,
+                picked_by, picked_at, completed_at, verified_at, ts, rng.choice(("cash", "cash", "cash", "eft")),
+                sender_e164, receiver_e164,
+            )
+
+    # Drain the side tables every chunk so memory stays bounded
+    def chunked_tx_rows():
+        for i, row in enumerate(tx_rows(), 1):
+            yield row
+            if i % chunk_size == 0:
+                flush_side_tables()
+                say(f"  {i} transactions")
+
+    # Opening float large enough that the generated debits never go negative
+    running = {"balance": opening if opening is not None else OPENING_BALANCE_CENTS}
+
+    def flush_side_tables():
+        if log_rows:
+            loader.load("logs", ("user_id", "action", "details", "created_at"), log_rows)
+            log_rows.clear()
+        if balance_rows:
+            rows = []
+            for txid, change, kind, desc, user_id, ts in balance_rows:
+                previous = running["balance"]
+                running["balance"] = previous + change
+                rows.append((txid, change, previous, running["balance"], kind, desc, user_id, ts))
+            loader.load("dollar_balance_logs", ("transaction_id", "change_amount", "previous_balance",
+                                                "new_balance", "change_type", "description", "created_by",
+                                                "timestamp"), rows)
+            balance_rows.clear()
+
+    n_tx = loader.load("transactions", tx_columns, chunked_tx_rows())
+    flush_side_tables()
+    say(f"  {n_tx} transactions")
+
+    with engine.begin() as conn:
+        params = {"b": running["balance"], "t": loader._value(end)}
+        if opening is None:
+            conn.execute(text("INSERT INTO dollar_balance (current_balance, last_updated) VALUES (:b, :t)"), params)
+        else:
+            conn.execute(text("UPDATE dollar_balance SET current_balance = :b, last_updated = :t"), params)
+
+    return {
+        "admin_id": admin_id,
+        "agent_ids": agent_ids,
+        "branch_ids": branch_ids,
+        "transactions": n_tx,
+        "exchange_rates": n_rates,
+    }
@@ -0,0 +1,34 @@
+# app/dbcompat.py
+"""
+Date helpers that work on both PostgreSQL (production) and SQLite
+(local development and benchmarks).
+"""
+from sqlalchemy import cast, func, Date, String
+
+from . import db
+
+# to_char() patterns used by the reports -> SQLite strftime()
+_SQLITE_FORMATS = {
+    "YYYY": "%Y",
+    "MM": "%m",
+    "YYYY-MM": "%Y-%m",
+    "YYYY-MM-DD": "%Y-%m-%d",
+}
+
+
+def is_sqlite():
+    return db.engine.dialect.name == "sqlite"
+
+
+def day_of(column):
+    """Calendar day of a DateTime column (CAST(x AS DATE) on PostgreSQL)"""
+    if is_sqlite():
+        return func.date(column, type_=Date)
+    return cast(column, Date)
+
+
+def period_of(column, fmt):
+    """to_char(column, fmt) for the 'YYYY' / 'YYYY-MM' style report buckets"""
+    if is_sqlite():
+        return func.strftime(_SQLITE_FORMATS[fmt], column, type_=String)
+    return func.to_char(column, fmt)
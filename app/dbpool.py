@@ -0,0 +1,183 @@
+# app/dbpool.py
+"""
+Connection pool sizing and telemetry.
+
+Pool size follows the worker model instead of SQLAlchemy's defaults:
+
+    per-worker budget = (DB_MAX_CONNECTIONS - DB_RESERVED_CONNECTIONS) / WEB_CONCURRENCY
+    concurrency       = requests one worker serves at once (WORKER_PROFILE,
+                        see gunicorn_conf.py): 1 for sync, GUNICORN_THREADS
+                        for gthread, GEVENT_WORKER_CONNECTIONS for gevent
+    pool_size         = min(concurrency, budget)
+    max_overflow      = min(DB_POOL_OVERFLOW, budget - pool_size)
+
+Under gevent the budget usually caps the pool well below the number of
+green threads; the rest wait for a connection without holding a process.
+
+DB_POOL_SIZE / DB_MAX_OVERFLOW override the computed values.
+
+Stale connections are handled optimistically: no ping on checkout
+(DB_POOL_PRE_PING=true restores it); connections are recycled after
+DB_POOL_RECYCLE seconds, and a GET/HEAD view that fails because its
+connection was dropped is retried once on a fresh connection.
+
+Checkout wait, checkout timeouts and pool saturation go to app.metrics.
+"""
+import functools
+import os
+import time
+import weakref
+
+from sqlalchemy import exc
+from sqlalchemy.pool import QueuePool
+
+from .metrics import metrics
+
+
+def _env_int(name, default):
+    try:
+        return int(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+CHECKOUT_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0)
+
+_checkout_wait = metrics.histogram("db_pool_checkout_seconds", "Time spent waiting for a pooled connection",
+                                   buckets=CHECKOUT_BUCKETS)
+_checkout_timeouts = metrics.counter("db_pool_checkout_timeouts_total",
+                                     "Checkouts that gave up after pool_timeout")
+_disconnect_retries = metrics.counter("db_disconnect_retries_total",
+                                      "Views re-run after a stale connection was dropped", ("endpoint",))
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that times every checkout"""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            _checkout_timeouts.inc()
+            raise
+        finally:
+            _checkout_wait.observe(time.perf_counter() - started)
+
+    def capacity(self):
+        return self.size() + max(self._max_overflow, 0)
+
+    def saturation(self):
+        """Share of the pool's capacity currently checked out (0..1)"""
+        capacity = self.capacity()
+        return self.checkedout() / capacity if capacity else 0.0
+
+
+def worker_concurrency():
+    """Requests one gunicorn worker serves at once under WORKER_PROFILE"""
+    profile = os.environ.get("WORKER_PROFILE", "sync").strip().lower()
+    if profile == "gevent":
+        return max(_env_int("GEVENT_WORKER_CONNECTIONS", 100), 1)
+    if profile == "gthread":
+        return max(_env_int("GUNICORN_THREADS", 4), 1)
+    return 1
+
+
+def pool_settings():
+    """pool_size / max_overflow for this worker, derived from the environment"""
+    workers = max(_env_int("WEB_CONCURRENCY", 1), 1)
+    concurrency = worker_concurrency()
+    max_connections = _env_int("DB_MAX_CONNECTIONS", 100)
+    reserved = _env_int("DB_RESERVED_CONNECTIONS", 5)
+
+    budget = max((max_connections - reserved) // workers, 1)
+    pool_size = _env_int("DB_POOL_SIZE", min(concurrency, budget))
+    max_overflow = _env_int("DB_MAX_OVERFLOW",
+                            max(min(_env_int("DB_POOL_OVERFLOW", concurrency), budget - pool_size), 0))
+    return {
+        "workers": workers,
+        "concurrency": concurrency,
+        "budget": budget,
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+    }
+
+
+def engine_options(database_uri):
+    """SQLALCHEMY_ENGINE_OPTIONS for `database_uri`"""
+    options = {
+        "pool_recycle": _env_int("DB_POOL_RECYCLE", 300),
+        "pool_pre_ping": os.environ.get("DB_POOL_PRE_PING", "false").lower() in ("1", "true", "yes", "on"),
+    }
+    if database_uri.startswith("sqlite") and (":memory:" in database_uri or database_uri.rstrip("/") == "sqlite:"):
+        # In-memory SQLite needs Flask-SQLAlchemy's StaticPool
+        return options
+
+    settings = pool_settings()
+    options.update(
+        poolclass=InstrumentedQueuePool,
+        pool_size=settings["pool_size"],
+        max_overflow=settings["max_overflow"],
+        pool_timeout=_env_int("DB_POOL_TIMEOUT", 10),
+    )
+    return options
+
+
+def is_disconnect(error):
+    return isinstance(error, exc.DBAPIError) and error.connection_invalidated
+
+
+def retry_on_disconnect(view):
+    """Re-run a read-only (GET/HEAD) view once if its connection was dropped"""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        from flask import request
+        from . import db
+
+        try:
+            return view(*args, **kwargs)
+        except exc.DBAPIError as e:
+            if request.method not in ("GET", "HEAD") or not is_disconnect(e):
+                raise
+            # SQLAlchemy has already invalidated the pool; the retry gets a fresh connection
+            db.session.rollback()
+            _disconnect_retries.inc((request.endpoint,))
+            return view(*args, **kwargs)
+    return wrapper
+
+
+# Engines of every app created in this process; apps that are gone drop out
+_engines = weakref.WeakSet()
+
+
+def forget_parent_connections():
+    # gunicorn --preload: connections opened by the parent (schema check)
+    # must not be shared with the workers; close=False leaves them to the parent
+    for engine in list(_engines):
+        engine.dispose(close=False)
+
+
+# Once per process, however many apps create_app() builds (benchmarks, CLI)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=forget_parent_connections)
+
+
+def init_app(app):
+    """Wrap every view with retry_on_disconnect, publish pool saturation and reset pools after fork"""
+    from . import db
+
+    for endpoint, view in list(app.view_functions.items()):
+        if endpoint != "static":
+            app.view_functions[endpoint] = retry_on_disconnect(view)
+
+    with app.app_context():
+        _engines.update(db.engines.values())
+
+    def saturation():
+        with app.app_context():
+            pool = db.engine.pool
+        if isinstance(pool, InstrumentedQueuePool):
+            return {(): round(pool.saturation(), 4)}
+        return {}
+
+    metrics.gauge("db_pool_saturation", "Checked-out share of pool_size + max_overflow", callback=saturation)
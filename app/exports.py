@@ -0,0 +1,191 @@
+# app/exports.py
+"""
+Streaming exports of transactions, logs and dollar_balance_logs for
+month-end accounting.
+
+Rows come off a server-side cursor (stream_results + yield_per, a named
+cursor on PostgreSQL) in chunks of EXPORT_CHUNK_SIZE and are written out
+as CSV or JSON Lines, optionally gzip-compressed on the fly, so memory use
+stays flat whatever the row count. Money columns are read as raw cents and
+written as exact decimals ("1500.00"); datetimes are ISO 8601 UTC.
+
+    /admin/export/transactions.csv?start=2026-09-01&end=2026-10-01&status=completed
+    flask export transactions --start 2026-09-01 --end 2026-10-01 -o sept.csv.gz
+
+status= filters transactions.status, logs.action and
+dollar_balance_logs.change_type. Exports read from the replica when
+DATABASE_REPLICA_URL is set.
+"""
+import csv
+import io
+import json
+import os
+import zlib
+from datetime import datetime
+
+from sqlalchemy import BigInteger, DateTime, select, type_coerce
+
+from . import db
+from .models import DollarBalanceLog, Log, Transaction
+from .money import MoneyType, format_cents
+from .replica import read_engine
+
+CHUNK_SIZE = int(os.environ.get("EXPORT_CHUNK_SIZE", 5000))
+FORMATS = {"csv": "text/csv", "jsonl": "application/x-ndjson"}
+
+
+class ExportSpec:
+    """What to export from one table: columns in order, the date column, optional status column"""
+
+    def __init__(self, model, columns, date_column, status_column=None):
+        self.model = model
+        self.columns = columns
+        self.date_column = date_column
+        self.status_column = status_column
+
+    @property
+    def table(self):
+        return self.model.__table__
+
+
+EXPORTS = {
+    "transactions": ExportSpec(Transaction, (
+        "id", "transaction_id", "timestamp", "status", "sender_name", "sender_phone_e164",
+        "receiver_name", "receiver_phone_e164", "amount_local", "amount_foreign", "currency_code",
+        "payment_method", "agent_id", "branch_id", "available_to_all", "created_by", "picked_by",
+        "picked_at", "completed_by", "completed_at", "verified_by", "verified_at", "notes",
+    ), "timestamp", "status"),
+    "logs": ExportSpec(Log, ("id", "created_at", "user_id", "action", "details"), "created_at", "action"),
+    "dollar_balance_logs": ExportSpec(DollarBalanceLog, (
+        "id", "timestamp", "transaction_id", "change_type", "change_amount", "previous_balance",
+        "new_balance", "description", "created_by",
+    ), "timestamp", "change_type"),
+}
+
+
+def parse_date(value):
+    """'2026-09-01' or an ISO datetime -> datetime; None for empty"""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"Invalid date {value!r}: use YYYY-MM-DD")
+
+
+def build_query(name, start=None, end=None, status=None):
+    """SELECT for one export, ordered by primary key. start is inclusive, end exclusive."""
+    spec = EXPORTS.get(name)
+    if spec is None:
+        raise ValueError(f"Unknown export {name!r}: choose from {', '.join(EXPORTS)}")
+    if status and not spec.status_column:
+        raise ValueError(f"{name} has no status filter")
+
+    table = spec.table
+    columns = []
+    for column in spec.columns:
+        col = table.c[column]
+        # Raw cents: skips building a Money object per value
+        columns.append(type_coerce(col, BigInteger).label(column) if isinstance(col.type, MoneyType) else col)
+    query = select(*columns).order_by(table.c.id)
+
+    date_col = table.c[spec.date_column]
+    if start:
+        query = query.where(date_col >= start)
+    if end:
+        query = query.where(date_col < end)
+    if status:
+        query = query.where(table.c[spec.status_column] == status)
+    return query
+
+
+def _conversions(name):
+    """(position, function) for the columns that need formatting; the rest pass through"""
+    spec = EXPORTS[name]
+    conversions = []
+    for i, column in enumerate(spec.columns):
+        col_type = spec.table.c[column].type
+        if isinstance(col_type, MoneyType):
+            conversions.append((i, format_cents))
+        elif isinstance(col_type, DateTime):
+            conversions.append((i, datetime.isoformat))
+    return conversions
+
+
+def stream_rows(name, start=None, end=None, status=None, chunk_size=CHUNK_SIZE, engine=None):
+    """Yield formatted rows (lists) from a server-side cursor"""
+    query = build_query(name, start, end, status)
+    conversions = _conversions(name)
+    if engine is None:
+        engine = read_engine(db)
+    with engine.connect() as conn:
+        result = conn.execution_options(stream_results=True, yield_per=chunk_size).execute(query)
+        for partition in result.partitions():
+            for row in partition:
+                row = list(row)
+                for i, convert in conversions:
+                    value = row[i]
+                    if value is not None:
+                        row[i] = convert(value)
+                yield row
+
+
+def encode(name, rows, fmt="csv", rows_per_chunk=1000):
+    """Serialize rows to byte chunks of about rows_per_chunk rows each"""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format {fmt!r}: choose from {', '.join(FORMATS)}")
+    columns = EXPORTS[name].columns
+    buf = io.StringIO()
+    if fmt == "csv":
+        writer = csv.writer(buf, lineterminator="\n")
+        writer.writerow(columns)
+        write = writer.writerow
+    else:
+        dumps = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+
+        def write(row):
+            buf.write(dumps(dict(zip(columns, row))))
+            buf.write("\n")
+
+    pending = 0
+    for row in rows:
+        write(row)
+        pending += 1
+        if pending >= rows_per_chunk:
+            yield buf.getvalue().encode("utf-8")
+            buf.seek(0)
+            buf.truncate()
+            pending = 0
+    if buf.tell():
+        yield buf.getvalue().encode("utf-8")
+
+
+def gzip_chunks(chunks, level=6):
+    """gzip-compress a stream of byte chunks without buffering it"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # 31: gzip container
+    for chunk in chunks:
+        out = compressor.compress(chunk)
+        if out:
+            yield out
+    yield compressor.flush()
+
+
+def export_chunks(name, fmt="csv", start=None, end=None, status=None, gzip=False, chunk_size=CHUNK_SIZE):
+    """The whole export as an iterator of byte chunks"""
+    build_query(name, start, end, status)  # fail fast on bad arguments, before streaming starts
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format {fmt!r}: choose from {', '.join(FORMATS)}")
+    # Resolved now: the chunks may be consumed after the request's app context is gone.
+    # The replica only within its staleness budget and not right after this session wrote
+    engine = read_engine(db)
+    chunks = encode(name, stream_rows(name, start, end, status, chunk_size, engine), fmt)
+    return gzip_chunks(chunks) if gzip else chunks
+
+
+def filename(name, fmt, start=None, end=None, gzip=False):
+    parts = [name]
+    if start:
+        parts.append(start.strftime("%Y%m%d"))
+    if end:
+        parts.append(end.strftime("%Y%m%d"))
+    return "-".join(parts) + f".{fmt}" + (".gz" if gzip else "")
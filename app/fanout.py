@@ -0,0 +1,174 @@
+# app/fanout.py
+"""
+Per-agent digests of newly available transactions.
+
+    flask fanout-flush        # one window now; the scheduler runs it every window
+
+Transactions created with available_to_all are not published one by one.
+Every FANOUT_WINDOW_SECONDS (default 30) the scheduler collects the ones
+created since the last window that are still pending and unassigned, and
+sends each active agent one digest listing those it can pick. Digests go
+out through SNS PublishBatch, ten per call with an `agent_id` message
+attribute for subscription filter policies, so a window costs
+ceil(agents / 10) provider calls however many transactions it holds.
+
+Dedupe: the window state in settings (FANOUT_CURSOR_KEY) holds the highest
+announced transaction id and the ids announced among the last
+FANOUT_LOOKBACK_IDS below it. Each flush re-scans that look-back range,
+so a transaction whose id was allocated before, but committed after, an
+already announced one is still picked up, and skips the ids it holds.
+The state is claimed with a compare-and-set before anything is sent, so
+a transaction is announced in at most one window even when the CLI and
+the scheduler flush at the same time. On the very first run everything
+already pending is marked announced; the backlog is not sent.
+Delivery is best effort: a failed batch is logged, not retried, and
+agent.available_transactions still lists everything.
+
+Every digest is published to the one SNS_TOPIC_ARN, so each subscription
+needs a filter policy: an agent's endpoint {"agent_id": [<user id>]}, and
+a subscription that wants the other transaction events but not the
+digests {"agent_id": [{"exists": false}]}. A subscription without a
+policy receives one copy per active agent per window.
+"""
+import json
+import os
+from datetime import datetime
+
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+
+from . import db
+from .aws_sns import SNS_TOPIC_ARN, get_sns_client
+from .models import Setting, Transaction, User
+from .money import Money
+from .providers import registry
+
+WINDOW_SECONDS = int(os.environ.get("FANOUT_WINDOW_SECONDS", 30))
+LOOKBACK_IDS = int(os.environ.get("FANOUT_LOOKBACK_IDS", 1000))
+FANOUT_CURSOR_KEY = "fanout_window_state"
+BATCH_SIZE = 10  # SNS PublishBatch limit
+DIGEST_MAX_IDS = 20  # listed per digest; the rest are counted
+
+
+def _state():
+    """(raw setting value, cursor, announced ids), or (None, None, None) before the first run"""
+    raw = db.session.execute(select(Setting.value).where(Setting.key == FANOUT_CURSOR_KEY)).scalar()
+    if raw is None:
+        return None, None, None
+    state = json.loads(raw)
+    return raw, state["cursor"], set(state["announced"])
+
+
+def _encode(cursor, announced):
+    floor = cursor - LOOKBACK_IDS
+    return json.dumps({"cursor": cursor, "announced": sorted(i for i in announced if i > floor)})
+
+
+def _claim(old, new):
+    """Replace the state old (None: none yet) with new; False if another process got there first"""
+    try:
+        if old is None:
+            db.session.add(Setting(key=FANOUT_CURSOR_KEY, value=new))
+            db.session.commit()
+            return True
+        result = db.session.execute(
+            update(Setting)
+            .where(Setting.key == FANOUT_CURSOR_KEY, Setting.value == old)
+            .values(value=new, updated_at=datetime.utcnow())
+        )
+        db.session.commit()
+        return result.rowcount == 1
+    except IntegrityError:
+        db.session.rollback()
+        return False
+
+
+def new_available(after_id):
+    """(id, transaction_id, amount_local, picked_by) rows created after after_id"""
+    return db.session.execute(
+        select(Transaction.id, Transaction.transaction_id, Transaction.amount_local, Transaction.picked_by)
+        .where(
+            Transaction.id > after_id,
+            Transaction.available_to_all == True,  # noqa: E712
+            Transaction.status == 'pending',
+            Transaction.agent_id == None,  # noqa: E711
+        )
+        .order_by(Transaction.id)
+    ).all()
+
+
+def digest_message(rows):
+    total = sum((row.amount_local for row in rows), Money())
+    listed = ", ".join(row.transaction_id for row in rows[:DIGEST_MAX_IDS])
+    if len(rows) > DIGEST_MAX_IDS:
+        listed += f" (+{len(rows) - DIGEST_MAX_IDS} more)"
+    plural = "s" if len(rows) > 1 else ""
+    return f"{len(rows)} new transaction{plural} available, ZAR {total:,.2f}: {listed}"
+
+
+def digests(rows, agent_ids):
+    """PublishBatch entries: one per agent with something to pick"""
+    entries = []
+    for agent_id in agent_ids:
+        visible = [row for row in rows if row.picked_by in (None, agent_id)]
+        if not visible:
+            continue
+        entries.append({
+            "Id": f"agent-{agent_id}",
+            "Message": digest_message(visible),
+            "Subject": "Transactions available",
+            "MessageAttributes": {
+                "agent_id": {"DataType": "Number", "StringValue": str(agent_id)},
+                "action": {"DataType": "String", "StringValue": "created_available"},
+            },
+        })
+    return entries
+
+
+def publish(entries):
+    """Send entries in PublishBatch calls. Returns (calls, failed entries)."""
+    calls = failed = 0
+    for start in range(0, len(entries), BATCH_SIZE):
+        chunk = entries[start:start + BATCH_SIZE]
+        calls += 1
+        try:
+            with registry.timed("sns") as call:
+                response = get_sns_client().publish_batch(TopicArn=SNS_TOPIC_ARN,
+                                                          PublishBatchRequestEntries=chunk)
+                if response.get("Failed"):
+                    call.ok = False
+        except Exception as e:
+            # Never block the scheduler on SNS; agents still poll
+            print(f"Failed to send SNS digest batch: {e}")
+            failed += len(chunk)
+            continue
+        for failure in response.get("Failed", ()):
+            print(f"SNS digest {failure.get('Id')} failed: {failure.get('Message') or failure.get('Code')}")
+            failed += 1
+    return calls, failed
+
+
+def flush():
+    """Announce one window. Returns counts, or None when there was nothing to do."""
+    if not SNS_TOPIC_ARN:
+        return None
+    raw, cursor, announced = _state()
+    if raw is None:
+        pending = new_available(0)
+        cursor = pending[-1].id if pending else 0
+        _claim(None, _encode(cursor, {row.id for row in pending}))
+        return None
+
+    rows = [row for row in new_available(cursor - LOOKBACK_IDS) if row.id not in announced]
+    if not rows:
+        return None
+    announced.update(row.id for row in rows)
+    if not _claim(raw, _encode(max(cursor, rows[-1].id), announced)):
+        return None
+
+    agent_ids = db.session.execute(
+        select(User.id).where(User.role == 'agent', User.status == 'active').order_by(User.id)
+    ).scalars().all()
+    entries = digests(rows, agent_ids)
+    calls, failed = publish(entries)
+    return {"transactions": len(rows), "digests": len(entries), "calls": calls, "failed": failed}
@@ -0,0 +1,135 @@
+# app/fees.py
+"""
+Tiered transaction fees per currency and branch.
+
+    percent, fee, flat = fee_engine.fee(150000, "USD", branch_id)     # cents
+    columns = fee_engine.evaluate([150000, 2500000, ...], "USD", branch_id)
+
+A schedule is the fee_schedules rows sharing a (currency_code, branch_id):
+each row is a tier starting at min_amount, and an amount pays the tier
+with the largest min_amount at or below it. Lookup falls back from
+(currency, branch) to (any currency, branch), (currency, any branch) and
+(any, any); amounts no tier covers pay the FEE_PERCENT / FEE_FLAT config.
+
+Schedules are compiled once per worker into sorted breakpoint lists with
+each tier's percentage as an exact ratio, so a lookup is a bisect and a
+fee is integer arithmetic (half-up, like Money). Writes to fee_schedules
+bump the `fees_changed_at` setting, which workers check every
+FEE_SCHEDULE_CHECK_SECONDS, and the next lookup recompiles.
+"""
+import os
+from bisect import bisect_right
+
+from flask import current_app
+from sqlalchemy import event, select
+
+from . import db
+from .cache import SettingStamp
+from .models import FeeSchedule
+from .money import Money, ratio, scale_cents
+
+fees_changed = SettingStamp("fees_changed_at", ttl=float(os.environ.get("FEE_SCHEDULE_CHECK_SECONDS", 5)))
+
+MAX_PERCENT = 1.0  # 100%: the most a tier may charge, as a fraction
+
+
+class CompiledSchedule:
+    """Tiers sorted by lower bound: breakpoints[i] is where tiers[i] starts"""
+
+    __slots__ = ("breakpoints", "tiers")
+
+    def __init__(self, tiers, default):
+        """tiers: [(min cents, percent, flat cents)]; default covers amounts below the first"""
+        tiers = sorted(tiers)
+        if not tiers or tiers[0][0] > 0:
+            tiers.insert(0, (0,) + default)
+        self.breakpoints = [low for low, _, _ in tiers]
+        # (percent, numerator, denominator, flat cents)
+        self.tiers = [(pct,) + ratio(pct) + (flat,) for _, pct, flat in tiers]
+
+    def tier(self, cents):
+        return self.tiers[max(bisect_right(self.breakpoints, cents) - 1, 0)]
+
+    def fee(self, cents):
+        """(percent, percentage fee cents, flat fee cents) for one amount"""
+        pct, num, den, flat = self.tier(cents)
+        return pct, (2 * cents * num + den) // (2 * den), flat
+
+    def evaluate(self, cents):
+        """{'percents', 'fees', 'flats'}: one column entry per amount in cents"""
+        if len(self.tiers) == 1:
+            pct, num, den, flat = self.tiers[0]
+            n = len(cents)
+            return {"percents": [pct] * n, "fees": scale_cents(cents, num, den), "flats": [flat] * n}
+        breakpoints, tiers = self.breakpoints, self.tiers
+        percents, fees, flats = [], [], []
+        for c in cents:
+            pct, num, den, flat = tiers[max(bisect_right(breakpoints, c) - 1, 0)]
+            percents.append(pct)
+            fees.append((2 * c * num + den) // (2 * den))
+            flats.append(flat)
+        return {"percents": percents, "fees": fees, "flats": flats}
+
+
+class FeeEngine:
+    """(currency, branch_id) -> CompiledSchedule; None in either place matches any"""
+
+    def __init__(self):
+        self._state = (None, {}, None)  # (stamp, schedules, default schedule)
+
+    def build(self):
+        """Compile every schedule from fee_schedules. Returns (schedules, default)."""
+        config = current_app.config
+        default = (float(config.get("FEE_PERCENT", 0.01)), Money.of(config.get("FEE_FLAT", 10.0)).minor)
+        tiers = {}
+        rows = db.session.execute(select(
+            FeeSchedule.currency_code, FeeSchedule.branch_id,
+            FeeSchedule.min_amount, FeeSchedule.percent, FeeSchedule.flat_fee))
+        for code, branch_id, low, pct, flat in rows:
+            key = ((code or "").upper() or None, branch_id)
+            tiers.setdefault(key, []).append((low.minor, pct or 0.0, flat.minor))
+        schedules = {}
+        for key, rows in tiers.items():
+            try:
+                schedules[key] = CompiledSchedule(rows, default)
+            except (ValueError, ArithmeticError) as e:
+                # One bad row (e.g. a non-finite percent) must not take pricing down:
+                # skip the schedule so lookups fall back to the next one
+                current_app.logger.error("Fee schedule %s skipped: %s", key, e)
+        return schedules, CompiledSchedule([], default)
+
+    def refresh(self, force=False):
+        """Recompile if fee_schedules changed since the last build"""
+        stamp = fees_changed.value()
+        if force or stamp != self._state[0]:
+            schedules, default = self.build()
+            self._state = (stamp, schedules, default)
+
+    def schedule(self, currency_code=None, branch_id=None):
+        """The most specific schedule for a currency at a branch"""
+        self.refresh()
+        _, schedules, default = self._state
+        code = (currency_code or "").upper() or None
+        for key in ((code, branch_id), (None, branch_id), (code, None), (None, None)):
+            found = schedules.get(key)
+            if found is not None:
+                return found
+        return default
+
+    def fee(self, cents, currency_code=None, branch_id=None):
+        """(percent, percentage fee cents, flat fee cents) for one amount in cents"""
+        return self.schedule(currency_code, branch_id).fee(cents)
+
+    def evaluate(self, cents, currency_code=None, branch_id=None):
+        """Fees for many amounts (cents) at once, as columns; see CompiledSchedule.evaluate"""
+        return self.schedule(currency_code, branch_id).evaluate(cents)
+
+
+fee_engine = FeeEngine()
+
+
+@event.listens_for(FeeSchedule, "after_insert")
+@event.listens_for(FeeSchedule, "after_update")
+@event.listens_for(FeeSchedule, "after_delete")
+def _schedules_changed(mapper, connection, target):
+    fees_changed.bump(connection)
@@ -0,0 +1,221 @@
+# app/filters.py
+"""
+Jinja filters used by the templates. Registered in create_app().
+
+They run once per table cell, so the common inputs take a fast path:
+datetimes with the default formats go through isoformat(), floats skip
+float() conversion, and strings that repeat across rows (dates stored
+as text, phone numbers) are parsed or cleaned once and memoized. Output
+is the same as the original strptime/replace chains.
+"""
+import re
+from datetime import date, datetime
+from functools import lru_cache
+
+DEFAULT_FORMAT = '%Y-%m-%d %H:%M:%S'
+_DATE_ONLY = '%Y-%m-%d'
+_PARSE_FORMATS = ('%Y-%m-%d %H:%M:%S', '%Y-%m-%d', '%Y-%m-%d %H:%M:%S.%f')
+# What the formats above accept in canonical form; anything else takes the strptime path
+_CANONICAL = re.compile(r'\d{4}-\d{2}-\d{2}(?: \d{2}:\d{2}:\d{2}(?:\.\d{1,6})?)?', re.ASCII)
+_CANONICAL_SECONDS = re.compile(r'\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}', re.ASCII)
+_PHONE_JUNK = str.maketrans('', '', ' -()')
+
+
+@lru_cache(maxsize=4096)
+def _parse(text):
+    """A date string in one of _PARSE_FORMATS as a datetime, or None"""
+    if _CANONICAL.fullmatch(text):
+        try:
+            return datetime.fromisoformat(text)
+        except ValueError:
+            pass  # e.g. month 13: strptime rejects it the same way below
+    for fmt in _PARSE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt)
+        except ValueError:
+            continue
+    return None
+
+
+@lru_cache(maxsize=4096)
+def _parse_seconds(text):
+    """A '%Y-%m-%d %H:%M:%S' string as a datetime, or None"""
+    if _CANONICAL_SECONDS.fullmatch(text):
+        try:
+            return datetime.fromisoformat(text)
+        except ValueError:
+            return None
+    try:
+        return datetime.strptime(text, DEFAULT_FORMAT)
+    except ValueError:
+        return None
+
+
+def _strftime(value, format_string):
+    if value.year >= 1000 and value.tzinfo is None:
+        if format_string == DEFAULT_FORMAT:
+            return value.isoformat(' ', 'seconds')
+        if format_string == _DATE_ONLY:
+            return value.date().isoformat()
+    return value.strftime(format_string)
+
+
+def format_date(value, format_string=DEFAULT_FORMAT):
+    """Format a datetime object or string"""
+    if value is None:
+        return ''
+    if isinstance(value, datetime):
+        return _strftime(value, format_string)
+    text = str(value)
+    if isinstance(value, date):
+        value = datetime(value.year, value.month, value.day)
+    else:
+        value = _parse(text)
+        if value is None:
+            return text
+    return _strftime(value, format_string)
+
+
+def format_datetime(value):
+    """Alias for format_date for compatibility"""
+    return format_date(value)
+
+
+def format_currency(value, currency='ZAR'):
+    """Format a number as currency"""
+    if value is None:
+        return '0.00'
+    try:
+        amount = value if type(value) is float else float(value)
+    except (ValueError, TypeError):
+        return str(value)
+    if currency == 'ZAR':
+        return f'R {amount:,.2f}'
+    if currency == 'USD':
+        return f'$ {amount:,.2f}'
+    return f'{amount:,.2f} {currency}'
+
+
+def format_number(value):
+    """Format a number with commas"""
+    if value is None:
+        return '0'
+    try:
+        return f'{float(value):,.0f}'
+    except (ValueError, TypeError):
+        return str(value)
+
+
+def format_float(value, decimals=2):
+    """Format a float with specified decimals"""
+    if value is None:
+        return f'0.{"0" * decimals}'
+    try:
+        return f'{float(value):,.{decimals}f}'
+    except (ValueError, TypeError):
+        return str(value)
+
+
+def format_percent(value):
+    """Format as percentage"""
+    if value is None:
+        return '0%'
+    try:
+        return f'{float(value):.1f}%'
+    except Exception:
+        return str(value)
+
+
+def truncate(value, length=50, killwords=False, end='...'):
+    """Truncate a string with optional killwords parameter"""
+    if not value:
+        return ''
+    value_str = value if type(value) is str else str(value)
+    if len(value_str) <= length:
+        return value_str
+
+    # killwords=True (or 'true', legacy) cuts exactly at length
+    if killwords is True or (isinstance(killwords, str) and killwords.lower() == 'true'):
+        return value_str[:length] + end
+    # Any other string in killwords' place is the `end` (backward compatibility)
+    if isinstance(killwords, str) and killwords not in ('true', 'false', 'True', 'False'):
+        return value_str[:length] + killwords
+
+    # Otherwise cut at the last word boundary
+    truncated = value_str[:length]
+    last_space = truncated.rfind(' ')
+    if last_space > 0:
+        return truncated[:last_space] + end
+    return truncated + end
+
+
+def yesno(value):
+    """Convert boolean to Yes/No"""
+    if value in (True, 'true', 'True', '1', 1):
+        return 'Yes'
+    return 'No'
+
+
+def time_ago(value):
+    """Show relative time (e.g., '2 hours ago')"""
+    if not value:
+        return ''
+    if isinstance(value, str):
+        parsed = _parse_seconds(value)
+        if parsed is None:
+            return value
+        value = parsed
+    elif not isinstance(value, datetime):
+        return str(value)
+
+    diff = datetime.utcnow() - value
+    days = diff.days
+    if days > 365:
+        years = days // 365
+        return f'{years} year{"s" if years > 1 else ""} ago'
+    if days > 30:
+        months = days // 30
+        return f'{months} month{"s" if months > 1 else ""} ago'
+    if days > 0:
+        return f'{days} day{"s" if days > 1 else ""} ago'
+    seconds = diff.seconds
+    if seconds > 3600:
+        hours = seconds // 3600
+        return f'{hours} hour{"s" if hours > 1 else ""} ago'
+    if seconds > 60:
+        minutes = seconds // 60
+        return f'{minutes} minute{"s" if minutes > 1 else ""} ago'
+    return 'just now'
+
+
+@lru_cache(maxsize=4096)
+def _format_phone(text):
+    phone = text.translate(_PHONE_JUNK)
+    if len(phone) == 10 and phone.startswith('0'):
+        return f'+27 {phone[1:4]} {phone[4:7]} {phone[7:]}'
+    return phone
+
+
+def format_phone(value):
+    """Format phone number"""
+    if not value:
+        return ''
+    return _format_phone(value if type(value) is str else str(value))
+
+
+FILTERS = {
+    'format_date': format_date,
+    'format_datetime': format_datetime,
+    'format_currency': format_currency,
+    'format_number': format_number,
+    'format_float': format_float,
+    'format_percent': format_percent,
+    'truncate': truncate,
+    'yesno': yesno,
+    'time_ago': time_ago,
+    'format_phone': format_phone,
+}
+
+
+def init_app(app):
+    app.jinja_env.filters.update(FILTERS)
@@ -0,0 +1,93 @@
+# app/fragments.py
+"""
+Template compilation and fragment caches.
+
+Compiled templates go to a Jinja bytecode cache in JINJA_CACHE_DIR
+(default: <instance>/jinja-cache; empty disables it), shared by every
+worker on the host and kept across restarts, so a new worker loads
+templates instead of compiling them. Entries are keyed by template path
+and source checksum: an edited template is recompiled, never served
+stale. Jinja unmarshals code from that directory, so it is created 0700
+and used only when it belongs to this user and nobody else can write to
+it; otherwise templates are compiled in memory.
+
+Rarely-changing blocks are cached rendered, per worker:
+
+    {% cache "admin_nav", session.get('role'), request.endpoint %} ... {% endcache %}
+    {% cache "branch_options", data_version("rates") %} ... {% endcache %}
+
+A block is keyed by template, fragment name and the listed values and
+kept for FRAGMENT_CACHE_TTL seconds. data_version(name) is the change
+stamp of the data behind a fragment ("rates": exchange rates, branches,
+currencies and the margin; "fees": fee schedules), so a write shows on
+the next render after that stamp is re-read. FRAGMENT_CACHE=false
+renders every block every time.
+"""
+import os
+import stat
+
+from jinja2 import FileSystemBytecodeCache, nodes
+from jinja2.ext import Extension
+
+from .cache import TTLCache
+
+CACHE_DIR = os.environ.get("JINJA_CACHE_DIR")  # None: under the app's instance folder
+FRAGMENT_TTL = float(os.environ.get("FRAGMENT_CACHE_TTL", 300))
+ENABLED = os.environ.get("FRAGMENT_CACHE", "true").lower() in ("1", "true", "yes", "on")
+
+fragment_cache = TTLCache("fragments", ttl=FRAGMENT_TTL, maxsize=512)
+
+
+def data_version(name):
+    """Change stamp of a named data set, for fragment cache keys"""
+    from .fees import fees_changed
+    from .pricing import rates_changed
+
+    return {"rates": rates_changed, "fees": fees_changed}[name].value()
+
+
+class FragmentCacheExtension(Extension):
+    """{% cache name, key... %}body{% endcache %}: body rendered once per key"""
+
+    tags = {"cache"}
+
+    def __init__(self, environment):
+        super().__init__(environment)
+        environment.extend(fragment_cache=fragment_cache if ENABLED else None)
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        key = [nodes.Const(parser.name), parser.parse_expression()]
+        while parser.stream.skip_if("comma"):
+            key.append(parser.parse_expression())
+        body = parser.parse_statements(("name:endcache",), drop_needle=True)
+        return nodes.CallBlock(self.call_method("_render", [nodes.Tuple(key, "load")]), [], [], body) \
+            .set_lineno(lineno)
+
+    def _render(self, key, caller):
+        cache = self.environment.fragment_cache
+        if cache is None:
+            return caller()
+        return cache.get_or_set(key, caller)
+
+
+def private_dir(path):
+    """Create path 0700 if missing; True if it is ours and writable by us alone"""
+    try:
+        os.makedirs(path, mode=0o700, exist_ok=True)
+        st = os.lstat(path)
+    except OSError:
+        return False
+    return (stat.S_ISDIR(st.st_mode) and st.st_uid == os.getuid()
+            and not st.st_mode & (stat.S_IWGRP | stat.S_IWOTH))
+
+
+def init_app(app):
+    cache_dir = os.path.join(app.instance_path, "jinja-cache") if CACHE_DIR is None else CACHE_DIR
+    if cache_dir:
+        if private_dir(cache_dir):
+            app.jinja_env.bytecode_cache = FileSystemBytecodeCache(cache_dir)
+        else:
+            app.logger.warning("Jinja bytecode cache off: %s is not a private directory of this user", cache_dir)
+    app.jinja_env.add_extension(FragmentCacheExtension)
+    app.jinja_env.globals["data_version"] = data_version
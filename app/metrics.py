@@ -0,0 +1,340 @@
+# app/metrics.py
+"""
+In-process metrics with a Prometheus text endpoint.
+
+    from .metrics import metrics
+    metrics.counter("sms_sent_total", "SMS handed to the provider").inc()
+    metrics.histogram("provider_call_seconds", "...", ("provider", "outcome")).observe(0.2, ("twilio", "ok"))
+    metrics.cache_hit("rates")
+
+Each worker keeps its own counters in memory (a dict update under a lock
+per observation). With METRICS_DIR set, workers periodically write a
+snapshot to METRICS_DIR/<pid>.json and /metrics merges every file, so one
+scrape covers all gunicorn workers. Counters and histograms of exited
+workers are kept so totals stay monotonic; their gauges are dropped.
+
+Set METRICS_TOKEN to require `Authorization: Bearer <token>` on /metrics.
+"""
+import bisect
+import glob
+import json
+import os
+import threading
+import time
+
+METRICS_DIR = os.environ.get("METRICS_DIR")
+FLUSH_INTERVAL = float(os.environ.get("METRICS_FLUSH_INTERVAL", 5))
+DEAD_WORKER_TTL = 24 * 3600
+
+# Seconds; tuned for web requests and provider calls
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels):
+        if labels is None:
+            return ()
+        return tuple(map(str, labels))
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, labels=None, amount=1):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dump(self):
+        with self._lock:
+            return [[list(k), v] for k, v in self._values.items()]
+
+
+class Gauge(_Metric):
+    """Set directly, or computed at scrape time by a callback returning {labels: value}"""
+    kind = "gauge"
+
+    def __init__(self, name, help_text, labelnames=(), callback=None):
+        super().__init__(name, help_text, labelnames)
+        self.callback = callback
+
+    def set(self, value, labels=None):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def dump(self):
+        values = dict(self._values)
+        if self.callback:
+            try:
+                for labels, value in self.callback().items():
+                    values[self._key(labels)] = value
+            except Exception:
+                pass
+        return [[list(k), v] for k, v in values.items()]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, labels=None):
+        key = self._key(labels)
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            row = self._values.get(key)
+            if row is None:
+                # per-bucket (non-cumulative) counts + overflow, then sum
+                row = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            row[0][i] += 1
+            row[1] += value
+
+    def dump(self):
+        with self._lock:
+            return [[list(k), [list(counts), total]] for k, (counts, total) in self._values.items()]
+
+
+class Registry:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = {}
+        self._last_flush = 0.0
+
+    def _get_or_create(self, cls, name, help_text, labelnames, **kwargs):
+        metric = self._metrics.get(name)
+        if metric is None:
+            with self._lock:
+                metric = self._metrics.get(name)
+                if metric is None:
+                    metric = self._metrics[name] = cls(name, help_text, labelnames, **kwargs)
+        return metric
+
+    def counter(self, name, help_text="", labelnames=()):
+        return self._get_or_create(Counter, name, help_text, labelnames)
+
+    def gauge(self, name, help_text="", labelnames=(), callback=None):
+        return self._get_or_create(Gauge, name, help_text, labelnames, callback=callback)
+
+    def histogram(self, name, help_text="", labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._get_or_create(Histogram, name, help_text, labelnames, buckets=buckets)
+
+    # --- cache layers ---
+
+    def cache_hit(self, cache):
+        self.counter("cache_requests_total", "Cache lookups by cache layer and result",
+                     ("cache", "result")).inc((cache, "hit"))
+
+    def cache_miss(self, cache):
+        self.counter("cache_requests_total", "Cache lookups by cache layer and result",
+                     ("cache", "result")).inc((cache, "miss"))
+
+    # --- snapshots and multi-worker aggregation ---
+
+    def snapshot(self):
+        return {
+            "pid": os.getpid(),
+            "written_at": time.time(),
+            "metrics": {
+                m.name: {
+                    "kind": m.kind,
+                    "help": m.help,
+                    "labelnames": list(m.labelnames),
+                    "buckets": list(getattr(m, "buckets", ())),
+                    "values": m.dump(),
+                }
+                for m in list(self._metrics.values())
+            },
+        }
+
+    def flush(self, force=False):
+        """Write this worker's snapshot to METRICS_DIR (at most every FLUSH_INTERVAL)"""
+        if not METRICS_DIR:
+            return
+        now = time.monotonic()
+        if not force and now - self._last_flush < FLUSH_INTERVAL:
+            return
+        self._last_flush = now
+        os.makedirs(METRICS_DIR, exist_ok=True)
+        path = os.path.join(METRICS_DIR, f"{os.getpid()}.json")
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.snapshot(), f)
+        os.replace(tmp, path)
+
+    def _worker_snapshots(self):
+        if not METRICS_DIR:
+            return [self.snapshot()]
+        self.flush(force=True)
+        snapshots = []
+        for path in glob.glob(os.path.join(METRICS_DIR, "*.json")):
+            try:
+                with open(path) as f:
+                    snap = json.load(f)
+            except (OSError, ValueError):
+                continue
+            snap["alive"] = _pid_alive(snap.get("pid"))
+            if not snap["alive"] and time.time() - snap.get("written_at", 0) > DEAD_WORKER_TTL:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+                continue
+            snapshots.append(snap)
+        return snapshots
+
+    def collect(self):
+        """Merge every worker's snapshot into {name: metric dict}"""
+        merged = {}
+        for snap in self._worker_snapshots():
+            for name, m in snap["metrics"].items():
+                if m["kind"] == "gauge" and not snap.get("alive", True):
+                    continue
+                target = merged.setdefault(name, {**m, "values": {}})
+                values = target["values"]
+                for labels, value in m["values"]:
+                    key = tuple(labels)
+                    if m["kind"] == "gauge":
+                        # one series per worker
+                        key = key + (str(snap["pid"]),)
+                        values[key] = value
+                    elif m["kind"] == "histogram":
+                        counts, total = value
+                        old = values.get(key)
+                        if old is None:
+                            values[key] = [list(counts), total]
+                        else:
+                            old[0] = [a + b for a, b in zip(old[0], counts)]
+                            old[1] += total
+                    else:
+                        values[key] = values.get(key, 0) + value
+        return merged
+
+    def render(self):
+        """Prometheus text exposition format (0.0.4)"""
+        lines = []
+        for name, m in sorted(self.collect().items()):
+            labelnames = list(m["labelnames"])
+            if m["kind"] == "gauge":
+                labelnames.append("pid")
+            lines.append(f"# HELP {name} {m['help']}")
+            lines.append(f"# TYPE {name} {m['kind']}")
+            for key, value in sorted(m["values"].items()):
+                labels = list(zip(labelnames, key))
+                if m["kind"] == "histogram":
+                    counts, total = value
+                    cumulative = 0
+                    for bound, count in zip(list(m["buckets"]) + ["+Inf"], counts):
+                        cumulative += count
+                        lines.append(f"{name}_bucket{_labels(labels + [('le', bound)])} {cumulative}")
+                    lines.append(f"{name}_sum{_labels(labels)} {total}")
+                    lines.append(f"{name}_count{_labels(labels)} {cumulative}")
+                else:
+                    lines.append(f"{name}{_labels(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self._metrics = {}
+
+    def after_fork(self):
+        # A preloaded parent's observations must not be counted again by every child
+        self._lock = threading.Lock()
+        self._last_flush = 0.0
+        for metric in list(self._metrics.values()):
+            metric._lock = threading.Lock()
+            metric._values = {}
+
+    # --- Flask wiring ---
+
+    def init_app(self, app):
+        from flask import Response, abort, g, request
+
+        route_latency = self.histogram(
+            "http_request_duration_seconds", "Flask request latency", ("endpoint", "method", "status")
+        )
+
+        @app.before_request
+        def _metrics_start():
+            g._metrics_start = time.perf_counter()
+
+        @app.after_request
+        def _metrics_record(response):
+            started = g.pop("_metrics_start", None)
+            if started is not None:
+                route_latency.observe(
+                    time.perf_counter() - started,
+                    (request.endpoint or "unmatched", request.method, response.status_code),
+                )
+            self.flush()
+            return response
+
+        token = os.environ.get("METRICS_TOKEN")
+
+        @app.route("/metrics")
+        def prometheus_metrics():
+            if token and request.headers.get("Authorization") != f"Bearer {token}":
+                abort(401)
+            return Response(self.render(), mimetype="text/plain; version=0.0.4")
+
+        self._register_pool_gauges(app)
+
+    def _register_pool_gauges(self, app):
+        from . import db
+
+        def pool_stats():
+            with app.app_context():
+                pool = db.engine.pool
+            stats = {}
+            for stat in ("size", "checkedout", "overflow"):
+                fn = getattr(pool, stat, None)
+                if fn is not None:
+                    # QueuePool reports unused overflow capacity as a negative number
+                    stats[(stat,)] = max(fn(), 0)
+            return stats
+
+        self.gauge("db_pool_connections", "SQLAlchemy pool size / checked-out / overflow connections",
+                   ("state",), callback=pool_stats)
+
+
+def _labels(pairs):
+    if not pairs:
+        return ""
+    inner = ",".join(f'{k}="{_escape(v)}"' for k, v in pairs)
+    return "{" + inner + "}"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _pid_alive(pid):
+    if not pid:
+        return False
+    if pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+metrics = Registry()
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=metrics.after_fork)
@@ -0,0 +1,293 @@
+# app/migrations.py
+"""
+Online data migrations that db.create_all() can't do on its own.
+
+Every function here is idempotent and safe to re-run. They are exposed
+as `flask` commands in app/cli.py.
+"""
+from sqlalchemy import inspect, text
+from sqlalchemy.sql import sqltypes
+
+from . import db
+
+# (table, column, not_null, default)
+MONEY_COLUMNS = [
+    ("transactions", "amount_local", True, None),
+    ("transactions", "amount_foreign", True, None),
+    ("dollar_balance", "current_balance", False, 0),
+    ("dollar_balance_logs", "change_amount", True, None),
+    ("dollar_balance_logs", "previous_balance", True, None),
+    ("dollar_balance_logs", "new_balance", True, None),
+]
+
+RESIDUE_TABLE = "money_migration_residue"
+
+
+def _column_type(inspector, table, column):
+    """Return the reflected column type, or None if table/column is missing"""
+    if not inspector.has_table(table):
+        return None
+    for col in inspector.get_columns(table):
+        if col["name"] == column:
+            return col["type"]
+    return None
+
+
+def _cents_sql(column, dialect):
+    """SQL expression converting a major-unit float column to cents"""
+    if dialect == "postgresql":
+        # NUMERIC rounding is half away from zero, same as Money
+        return f"ROUND(CAST({column} AS NUMERIC) * 100)"
+    return f"CAST(ROUND({column} * 100) AS INTEGER)"
+
+
+def _shadow(column):
+    return f"{column}_minor"
+
+
+def _trigger(table, column):
+    return f"money_sync_{table}_{column}"
+
+
+def _create_sync_triggers(conn, dialect, table, column):
+    """Keep the shadow column in step with writes made while we backfill"""
+    shadow = _shadow(column)
+    name = _trigger(table, column)
+
+    if dialect == "postgresql":
+        conn.execute(text(f"""
+            CREATE OR REPLACE FUNCTION {name}() RETURNS trigger AS $$
+            BEGIN
+                NEW.{shadow} := {_cents_sql('NEW.' + column, dialect)};
+                RETURN NEW;
+            END $$ LANGUAGE plpgsql
+        """))
+        conn.execute(text(f"DROP TRIGGER IF EXISTS {name} ON {table}"))
+        conn.execute(text(f"""
+            CREATE TRIGGER {name} BEFORE INSERT OR UPDATE OF {column} ON {table}
+            FOR EACH ROW EXECUTE PROCEDURE {name}()
+        """))
+    else:
+        for event in ("INSERT", f"UPDATE OF {column}"):
+            suffix = "ins" if event == "INSERT" else "upd"
+            conn.execute(text(f"""
+                CREATE TRIGGER IF NOT EXISTS {name}_{suffix} AFTER {event} ON {table}
+                BEGIN
+                    UPDATE {table} SET {shadow} = {_cents_sql('NEW.' + column, dialect)}
+                    WHERE rowid = NEW.rowid;
+                END
+            """))
+
+
+def _drop_sync_triggers(conn, dialect, table, column):
+    name = _trigger(table, column)
+    if dialect == "postgresql":
+        conn.execute(text(f"DROP TRIGGER IF EXISTS {name} ON {table}"))
+        conn.execute(text(f"DROP FUNCTION IF EXISTS {name}()"))
+    else:
+        conn.execute(text(f"DROP TRIGGER IF EXISTS {name}_ins"))
+        conn.execute(text(f"DROP TRIGGER IF EXISTS {name}_upd"))
+
+
+def _ensure_residue_table(conn):
+    conn.execute(text(f"""
+        CREATE TABLE IF NOT EXISTS {RESIDUE_TABLE} (
+            table_name VARCHAR(50) NOT NULL,
+            row_id INTEGER NOT NULL,
+            column_name VARCHAR(50) NOT NULL,
+            legacy_value TEXT NOT NULL,
+            minor_value BIGINT NOT NULL
+        )
+    """))
+
+
+def backfill_money_column(table, column, batch_size=5000):
+    """
+    Phase 1 (online): add `<column>_minor BIGINT`, install sync triggers
+    and backfill it in short id-range batches. The legacy float column is
+    untouched, so the old code keeps running while this works.
+
+    Rows whose float value has sub-cent digits (e.g. amount_foreign was
+    stored with 6 decimals) are copied verbatim into money_migration_residue
+    so nothing is lost. Returns (rows_backfilled, residue_rows).
+    """
+    engine = db.engine
+    dialect = engine.dialect.name
+    shadow = _shadow(column)
+    cents = _cents_sql(column, dialect)
+
+    inspector = inspect(engine)
+    col_type = _column_type(inspector, table, column)
+    if col_type is None or isinstance(col_type, sqltypes.Integer):
+        return 0, 0  # missing table (create_all will build it) or already migrated
+
+    with engine.begin() as conn:
+        if _column_type(inspector, table, shadow) is None:
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {shadow} BIGINT"))
+        _create_sync_triggers(conn, dialect, table, column)
+        _ensure_residue_table(conn)
+        lo, hi = conn.execute(text(f"SELECT MIN(id), MAX(id) FROM {table}")).first()
+
+    if lo is None:
+        return 0, 0
+
+    backfilled = 0
+    residue = 0
+    for start in range(lo, hi + 1, batch_size):
+        params = {"lo": start, "hi": start + batch_size}
+        # One short transaction per batch keeps row locks brief
+        with engine.begin() as conn:
+            result = conn.execute(text(f"""
+                UPDATE {table} SET {shadow} = {cents}
+                WHERE id >= :lo AND id < :hi AND {shadow} IS NULL AND {column} IS NOT NULL
+            """), params)
+            backfilled += result.rowcount or 0
+
+            result = conn.execute(text(f"""
+                INSERT INTO {RESIDUE_TABLE} (table_name, row_id, column_name, legacy_value, minor_value)
+                SELECT '{table}', id, '{column}', CAST({column} AS TEXT), {shadow}
+                FROM {table}
+                WHERE id >= :lo AND id < :hi
+                  AND ABS({column} * 100 - {shadow}) > 0.000001
+                  AND NOT EXISTS (
+                      SELECT 1 FROM {RESIDUE_TABLE} r
+                      WHERE r.table_name = '{table}' AND r.column_name = '{column}' AND r.row_id = {table}.id
+                  )
+            """), params)
+            residue += result.rowcount or 0
+
+    return backfilled, residue
+
+
+def swap_money_column(table, column, not_null=False, default=None):
+    """
+    Phase 2 (release step): drop the legacy float column and rename the
+    shadow column into its place in one short transaction. Run this
+    together with deploying code that uses MoneyType.
+    """
+    engine = db.engine
+    dialect = engine.dialect.name
+    shadow = _shadow(column)
+    cents = _cents_sql(column, dialect)
+
+    inspector = inspect(engine)
+    col_type = _column_type(inspector, table, column)
+    if col_type is None or isinstance(col_type, sqltypes.Integer):
+        return False
+    if _column_type(inspector, table, shadow) is None:
+        raise RuntimeError(f"{table}.{column}: run the backfill phase before swapping")
+
+    with engine.begin() as conn:
+        if dialect == "postgresql":
+            conn.execute(text(f"LOCK TABLE {table} IN ACCESS EXCLUSIVE MODE"))
+        # Triggers kept the shadow in sync; this only catches rows that
+        # existed with NULL before the triggers were installed.
+        conn.execute(text(f"UPDATE {table} SET {shadow} = {cents} WHERE {shadow} IS NULL AND {column} IS NOT NULL"))
+        _drop_sync_triggers(conn, dialect, table, column)
+        conn.execute(text(f"ALTER TABLE {table} DROP COLUMN {column}"))
+        conn.execute(text(f"ALTER TABLE {table} RENAME COLUMN {shadow} TO {column}"))
+        if dialect == "postgresql":
+            if not_null:
+                conn.execute(text(f"ALTER TABLE {table} ALTER COLUMN {column} SET NOT NULL"))
+            if default is not None:
+                conn.execute(text(f"ALTER TABLE {table} ALTER COLUMN {column} SET DEFAULT {int(default)}"))
+    return True
+
+
+def migrate_money_columns(swap=False, batch_size=5000):
+    """Run the float -> integer cents migration for every money column"""
+    results = []
+    for table, column, not_null, default in MONEY_COLUMNS:
+        backfilled, residue = backfill_money_column(table, column, batch_size=batch_size)
+        swapped = swap_money_column(table, column, not_null, default) if swap else False
+        results.append({
+            "column": f"{table}.{column}",
+            "backfilled": backfilled,
+            "residue": residue,
+            "swapped": swapped,
+        })
+    return results
+
+
+PHONE_COLUMNS = [("sender_phone", "sender_phone_e164"), ("receiver_phone", "receiver_phone_e164")]
+PHONE_INDEXES = [
+    ("ix_transactions_sender_phone_e164_ts", "sender_phone_e164"),
+    ("ix_transactions_receiver_phone_e164_ts", "receiver_phone_e164"),
+]
+
+
+def migrate_phone_columns(batch_size=5000):
+    """
+    Add transactions.*_phone_e164, backfill them in id-range batches and
+    build the (phone, timestamp) indexes. Run before deploying code that
+    reads the new columns; re-running only touches rows still missing a
+    value. Returns (rows_updated, unparseable_numbers); numbers that can't
+    be normalized keep a NULL target and are re-checked (and re-counted)
+    by every run, so the count is what is still unparseable.
+    """
+    from .phones import to_e164
+
+    engine = db.engine
+    dialect = engine.dialect.name
+    inspector = inspect(engine)
+    if not inspector.has_table("transactions"):
+        return 0, 0
+
+    with engine.begin() as conn:
+        for _, target in PHONE_COLUMNS:
+            if _column_type(inspector, "transactions", target) is None:
+                conn.execute(text(f"ALTER TABLE transactions ADD COLUMN {target} VARCHAR(16)"))
+        lo, hi = conn.execute(text("SELECT MIN(id), MAX(id) FROM transactions")).first()
+
+    updated = 0
+    unparseable = 0
+    missing = " OR ".join(f"({target} IS NULL AND {source} IS NOT NULL AND {source} <> '')"
+                         for source, target in PHONE_COLUMNS)
+    if lo is not None:
+        for start in range(lo, hi + 1, batch_size):
+            # Normalized in Python with the same to_e164() the models use
+            with engine.begin() as conn:
+                rows = conn.execute(text(f"""
+                    SELECT id, sender_phone, receiver_phone FROM transactions
+                    WHERE id >= :lo AND id < :hi AND ({missing})
+                """), {"lo": start, "hi": start + batch_size}).all()
+                if not rows:
+                    continue
+                params = []
+                for row_id, sender, receiver in rows:
+                    sender_e164, receiver_e164 = to_e164(sender), to_e164(receiver)
+                    unparseable += int(bool(sender) and not sender_e164) + int(bool(receiver) and not receiver_e164)
+                    if sender_e164 or receiver_e164:
+                        params.append({"id": row_id, "s": sender_e164, "r": receiver_e164})
+                if params:
+                    # COALESCE: never clear a value another writer already filled
+                    conn.execute(text(
+                        "UPDATE transactions SET sender_phone_e164 = COALESCE(sender_phone_e164, :s), "
+                        "receiver_phone_e164 = COALESCE(receiver_phone_e164, :r) WHERE id = :id"
+                    ), params)
+                    updated += len(params)
+
+    if dialect == "postgresql":
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            for name, column in PHONE_INDEXES:
+                conn.execute(text(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON transactions ({column}, timestamp)"))
+    else:
+        with engine.begin() as conn:
+            for name, column in PHONE_INDEXES:
+                conn.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON transactions ({column}, timestamp)"))
+
+    return updated, unparseable
+
+
+def create_report_indexes():
+    """Build ix_transactions_timestamp on existing databases (CONCURRENTLY on PostgreSQL)"""
+    engine = db.engine
+    if not inspect(engine).has_table("transactions"):
+        return False
+    if engine.dialect.name == "postgresql":
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.execute(text("CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_transactions_timestamp ON transactions (timestamp)"))
+    else:
+        with engine.begin() as conn:
+            conn.execute(text("CREATE INDEX IF NOT EXISTS ix_transactions_timestamp ON transactions (timestamp)"))
+    return True
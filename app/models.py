@@ -1,6 +1,9 @@
 from flask_login import UserMixin
+from sqlalchemy.orm import validates
 
 from . import db
+from .money import MoneyType
+from .phones import to_e164
 from datetime import datetime
 
 
@@ -77,8 +80,35 @@ class Setting(db.Model):
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
 
+class FeeSchedule(db.Model):
+    """
+    One fee tier (app.fees): amounts from min_amount up to the next tier
+    pay percent of the amount plus flat_fee. A NULL currency or branch
+    matches any.
+    """
+    __tablename__ = 'fee_schedules'
+    __table_args__ = (
+        db.UniqueConstraint('currency_code', 'branch_id', 'min_amount', name='uq_fee_schedules_tier'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    currency_code = db.Column(db.String(3))
+    branch_id = db.Column(db.Integer, db.ForeignKey('branches.id'))
+    min_amount = db.Column(MoneyType, default=0, nullable=False)  # ZAR cents, inclusive
+    percent = db.Column(db.Float, default=0, nullable=False)  # 0.01 = 1%
+    flat_fee = db.Column(MoneyType, default=0, nullable=False)  # ZAR cents
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
 class Transaction(db.Model):
     __tablename__ = 'transactions'
+    __table_args__ = (
+        # Repeat-customer history: equality on the phone, newest first
+        db.Index('ix_transactions_sender_phone_e164_ts', 'sender_phone_e164', 'timestamp'),
+        db.Index('ix_transactions_receiver_phone_e164_ts', 'receiver_phone_e164', 'timestamp'),
+        # Daily report pages and summaries: timestamp range scans
+        db.Index('ix_transactions_timestamp', 'timestamp'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     transaction_id = db.Column(db.String(50), unique=True, nullable=False)
@@ -86,8 +116,8 @@ class Transaction(db.Model):
     sender_phone = db.Column(db.String(20))
     receiver_name = db.Column(db.String(255), nullable=False)
     receiver_phone = db.Column(db.String(20))
-    amount_local = db.Column(db.Float, nullable=False)
-    amount_foreign = db.Column(db.Float, nullable=False)
+    amount_local = db.Column(MoneyType, nullable=False)  # ZAR cents
+    amount_foreign = db.Column(MoneyType, nullable=False)  # USD cents
     currency_code = db.Column(db.String(3))
     status = db.Column(db.String(20), default='pending')
     created_by = db.Column(db.Integer, db.ForeignKey('users.id'))
@@ -104,6 +134,32 @@ class Transaction(db.Model):
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
     payment_method = db.Column(db.String(50), default='cash')
     notes = db.Column(db.Text)
+    # Filled from sender_phone/receiver_phone by the validator below
+    sender_phone_e164 = db.Column(db.String(16))
+    receiver_phone_e164 = db.Column(db.String(16))
+
+    @validates('sender_phone', 'receiver_phone')
+    def _normalize_phone(self, key, value):
+        setattr(self, f'{key}_e164', to_e164(value))
+        return value
+
+
+class Customer(db.Model):
+    """A sender/receiver deduplicated by E.164 phone and normalized name (see app.customers)"""
+    __tablename__ = 'customers'
+    __table_args__ = (
+        # Also serves phone-prefix range scans for the autocomplete fallback
+        db.UniqueConstraint('phone_e164', 'name_key', name='uq_customers_phone_name'),
+        db.Index('ix_customers_name_key', 'name_key'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(255), nullable=False)
+    name_key = db.Column(db.String(255), nullable=False)  # casefolded, single-spaced
+    phone_e164 = db.Column(db.String(16), nullable=False)
+    transaction_count = db.Column(db.Integer, default=0, nullable=False)
+    last_seen_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
 
 class Log(db.Model):
@@ -133,18 +189,48 @@ class DollarBalance(db.Model):
     __tablename__ = 'dollar_balance'
 
     id = db.Column(db.Integer, primary_key=True)
-    current_balance = db.Column(db.Float, default=0.00)
+    current_balance = db.Column(MoneyType, default=0)  # USD cents
     last_updated = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
 
+class DayClose(db.Model):
+    """A closed reporting day (app.snapshots): its totals are frozen in daily_snapshots"""
+    __tablename__ = 'day_closes'
+
+    day = db.Column(db.Date, primary_key=True)
+    transaction_count = db.Column(db.Integer, default=0, nullable=False)
+    total_local = db.Column(MoneyType, default=0, nullable=False)  # ZAR cents
+    total_foreign = db.Column(MoneyType, default=0, nullable=False)  # USD cents
+    closing_dollar_balance = db.Column(MoneyType, default=0, nullable=False)  # USD cents
+    closed_at = db.Column(db.DateTime, default=datetime.utcnow)
+    closed_by = db.Column(db.Integer, db.ForeignKey('users.id'))
+
+
+class DailySnapshot(db.Model):
+    """One closed day's totals for an agent/branch/currency combination"""
+    __tablename__ = 'daily_snapshots'
+    __table_args__ = (
+        db.Index('ix_daily_snapshots_day', 'day'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    day = db.Column(db.Date, nullable=False)
+    agent_id = db.Column(db.Integer, db.ForeignKey('users.id'))
+    branch_id = db.Column(db.Integer, db.ForeignKey('branches.id'))
+    currency_code = db.Column(db.String(3))
+    transaction_count = db.Column(db.Integer, default=0, nullable=False)
+    total_local = db.Column(MoneyType, default=0, nullable=False)  # ZAR cents
+    total_foreign = db.Column(MoneyType, default=0, nullable=False)  # USD cents
+
+
 class DollarBalanceLog(db.Model):
     __tablename__ = 'dollar_balance_logs'
 
     id = db.Column(db.Integer, primary_key=True)
     transaction_id = db.Column(db.String(50), db.ForeignKey('transactions.transaction_id'))
-    change_amount = db.Column(db.Float, nullable=False)
-    previous_balance = db.Column(db.Float, nullable=False)
-    new_balance = db.Column(db.Float, nullable=False)
+    change_amount = db.Column(MoneyType, nullable=False)
+    previous_balance = db.Column(MoneyType, nullable=False)
+    new_balance = db.Column(MoneyType, nullable=False)
     change_type = db.Column(db.String(50))  # 'manual_adjustment', 'transaction', etc.
     description = db.Column(db.Text)
     created_by = db.Column(db.Integer, db.ForeignKey('users.id'))
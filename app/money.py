@@ -0,0 +1,211 @@
+# app/money.py
+from decimal import Decimal, ROUND_HALF_UP, InvalidOperation
+from fractions import Fraction
+from functools import lru_cache, total_ordering
+
+from sqlalchemy.types import TypeDecorator, BigInteger
+
+MINOR_UNITS = 100  # cents per unit, same for ZAR and USD
+_QUANT = Decimal("0.01")
+
+
+def _to_minor(value):
+    """Convert a major-unit number (float, int, Decimal, str) to integer cents"""
+    if isinstance(value, Money):
+        return value.minor
+    if isinstance(value, float):
+        # repr() gives the shortest round-tripping string, so 10.1 becomes
+        # 1010 cents rather than 1009.999...
+        value = repr(value)
+    try:
+        dec = Decimal(str(value).strip().replace(",", ""))
+    except (InvalidOperation, ValueError):
+        raise ValueError(f"Invalid money amount: {value!r}")
+    if not dec.is_finite():
+        raise ValueError(f"Invalid money amount: {value!r}")
+    return int((dec * MINOR_UNITS).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+def format_cents(minor):
+    """Integer cents as an exact decimal string: 150000 -> '1500.00'"""
+    sign = "-" if minor < 0 else ""
+    minor = abs(minor)
+    return f"{sign}{minor // MINOR_UNITS}.{minor % MINOR_UNITS:02d}"
+
+
+@lru_cache(maxsize=1024)
+def ratio(value):
+    """A rate or percentage as an exact (numerator, denominator), read the way Money reads floats"""
+    fraction = Fraction(Decimal(str(value)))
+    return fraction.numerator, fraction.denominator
+
+
+def scale_cents(cents, num, den):
+    """round_half_up(c * num / den) for each non-negative c in cents, without floats"""
+    twice = 2 * den
+    return [(2 * c * num + den) // twice for c in cents]
+
+
+@total_ordering
+class Money:
+    """
+    Exact amount stored as integer minor units (cents).
+
+    Behaves like a number in templates and f-strings ("%.2f", float(),
+    sum(), comparisons) while keeping arithmetic between amounts exact.
+    Multiplying or dividing by a rate rounds half-up to the nearest cent.
+    """
+
+    __slots__ = ("minor",)
+
+    def __init__(self, minor=0):
+        object.__setattr__(self, "minor", int(minor))
+
+    def __setattr__(self, key, value):
+        raise AttributeError("Money is immutable")
+
+    # --- constructors ---
+
+    @classmethod
+    def of(cls, value):
+        """Build from a major-unit value (e.g. 12.5 -> 12.50)"""
+        if value is None:
+            return cls(0)
+        if isinstance(value, Money):
+            return value
+        return cls(_to_minor(value))
+
+    @classmethod
+    def from_minor(cls, minor):
+        return cls(minor or 0)
+
+    @classmethod
+    def parse(cls, raw):
+        """Parse user input from a form field; raises ValueError if invalid"""
+        if raw is None or str(raw).strip() == "":
+            raise ValueError("Amount is required")
+        return cls(_to_minor(raw))
+
+    @classmethod
+    def zero(cls):
+        return cls(0)
+
+    # --- conversions ---
+
+    def to_decimal(self):
+        return (Decimal(self.minor) / MINOR_UNITS).quantize(_QUANT)
+
+    def __float__(self):
+        return self.minor / MINOR_UNITS
+
+    def __int__(self):
+        return int(self.to_decimal())
+
+    def __round__(self, ndigits=None):
+        return round(float(self), ndigits)
+
+    def __bool__(self):
+        return self.minor != 0
+
+    def __hash__(self):
+        # consistent with __eq__ against int/float/Decimal
+        return hash(self.to_decimal())
+
+    def __str__(self):
+        return str(self.to_decimal())
+
+    def __repr__(self):
+        return f"Money('{self}')"
+
+    def __format__(self, spec):
+        return format(self.to_decimal(), spec)
+
+    # --- comparisons ---
+
+    def __eq__(self, other):
+        if isinstance(other, Money):
+            return self.minor == other.minor
+        if isinstance(other, (int, float, Decimal)):
+            return self.to_decimal() == Decimal(str(other))
+        return NotImplemented
+
+    def __lt__(self, other):
+        if isinstance(other, Money):
+            return self.minor < other.minor
+        if isinstance(other, (int, float, Decimal)):
+            return self.to_decimal() < Decimal(str(other))
+        return NotImplemented
+
+    # --- arithmetic ---
+
+    def __add__(self, other):
+        if isinstance(other, (Money, int, float, Decimal)):
+            return Money(self.minor + _to_minor(other))
+        return NotImplemented
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        if isinstance(other, (Money, int, float, Decimal)):
+            return Money(self.minor - _to_minor(other))
+        return NotImplemented
+
+    def __rsub__(self, other):
+        if isinstance(other, (int, float, Decimal)):
+            return Money(_to_minor(other) - self.minor)
+        return NotImplemented
+
+    def __neg__(self):
+        return Money(-self.minor)
+
+    def __abs__(self):
+        return Money(abs(self.minor))
+
+    def __mul__(self, factor):
+        if isinstance(factor, Money):
+            return NotImplemented
+        if isinstance(factor, (int, float, Decimal)):
+            scaled = Decimal(self.minor) * Decimal(str(factor))
+            return Money(int(scaled.quantize(Decimal(1), rounding=ROUND_HALF_UP)))
+        return NotImplemented
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, other):
+        # Money / Money is a plain ratio; Money / rate is an amount
+        if isinstance(other, Money):
+            return self.minor / other.minor
+        if isinstance(other, (int, float, Decimal)):
+            scaled = Decimal(self.minor) / Decimal(str(other))
+            return Money(int(scaled.quantize(Decimal(1), rounding=ROUND_HALF_UP)))
+        return NotImplemented
+
+    def __rtruediv__(self, other):
+        if isinstance(other, (int, float, Decimal)):
+            return float(other) / float(self)
+        return NotImplemented
+
+
+class MoneyType(TypeDecorator):
+    """
+    BIGINT column holding cents, exposed to Python as Money.
+
+    Plain numbers bound to the column are treated as major units, so
+    existing code like DollarBalance(current_balance=0) keeps working.
+    SUM()/COALESCE() over a MoneyType column inherit the type, so
+    aggregates come back as exact Money values as well.
+    """
+
+    impl = BigInteger
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return _to_minor(value)
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        # PostgreSQL returns SUM(bigint) as NUMERIC
+        return Money(int(value))
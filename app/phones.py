@@ -0,0 +1,91 @@
+# app/phones.py
+"""
+Phone numbers in E.164 (+27821234567).
+
+to_e164() is the one normalizer: models fill the indexed *_phone_e164
+columns with it at write time, so SMS sends and the repeat-customer
+lookup use the stored value instead of re-parsing raw input.
+"""
+import re
+
+DEFAULT_COUNTRY = "27"  # South Africa
+_E164 = re.compile(r"^\+[1-9]\d{7,14}$")
+
+
+def is_e164(number):
+    return bool(number) and _E164.match(number) is not None
+
+
+def to_e164(raw, default_country=DEFAULT_COUNTRY):
+    """
+    Normalize a raw phone number, or return None if it can't be one.
+
+        '082 123 4567'   -> '+27821234567'
+        '27821234567'    -> '+27821234567'
+        '00263771234567' -> '+263771234567'
+        '821234567'      -> '+27821234567'
+    """
+    if not raw:
+        return None
+    raw = str(raw).strip()
+    if is_e164(raw):
+        return raw
+
+    plus = raw.startswith("+")
+    digits = "".join(ch for ch in raw if ch.isdigit())
+    if not digits:
+        return None
+
+    if plus:
+        pass
+    elif digits.startswith("00"):
+        digits = digits[2:]  # international dialling prefix
+    elif digits.startswith("0"):
+        digits = default_country + digits[1:]
+    elif len(digits) == 9:
+        digits = default_country + digits
+
+    number = "+" + digits
+    return number if is_e164(number) else None
+
+
+def phone_history(phone, limit=20, exclude_id=None):
+    """
+    Most recent transactions where `phone` was the sender or receiver.
+
+    Two index range scans on (sender_phone_e164, timestamp) and
+    (receiver_phone_e164, timestamp), each already in timestamp order,
+    merged and cut to `limit`.
+    """
+    from .models import Transaction
+
+    number = to_e164(phone)
+    if not number:
+        return []
+
+    rows = {}
+    for column in (Transaction.sender_phone_e164, Transaction.receiver_phone_e164):
+        query = Transaction.query.filter(column == number)
+        if exclude_id is not None:
+            query = query.filter(Transaction.id != exclude_id)
+        for tx in query.order_by(Transaction.timestamp.desc()).limit(limit):
+            rows[tx.id] = tx
+    return sorted(rows.values(), key=lambda tx: tx.timestamp, reverse=True)[:limit]
+
+
+def history_summary(transactions, phone):
+    """JSON-friendly rows for the create/verify screens"""
+    number = to_e164(phone)
+    return [
+        {
+            "transaction_id": tx.transaction_id,
+            "role": "sender" if tx.sender_phone_e164 == number else "receiver",
+            "sender_name": tx.sender_name,
+            "receiver_name": tx.receiver_name,
+            "amount_local": float(tx.amount_local),
+            "currency_code": tx.currency_code,
+            "status": tx.status,
+            "timestamp": tx.timestamp.isoformat() if tx.timestamp else None,
+        }
+        for tx in transactions
+    ]
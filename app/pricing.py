@@ -0,0 +1,118 @@
+# app/pricing.py
+"""
+Effective exchange rates per branch and currency.
+
+    rate = rate_table.rate("USD", branch_id)   # ZAR per unit, None if unpriced
+
+A currency's default rate is its latest exchange_rates row to ZAR plus
+the `exchange_rate_margin` setting (0.02 = 2%, in the house's favour).
+A branch with a rate_override prices USD at exactly that rate: it is the
+rate the branch quotes, margin included. ZAR is always 1.
+
+The table is built once per worker and rebuilt after an exchange rate, a
+branch, a currency, a user's branch or the margin setting changes. Those
+writes bump the `rates_changed_at` setting, which workers check every
+RATE_TABLE_CHECK_SECONDS, so pricing a transaction is a dict lookup.
+"""
+import os
+
+from flask import current_app
+from sqlalchemy import event, inspect, select
+
+from . import db
+from .cache import SettingStamp
+from .models import Branch, Currency, ExchangeRate, Setting, User
+
+BASE_CURRENCY = "ZAR"
+OVERRIDE_CURRENCY = "USD"  # what Branch.rate_override prices
+MARGIN_KEY = "exchange_rate_margin"
+
+rates_changed = SettingStamp("rates_changed_at", ttl=float(os.environ.get("RATE_TABLE_CHECK_SECONDS", 5)))
+
+
+def _margin():
+    value = db.session.execute(select(Setting.value).where(Setting.key == MARGIN_KEY)).scalar()
+    try:
+        return float(value or 0)
+    except ValueError:
+        current_app.logger.warning(f"Ignoring invalid {MARGIN_KEY} setting {value!r}")
+        return 0.0
+
+
+class RateTable:
+    """(branch_id, currency) -> effective rate; branch None holds the defaults"""
+
+    def __init__(self):
+        self._state = (None, {}, {})  # (stamp, rates, user -> branch)
+
+    def build(self):
+        """Compute (rates, user branches) from the database"""
+        margin = _margin()
+        latest = {}
+        rows = db.session.execute(
+            select(ExchangeRate.from_currency, ExchangeRate.rate)
+            .where(ExchangeRate.to_currency == BASE_CURRENCY)
+            .order_by(ExchangeRate.updated_at.desc(), ExchangeRate.id.desc())
+        )
+        for code, rate in rows:
+            if rate and rate > 0:
+                latest.setdefault(code.upper(), rate)
+
+        rates = {(None, code): rate * (1 + margin) for code, rate in latest.items()}
+        rates[(None, BASE_CURRENCY)] = 1.0
+        overrides = db.session.execute(select(Branch.id, Branch.rate_override).where(Branch.rate_override > 0))
+        for branch_id, override in overrides:
+            rates[(branch_id, OVERRIDE_CURRENCY)] = override
+
+        user_branches = dict(db.session.execute(
+            select(User.id, User.branch_id).where(User.branch_id.isnot(None))).all())
+        return rates, user_branches
+
+    def refresh(self, force=False):
+        """Rebuild if rates changed since the last build"""
+        stamp = rates_changed.value()
+        if force or stamp != self._state[0]:
+            rates, user_branches = self.build()
+            self._state = (stamp, rates, user_branches)
+
+    def rate(self, currency_code, branch_id=None):
+        """Effective ZAR rate for one unit of currency_code at branch_id, or None"""
+        self.refresh()
+        rates = self._state[1]
+        code = (currency_code or BASE_CURRENCY).upper()
+        return rates.get((branch_id, code)) or rates.get((None, code))
+
+    def branch_of(self, user_id):
+        """The branch a user prices at, or None"""
+        self.refresh()
+        return self._state[2].get(user_id)
+
+
+rate_table = RateTable()
+
+
+@event.listens_for(ExchangeRate, "after_insert")
+@event.listens_for(ExchangeRate, "after_update")
+@event.listens_for(ExchangeRate, "after_delete")
+@event.listens_for(Branch, "after_insert")
+@event.listens_for(Branch, "after_update")
+@event.listens_for(Branch, "after_delete")
+@event.listens_for(Currency, "after_insert")
+@event.listens_for(Currency, "after_update")
+@event.listens_for(Currency, "after_delete")
+def _rates_changed(mapper, connection, target):
+    rates_changed.bump(connection)
+
+
+@event.listens_for(Setting, "after_insert")
+@event.listens_for(Setting, "after_update")
+def _setting_changed(mapper, connection, target):
+    if target.key == MARGIN_KEY:
+        rates_changed.bump(connection)
+
+
+@event.listens_for(User, "after_insert")
+@event.listens_for(User, "after_update")
+def _user_changed(mapper, connection, target):
+    if inspect(target).attrs.branch_id.history.has_changes():
+        rates_changed.bump(connection)
@@ -0,0 +1,263 @@
+# app/providers.py
+"""
+Registry of external provider clients (Twilio, SNS, rate APIs).
+
+Clients are built on first use, shared by every thread in the process and
+rebuilt in a child after fork (gunicorn --preload), so no TLS connection
+pool is ever shared across processes. Each provider gets keep-alive
+pools, explicit timeouts and a bounded retry budget.
+
+    from .providers import registry
+    with registry.timed("twilio"):
+        registry.get("twilio").send_sms(...)
+"""
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+
+def _env_int(name, default):
+    try:
+        return int(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def _env_float(name, default):
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+POOL_MAXSIZE = _env_int("PROVIDER_POOL_MAXSIZE", 20)
+CONNECT_TIMEOUT = _env_float("PROVIDER_CONNECT_TIMEOUT", 3.05)
+READ_TIMEOUT = _env_float("PROVIDER_READ_TIMEOUT", 10.0)
+MAX_RETRIES = _env_int("PROVIDER_MAX_RETRIES", 2)
+
+
+class ProviderStats:
+    """Call count, error count and latency for one provider"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.errors = 0
+        self.total_s = 0.0
+        self.max_s = 0.0
+
+    def record(self, seconds, ok=True):
+        with self._lock:
+            self.calls += 1
+            if not ok:
+                self.errors += 1
+            self.total_s += seconds
+            if seconds > self.max_s:
+                self.max_s = seconds
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "errors": self.errors,
+                "avg_ms": round(self.total_s / self.calls * 1000, 2) if self.calls else 0.0,
+                "max_ms": round(self.max_s * 1000, 2),
+            }
+
+
+class TimeoutSession:
+    """requests.Session wrapper that always applies the default timeout"""
+
+    def __init__(self, session, timeout):
+        self.http_session = session
+        self.timeout = timeout
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        return self.http_session.request(method, url, **kwargs)
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+
+def pooled_adapter(retry_methods=("GET",)):
+    """HTTPAdapter with keep-alive pool and a small retry budget"""
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    retries = Retry(
+        total=MAX_RETRIES,
+        connect=MAX_RETRIES,
+        read=MAX_RETRIES,
+        backoff_factor=0.2,
+        status_forcelist=(429, 502, 503, 504),
+        allowed_methods=frozenset(retry_methods),
+        raise_on_status=False,
+    )
+    return HTTPAdapter(pool_connections=4, pool_maxsize=POOL_MAXSIZE, max_retries=retries)
+
+
+def connection_stats(session):
+    """New connections vs requests across a requests.Session's urllib3 pools"""
+    opened = requests_sent = 0
+    for adapter in session.adapters.values():
+        pools = adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            opened += pool.num_connections
+            requests_sent += pool.num_requests
+    return {
+        "connections_opened": opened,
+        "requests": requests_sent,
+        "connections_reused": max(requests_sent - opened, 0),
+    }
+
+
+# --- factories ---
+
+def build_http_session():
+    """Shared session for the exchange-rate APIs"""
+    import requests
+
+    session = requests.Session()
+    adapter = pooled_adapter()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return TimeoutSession(session, (CONNECT_TIMEOUT, READ_TIMEOUT))
+
+
+def build_twilio_service():
+    from twilio.http.http_client import TwilioHttpClient
+    from .twilio_sms_service import TwilioSMSService
+
+    # POSTs are not idempotent: retry connect errors only, never reads
+    http_client = TwilioHttpClient(pool_connections=True, timeout=READ_TIMEOUT)
+    http_client.session.mount("https://", pooled_adapter(retry_methods=()))
+    return TwilioSMSService(http_client=http_client)
+
+
+def build_sns_client():
+    import boto3
+    from botocore.config import Config
+
+    config = Config(
+        max_pool_connections=POOL_MAXSIZE,
+        connect_timeout=CONNECT_TIMEOUT,
+        read_timeout=READ_TIMEOUT,
+        retries={"max_attempts": MAX_RETRIES + 1, "mode": "standard"},
+        tcp_keepalive=True,
+    )
+    # Read credentials from environment variables
+    return boto3.client(
+        "sns",
+        aws_access_key_id=os.environ.get("AWS_ACCESS_KEY_ID"),
+        aws_secret_access_key=os.environ.get("AWS_SECRET_ACCESS_KEY"),
+        region_name=os.environ.get("AWS_REGION", "us-east-1"),
+        config=config,
+    )
+
+
+def _call_latency():
+    from .metrics import metrics
+    return metrics.histogram("provider_call_duration_seconds", "External provider call latency",
+                             ("provider", "outcome"))
+
+
+class _Call:
+    """Handle yielded by registry.timed(); set ok=False for soft failures"""
+    __slots__ = ("ok",)
+
+    def __init__(self):
+        self.ok = True
+
+
+class ProviderRegistry:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._factories = {}
+        self._instances = {}
+        self._stats = {}
+        self._pid = os.getpid()
+
+    def register(self, name, factory):
+        self._factories[name] = factory
+        self._stats.setdefault(name, ProviderStats())
+
+    def get(self, name):
+        if self._pid != os.getpid():
+            self.after_fork()
+        client = self._instances.get(name)
+        if client is None:
+            with self._lock:
+                client = self._instances.get(name)
+                if client is None:
+                    client = self._factories[name]()
+                    self._instances[name] = client
+        return client
+
+    def override(self, name, instance):
+        """Swap in a stand-in client (benchmarks, local runs)"""
+        with self._lock:
+            self._instances[name] = instance
+            self._stats.setdefault(name, ProviderStats())
+
+    def reset(self):
+        """Drop every client so they are rebuilt on next use"""
+        with self._lock:
+            self._instances = {}
+            self._stats = {name: ProviderStats() for name in self._factories}
+            self._pid = os.getpid()
+
+    def after_fork(self):
+        # The parent's lock may have been held by another thread at fork time
+        self._lock = threading.Lock()
+        self.reset()
+
+    @contextmanager
+    def timed(self, name):
+        stats = self._stats.setdefault(name, ProviderStats())
+        call = _Call()
+        start = time.perf_counter()
+        try:
+            yield call
+        except Exception:
+            call.ok = False
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            stats.record(elapsed, call.ok)
+            _call_latency().observe(elapsed, (name, "ok" if call.ok else "error"))
+
+    def stats(self):
+        result = {}
+        for name, stats in list(self._stats.items()):
+            entry = stats.snapshot()
+            client = self._instances.get(name)
+            session = getattr(client, "http_session", None)
+            if session is not None:
+                try:
+                    entry.update(connection_stats(session))
+                except Exception:
+                    pass
+            result[name] = entry
+        return result
+
+
+registry = ProviderRegistry()
+registry.register("http", build_http_session)
+registry.register("twilio", build_twilio_service)
+registry.register("sns", build_sns_client)
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=registry.after_fork)
+
+
+def http_session():
+    return registry.get("http")
@@ -0,0 +1,147 @@
+# app/quotes.py
+"""
+Transaction quotes: fees and foreign amount for ZAR amounts.
+
+    POST /admin/api/quote  {"amount": "1500.00", "currency": "USD", "branch_id": 2}
+    POST /admin/api/quote  {"items": [{"amount": "1500.00", "currency": "USD"}, ...]}
+
+Rates come from app.pricing's in-memory rate table and fees from
+app.fees' compiled fee schedules, so quoting does no database work. A
+batch is priced column-wise: items are grouped by (currency, branch),
+each group's rate and fee schedule are looked up once, and its amounts go
+through integer-cent arithmetic with the same half-up rounding as Money,
+so a quote matches what create_transaction records to the cent.
+
+A single quote also carries a quote_token: the amount, currency, branch,
+rate and fees, signed with the app's secret key and valid for
+QUOTE_TOKEN_TTL seconds. create_transaction redeems it to record exactly
+the quoted rate, with no rate or fee lookup; a token that has expired,
+was tampered with or doesn't match the submitted amount is ignored and
+the transaction is priced at current rates. Tokens this worker issued
+are kept decoded in an in-memory store until they expire, so redeeming
+them skips the signature check; other workers verify the signature.
+"""
+import os
+import time
+
+from flask import current_app
+from itsdangerous import BadData, URLSafeTimedSerializer
+
+from .cache import TTLCache
+from .fees import fee_engine
+from .money import Money, format_cents, ratio, scale_cents
+from .pricing import rate_table
+
+MAX_BATCH = int(os.environ.get("QUOTE_MAX_BATCH", 1000))
+TOKEN_TTL = int(os.environ.get("QUOTE_TOKEN_TTL", 900))
+
+quote_store = TTLCache("quote_tokens", ttl=TOKEN_TTL, maxsize=10000)
+
+
+def price(cents, currency="ZAR", branch_id=None):
+    """Quote a list of amounts (integer cents) in one currency at one branch, as columns"""
+    rate = rate_table.rate(currency, branch_id) or 1.0  # same fallback as create_transaction
+    priced = fee_engine.evaluate(cents, currency, branch_id)
+    rate_num, rate_den = ratio(rate)
+    priced.update(
+        rate=rate,
+        totals=[c + fee + flat for c, fee, flat in zip(cents, priced["fees"], priced["flats"])],
+        foreign=scale_cents(cents, rate_den, rate_num),  # amount / rate
+    )
+    return priced
+
+
+def parse_item(item):
+    """(cents, currency, branch_id) from one request item; ValueError if invalid"""
+    if not isinstance(item, dict):
+        raise ValueError("Each item must be an object")
+    cents = Money.parse(item.get("amount")).minor
+    if cents <= 0:
+        raise ValueError("Amount must be positive")
+    currency = str(item.get("currency") or "ZAR").upper()
+    branch_id = item.get("branch_id")
+    if branch_id in (None, ""):
+        branch_id = None
+    else:
+        try:
+            branch_id = int(branch_id)
+        except (TypeError, ValueError):
+            raise ValueError(f"Invalid branch_id {branch_id!r}")
+    return cents, currency, branch_id
+
+
+def quote_items(items, tokens=False):
+    """Quote a batch of request items; returns one dict per item, in order, with a quote_token if tokens"""
+    if len(items) > MAX_BATCH:
+        raise ValueError(f"At most {MAX_BATCH} items per request")
+    parsed = [parse_item(item) for item in items]
+
+    groups = {}
+    for i, (cents, currency, branch_id) in enumerate(parsed):
+        positions, amounts = groups.setdefault((currency, branch_id), ([], []))
+        positions.append(i)
+        amounts.append(cents)
+
+    quotes = [None] * len(parsed)
+    for (currency, branch_id), (positions, amounts) in groups.items():
+        priced = price(amounts, currency, branch_id)
+        rate = priced["rate"]
+        for i, amount, pct, fee, flat, total, foreign in zip(
+                positions, amounts, priced["percents"], priced["fees"], priced["flats"],
+                priced["totals"], priced["foreign"]):
+            quotes[i] = {
+                "amount": format_cents(amount),
+                "currency": currency,
+                "branch_id": branch_id,
+                "rate": rate,
+                "fee_percent": pct,
+                "fee": format_cents(fee),
+                "flat_fee": format_cents(flat),
+                "total": format_cents(total),
+                "amount_foreign": format_cents(foreign),
+            }
+            if tokens:
+                quotes[i]["quote_token"] = issue_token(amount, currency, branch_id, rate, pct, fee, flat)
+    return quotes
+
+
+def _serializer():
+    return URLSafeTimedSerializer(current_app.secret_key, salt="quote-token")
+
+
+def issue_token(cents, currency, branch_id, rate, fee_percent, fee, flat_fee):
+    """Sign one quote (amounts in cents); the token locks its rate and fees for TOKEN_TTL seconds"""
+    locked = {
+        "amount": cents,
+        "currency": currency,
+        "branch_id": branch_id,
+        "rate": rate,
+        "fee_percent": fee_percent,
+        "fee": fee,
+        "flat_fee": flat_fee,
+    }
+    token = _serializer().dumps(locked)
+    quote_store.set(token, locked)
+    return token
+
+
+def redeem(token, cents, currency, branch_id):
+    """
+    The locked quote for a token if it is valid, unexpired and was issued
+    for this amount, currency and branch; otherwise None.
+    """
+    if not token:
+        return None
+    locked = quote_store.get(token)
+    if locked is None:
+        try:
+            locked, signed_at = _serializer().loads(token, max_age=TOKEN_TTL, return_timestamp=True)
+        except BadData:  # tampered, expired or not a token
+            return None
+        if not isinstance(locked, dict):
+            return None
+        quote_store.set(token, locked, ttl=max(TOKEN_TTL - (time.time() - signed_at.timestamp()), 0))
+    wanted = (cents, (currency or "ZAR").upper(), branch_id)
+    if (locked.get("amount"), locked.get("currency"), locked.get("branch_id")) != wanted:
+        return None
+    return locked
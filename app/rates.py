@@ -1,10 +1,18 @@
-import requests
 from datetime import datetime, timedelta
 from flask import current_app
 from .models import db, ExchangeRate, Setting
+from .providers import registry, http_session
 from sqlalchemy import desc, func
 
 
+def _get(url, timeout=5):
+    """GET through the shared keep-alive session, timed as the 'rates' provider"""
+    with registry.timed("rates") as call:
+        response = http_session().get(url, timeout=timeout)
+        call.ok = response.status_code == 200
+    return response
+
+
 def update_usd_zar():
     """
     Fetch latest USD to ZAR rate from an API and update database
@@ -16,7 +24,7 @@ def update_usd_zar():
 
         # API 1: ExchangeRate-API (free tier)
         try:
-            response = requests.get(
+            response = _get(
                 "https://api.exchangerate-api.com/v4/latest/USD",
                 timeout=5
             )
@@ -30,7 +38,7 @@ def update_usd_zar():
 
         # API 2: Frankfurter (free, no API key needed)
         try:
-            response = requests.get(
+            response = _get(
                 "https://api.frankfurter.app/latest?from=USD&to=ZAR",
                 timeout=5
             )
@@ -46,7 +54,7 @@ def update_usd_zar():
         if current_app.config.get('OPENEXCHANGE_API_KEY'):
             try:
                 app_id = current_app.config['OPENEXCHANGE_API_KEY']
-                response = requests.get(
+                response = _get(
                     f"https://openexchangerates.org/api/latest.json?app_id={app_id}&symbols=ZAR",
                     timeout=5
                 )
@@ -62,7 +70,7 @@ def update_usd_zar():
         if current_app.config.get('CURRENCYLAYER_API_KEY'):
             try:
                 access_key = current_app.config['CURRENCYLAYER_API_KEY']
-                response = requests.get(
+                response = _get(
                     f"http://api.currencylayer.com/live?access_key={access_key}&currencies=ZAR&source=USD",
                     timeout=5
                 )
@@ -0,0 +1,159 @@
+# app/replica.py
+"""
+Read-replica routing.
+
+With DATABASE_REPLICA_URL set, views decorated with @read_only run their
+SELECTs on the "replica" bind; everything else, and every flush, uses the
+primary. A read-only view falls back to the primary when:
+
+  * this session already committed a write (read-your-writes),
+  * the browser session wrote within REPLICA_STALENESS_BUDGET seconds
+    (e.g. the dashboard right after create_transaction redirects to it),
+  * the replica lags the primary by more than the budget.
+
+Local testing with two SQLite files:
+
+    DATABASE_URL=sqlite:///primary.db DATABASE_REPLICA_URL=sqlite:///replica.db
+    flask sync-replica     # copy primary.db into replica.db
+"""
+import functools
+import os
+import threading
+import time
+
+from flask import has_request_context, session as browser_session
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event, text
+
+REPLICA_BIND = "replica"
+STALENESS_BUDGET = float(os.environ.get("REPLICA_STALENESS_BUDGET", 5))
+LAG_CHECK_INTERVAL = float(os.environ.get("REPLICA_LAG_CHECK_INTERVAL", 10))
+
+LAST_WRITE_KEY = "_last_write_at"
+
+
+class RoutingSession(Session):
+    """db.session class: sends reads in @read_only views to the replica"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and self.info.get("read_only") and not self._flushing and _replica_usable(self):
+            return self._db.engines[REPLICA_BIND]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+@event.listens_for(RoutingSession, "after_commit")
+def _remember_write(session):
+    # Only commits that flushed something count as writes
+    if not session.info.pop("dirty", False):
+        return
+    session.info["wrote"] = True
+    if has_request_context():
+        browser_session[LAST_WRITE_KEY] = time.time()
+
+
+@event.listens_for(RoutingSession, "after_flush")
+def _mark_dirty(session, flush_context):
+    session.info["dirty"] = True
+
+
+@event.listens_for(RoutingSession, "after_rollback")
+def _forget_flush(session):
+    session.info.pop("dirty", None)
+
+
+def _replica_usable(session):
+    if REPLICA_BIND not in session._db.engines:
+        return False
+    if session.info.get("wrote") or session.info.get("dirty"):
+        return False
+    if has_request_context():
+        last_write = browser_session.get(LAST_WRITE_KEY)
+        if last_write and time.time() - last_write < STALENESS_BUDGET:
+            return False
+    return replica_lag(session._db.engines[REPLICA_BIND]) <= STALENESS_BUDGET
+
+
+def read_engine(db):
+    """Engine for reads outside the ORM session (exports): the replica only when a @read_only view could use it"""
+    if _replica_usable(db.session()):
+        return db.engines[REPLICA_BIND]
+    return db.engine
+
+
+class _LagProbe:
+    """Replica lag in seconds, re-measured at most every LAG_CHECK_INTERVAL"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._value = 0.0
+        self._checked_at = 0.0
+
+    def __call__(self, engine):
+        now = time.monotonic()
+        if now - self._checked_at < LAG_CHECK_INTERVAL:
+            return self._value
+        with self._lock:
+            if now - self._checked_at >= LAG_CHECK_INTERVAL:
+                self._value = self._measure(engine)
+                self._checked_at = now
+        return self._value
+
+    def _measure(self, engine):
+        if engine.dialect.name != "postgresql":
+            # Two SQLite files: the copy is as fresh as the last sync-replica
+            return 0.0
+        try:
+            with engine.connect() as conn:
+                lag = conn.execute(text(
+                    "SELECT CASE WHEN pg_is_in_recovery() "
+                    "THEN COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) "
+                    "ELSE 0 END"
+                )).scalar()
+            return float(lag or 0)
+        except Exception:
+            # Unreachable replica: treat as infinitely stale, the primary serves reads
+            return float("inf")
+
+
+replica_lag = _LagProbe()
+
+
+def read_only(view):
+    """Run a view's reads on the replica (writes still go to the primary)"""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        from . import db
+
+        db.session.info["read_only"] = True
+        try:
+            return view(*args, **kwargs)
+        finally:
+            db.session.info.pop("read_only", None)
+    return wrapper
+
+
+def replica_bind_config():
+    """SQLALCHEMY_BINDS entry for DATABASE_REPLICA_URL, or {}"""
+    url = os.environ.get("DATABASE_REPLICA_URL")
+    if not url:
+        return {}
+    if url.startswith("postgres://"):
+        url = url.replace("postgres://", "postgresql://", 1)
+    if url.startswith("postgresql") and "sslmode" not in url:
+        url += ("&" if "?" in url else "?") + "sslmode=require"
+    return {REPLICA_BIND: url}
+
+
+def sync_sqlite_replica(db):
+    """Copy the primary SQLite file into the replica file (local testing)"""
+    primary = db.engines[None]
+    replica = db.engines[REPLICA_BIND]
+    if primary.dialect.name != "sqlite" or replica.dialect.name != "sqlite":
+        raise RuntimeError("sync-replica only copies SQLite files; use real replication for PostgreSQL")
+    source = primary.raw_connection()
+    target = replica.raw_connection()
+    try:
+        source.driver_connection.backup(target.driver_connection)
+    finally:
+        source.close()
+        target.close()
@@ -0,0 +1,250 @@
+# app/reports.py
+"""
+Cached building blocks for the report pages.
+
+Per-day summaries (transaction count and ZAR total per UTC calendar day)
+are cached per worker. A past day only changes when one of its
+transactions is backdated, edited, deleted or re-timestamped (completing
+a transaction moves it to today). Those writes reopen the day if it was
+closed (app.snapshots) and, like closing a day, bump the
+`reports_changed_at` setting, which is part of every summary cache key,
+so all workers recompute within REPORT_GENERATION_TTL seconds. Past
+days are otherwise cached forever; today is cached for REPORT_TODAY_TTL
+seconds.
+
+Closed days are summarized from day_closes and daily_snapshots; only
+open days read transactions. Pages covering closed periods only are sent
+with an ETag and `Cache-Control: private, max-age=REPORT_CLOSED_MAX_AGE`.
+
+Rows are read a page at a time as plain column tuples, with agent names
+from a cached id -> name map instead of a join.
+"""
+import hashlib
+import os
+from datetime import datetime, time, timedelta
+
+from flask import make_response, request, session
+from sqlalchemy import event, func, inspect, or_, select
+
+from . import db
+from .cache import TTLCache
+from .dbcompat import day_of, period_of
+from .models import DailySnapshot, DayClose, Transaction, User
+from .money import Money
+from .snapshots import closed_window, day_bounds, reopen_days, report_generation
+
+TODAY_TTL = float(os.environ.get("REPORT_TODAY_TTL", 15))
+AGENT_NAMES_TTL = float(os.environ.get("REPORT_AGENT_NAMES_TTL", 60))
+CLOSED_MAX_AGE = int(os.environ.get("REPORT_CLOSED_MAX_AGE", 86400))
+
+# Keyed by (generation, day); stale generations age out through the LRU
+day_summaries = TTLCache("day_summaries", ttl=None, maxsize=4096)
+_agent_names = TTLCache("agent_names", ttl=AGENT_NAMES_TTL, maxsize=1)
+_closed_window = TTLCache("closed_window", ttl=None, maxsize=1)  # keyed by generation
+
+ROW_COLUMNS = (
+    Transaction.transaction_id, Transaction.sender_name, Transaction.sender_phone,
+    Transaction.receiver_name, Transaction.receiver_phone, Transaction.amount_local,
+    Transaction.currency_code, Transaction.status, Transaction.timestamp, Transaction.agent_id,
+)
+
+
+def generation():
+    """Current summary generation: changes whenever a day is closed or reopened"""
+    return report_generation.value()
+
+
+def window():
+    """closed_window() for the current generation (closing or reopening a day bumps it)"""
+    return _closed_window.get_or_set(generation(), closed_window)
+
+
+def summaries(first, last):
+    """{day: {'day', 'count', 'total', 'closed'}} for every day from first to last inclusive"""
+    gen = generation()
+    today = datetime.utcnow().date()
+    days = [first + timedelta(days=i) for i in range((last - first).days + 1)]
+    result = {}
+    missing = []
+    for day in days:
+        cached = day_summaries.get((gen, day))
+        if cached is None:
+            missing.append(day)
+        else:
+            result[day] = cached
+
+    if missing:
+        closes = db.session.execute(select(DayClose).where(DayClose.day.in_(missing))).scalars()
+        for close in closes:
+            result[close.day] = summary = {
+                'day': close.day,
+                'count': close.transaction_count,
+                'total': close.total_local,
+                'closed': True,
+            }
+            day_summaries.set((gen, close.day), summary, ttl=None)
+        missing = [day for day in missing if day not in result]
+
+    if missing:
+        start, _ = day_bounds(missing[0])
+        _, end = day_bounds(missing[-1])
+        bucket = day_of(Transaction.timestamp)
+        rows = db.session.query(
+            bucket.label('day'),
+            func.count(Transaction.id).label('count'),
+            func.coalesce(func.sum(Transaction.amount_local), 0).label('total')
+        ).filter(
+            Transaction.timestamp >= start, Transaction.timestamp < end
+        ).group_by(bucket).all()
+        found = {row.day: row for row in rows}
+        for day in missing:
+            row = found.get(day)
+            summary = {
+                'day': day,
+                'count': row.count if row else 0,
+                'total': row.total if row and row.total else Money.zero(),
+                'closed': False,
+            }
+            day_summaries.set((gen, day), summary, ttl=None if day < today else TODAY_TTL)
+            result[day] = summary
+    return result
+
+
+def period_totals(fmt, label, start=None, end=None):
+    """
+    Totals per 'YYYY' or 'YYYY-MM' period over the days [start, end), newest
+    first, as [{label, 'count', 'total'}]. Closed days come from
+    daily_snapshots and the rest from transactions. Returns (rows, closed):
+    closed is True when every day in the range was closed.
+    """
+    totals = {}
+
+    def add(rows):
+        for period, count, total in rows:
+            entry = totals.setdefault(period, {label: period, 'count': 0, 'total': Money.zero()})
+            entry['count'] += count
+            entry['total'] += total
+
+    live = [Transaction.timestamp >= datetime.combine(start, time.min)] if start else []
+    if end:
+        live.append(Transaction.timestamp < datetime.combine(end, time.min))
+    closed = False
+    span = window()
+    if span:
+        lo, hi = span
+        if start:
+            lo = start if lo is None else max(lo, start)
+        if end:
+            hi = min(hi, end)
+        if lo is None or lo < hi:
+            snapshot_days = [DailySnapshot.day < hi]
+            outside = [Transaction.timestamp >= datetime.combine(hi, time.min)]
+            if lo is not None:
+                snapshot_days.append(DailySnapshot.day >= lo)
+                outside.append(Transaction.timestamp < datetime.combine(lo, time.min))
+            bucket = period_of(DailySnapshot.day, fmt)
+            add(db.session.query(
+                bucket,
+                func.sum(DailySnapshot.transaction_count),
+                func.coalesce(func.sum(DailySnapshot.total_local), 0)
+            ).filter(*snapshot_days).group_by(bucket).all())
+            closed = (lo, hi) == (start, end)
+            live.append(or_(*outside))
+
+    if not closed:
+        bucket = period_of(Transaction.timestamp, fmt)
+        add(db.session.query(
+            bucket,
+            func.count(Transaction.id),
+            func.coalesce(func.sum(Transaction.amount_local), 0)
+        ).filter(*live).group_by(bucket).all())
+
+    return sorted(totals.values(), key=lambda entry: entry[label], reverse=True), closed
+
+
+def available_years():
+    """'YYYY' strings from the newest transaction's year down to the oldest's"""
+    first, last = db.session.execute(
+        select(func.min(Transaction.timestamp), func.max(Transaction.timestamp))).first()
+    if first is None:
+        return []
+    return [str(year) for year in range(last.year, first.year - 1, -1)]
+
+
+def closed_response(render, *parts):
+    """
+    Response for a page that only shows closed periods: cacheable by the
+    browser, and a 304 without rendering when its ETag still matches.
+    """
+    if session.get('_flashes'):
+        return make_response(render())  # one-off messages must not be cached
+    key = (request.full_path, session.get('user_id'), generation(), window()) + parts
+    etag = hashlib.sha1(repr(key).encode()).hexdigest()
+    if request.if_none_match.contains_weak(etag):
+        response = make_response("", 304)
+    else:
+        response = make_response(render())
+    response.set_etag(etag, weak=True)  # the same page, whichever encoding app.compression picked
+    response.headers['Cache-Control'] = f'private, max-age={CLOSED_MAX_AGE}'
+    return response
+
+
+def day_rows(day, page=1, per_page=50):
+    """One page of a day's transactions, newest first. Returns (rows, has_next)."""
+    start, end = day_bounds(day)
+    page = max(page, 1)
+    rows = db.session.execute(
+        select(*ROW_COLUMNS)
+        .where(Transaction.timestamp >= start, Transaction.timestamp < end)
+        .order_by(Transaction.timestamp.desc(), Transaction.id.desc())
+        .limit(per_page + 1).offset((page - 1) * per_page)
+    ).all()
+    return rows[:per_page], len(rows) > per_page
+
+
+def agent_names():
+    """{user id: full name}, cached for AGENT_NAMES_TTL seconds"""
+    return _agent_names.get_or_set("all", lambda: dict(db.session.execute(select(User.id, User.full_name)).all()))
+
+
+@event.listens_for(User, "after_insert")
+@event.listens_for(User, "after_update")
+def _user_changed(mapper, connection, target):
+    _agent_names.clear()
+
+
+def _past_days_changed(connection, days):
+    """Reopen the past days a write touched; every worker drops their cached summaries"""
+    today = datetime.utcnow().date()
+    days = [day for day in days if day < today]
+    if not days:
+        return
+    reopen_days(connection, days)
+
+
+def _days(values):
+    return {value.date() for value in values if value is not None}
+
+
+@event.listens_for(Transaction, "after_insert")
+@event.listens_for(Transaction, "after_delete")
+def _transaction_added_or_deleted(mapper, connection, target):
+    _past_days_changed(connection, _days([target.timestamp]))
+
+
+# Columns daily_snapshots groups by or sums: changing any of them changes a closed day
+SNAPSHOT_COLUMNS = ("timestamp", "agent_id", "branch_id", "currency_code", "amount_local", "amount_foreign")
+
+
+def _changed(history):
+    """A real change: assigning the value an attribute already had is not one"""
+    return history.has_changes() and list(history.deleted or ()) != list(history.added or ())
+
+
+@event.listens_for(Transaction, "after_update")
+def _transaction_updated(mapper, connection, target):
+    attrs = inspect(target).attrs
+    if not any(_changed(getattr(attrs, name).history) for name in SNAPSHOT_COLUMNS):
+        return
+    # Both the day it left (old timestamp) and the day it is on now
+    _past_days_changed(connection, _days(list(attrs.timestamp.history.deleted or ()) + [target.timestamp]))
@@ -3,6 +3,7 @@ from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.interval import IntervalTrigger
 from flask import Flask
 import atexit
+from datetime import datetime
 
 scheduler = BackgroundScheduler()
 
@@ -28,7 +29,47 @@ def schedule_rate_updates(app):
         replace_existing=True
     )
 
+    schedule_day_close(app)
+    schedule_fanout(app)
+
     scheduler.start()
 
     # Shut down scheduler when app exits
-    atexit.register(lambda: scheduler.shutdown())
\ No newline at end of file
+    atexit.register(lambda: scheduler.shutdown())
+
+
+def schedule_day_close(app):
+    """Close finished days hourly, so reopened days are re-closed within the hour"""
+    from .snapshots import close_open_days
+
+    def close_job():
+        with app.app_context():
+            close_open_days()
+
+    scheduler.add_job(
+        func=close_job,
+        trigger=IntervalTrigger(hours=1),
+        id='day_close_job',
+        name='Close finished reporting days',
+        next_run_time=datetime.now(),
+        replace_existing=True
+    )
+
+
+def schedule_fanout(app):
+    """Send agents one digest of newly available transactions per window"""
+    from .fanout import WINDOW_SECONDS, flush
+
+    def fanout_job():
+        with app.app_context():
+            flush()
+
+    scheduler.add_job(
+        func=fanout_job,
+        trigger=IntervalTrigger(seconds=WINDOW_SECONDS),
+        id='fanout_job',
+        name='Per-agent digests of available transactions',
+        max_instances=1,
+        coalesce=True,
+        replace_existing=True
+    )
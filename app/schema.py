@@ -0,0 +1,57 @@
+# app/schema.py
+import hashlib
+
+from sqlalchemy import text
+
+from . import db
+
+FINGERPRINT_KEY = "schema_fingerprint"
+
+
+def schema_fingerprint():
+    """Stable hash of the tables/columns declared in models.py"""
+    parts = []
+    for table in sorted(db.metadata.tables.values(), key=lambda t: t.name):
+        for col in table.columns:
+            parts.append(f"{table.name}.{col.name}:{col.type.__class__.__name__}:{col.nullable}")
+        for index in sorted(table.indexes, key=lambda i: i.name or ""):
+            parts.append(f"{table.name}#{index.name}")
+    return hashlib.sha256("\n".join(parts).encode()).hexdigest()[:16]
+
+
+def stored_fingerprint():
+    """Fingerprint recorded by the last create_all(), or None"""
+    try:
+        row = db.session.execute(
+            text("SELECT value FROM settings WHERE key = :key"),
+            {"key": FINGERPRINT_KEY}
+        ).first()
+        return row[0] if row else None
+    except Exception:
+        # settings table missing on a brand new database
+        db.session.rollback()
+        return None
+
+
+def ensure_schema():
+    """
+    Run db.create_all() only when models changed since the last boot.
+
+    Costs a single primary-key lookup on the settings table when the
+    schema is current, instead of one reflection query per table.
+    Returns True if create_all() ran.
+    """
+    from .models import Setting
+
+    current = schema_fingerprint()
+    if stored_fingerprint() == current:
+        return False
+
+    db.create_all()
+    setting = Setting.query.get(FINGERPRINT_KEY)
+    if setting:
+        setting.value = current
+    else:
+        db.session.add(Setting(key=FINGERPRINT_KEY, value=current))
+    db.session.commit()
+    return True
@@ -0,0 +1,194 @@
+# app/search.py
+"""
+Partial-match search over transactions: sender/receiver names and phones
+and transaction id fragments.
+
+PostgreSQL: a pg_trgm GIN index on one lower-cased search document, so
+`LIKE '%frag%'` is an index scan and results rank by word_similarity().
+SQLite: an FTS5 table with the trigram tokenizer kept in sync by
+triggers, ranked by bm25().
+
+Terms shorter than 3 characters can't use a trigram index and fall back
+to a plain LIKE scan. Build the indexes with `flask search-index`.
+"""
+import re
+
+from sqlalchemy import Float, Integer, and_, case, func, inspect, literal_column, or_, text
+
+from . import db
+from .models import Transaction
+
+MIN_TRIGRAM = 3
+# FTS5: rank only the most recent matches of very common fragments
+RANK_WINDOW = 2000
+FTS_TABLE = "transactions_fts"
+PG_INDEX = "ix_transactions_search_trgm"
+
+# Must match the indexed expression character for character
+SEARCH_DOC_SQL = (
+    "lower(transaction_id || ' ' || sender_name || ' ' || receiver_name || ' ' "
+    "|| coalesce(sender_phone, '') || ' ' || coalesce(receiver_phone, ''))"
+)
+SEARCH_COLUMNS = ("transaction_id", "sender_name", "receiver_name", "sender_phone", "receiver_phone")
+
+_fts_available = None
+
+
+def create_search_index():
+    """Create the search index for the current dialect (idempotent). Returns the index name."""
+    engine = db.engine
+    if engine.dialect.name == "postgresql":
+        # CONCURRENTLY can't run inside a transaction block
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+            conn.execute(text(
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {PG_INDEX} "
+                f"ON transactions USING gin (({SEARCH_DOC_SQL}) gin_trgm_ops)"
+            ))
+        return PG_INDEX
+
+    if engine.dialect.name == "sqlite":
+        global _fts_available
+        cols = ", ".join(SEARCH_COLUMNS)
+        new = ", ".join(f"new.{c}" for c in SEARCH_COLUMNS)
+        old = ", ".join(f"old.{c}" for c in SEARCH_COLUMNS)
+        with engine.begin() as conn:
+            exists = inspect(conn).has_table(FTS_TABLE)
+            conn.execute(text(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+                f"{cols}, content='transactions', content_rowid='id', tokenize='trigram')"
+            ))
+            conn.execute(text(
+                f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON transactions BEGIN "
+                f"INSERT INTO {FTS_TABLE}(rowid, {cols}) VALUES (new.id, {new}); END"
+            ))
+            conn.execute(text(
+                f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON transactions BEGIN "
+                f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {cols}) VALUES ('delete', old.id, {old}); END"
+            ))
+            conn.execute(text(
+                f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF {cols} ON transactions BEGIN "
+                f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {cols}) VALUES ('delete', old.id, {old}); "
+                f"INSERT INTO {FTS_TABLE}(rowid, {cols}) VALUES (new.id, {new}); END"
+            ))
+            if not exists:
+                conn.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+        _fts_available = True
+        return FTS_TABLE
+
+    return None
+
+
+def _has_fts():
+    global _fts_available
+    if _fts_available is None:
+        _fts_available = inspect(db.engine).has_table(FTS_TABLE)
+    return _fts_available
+
+
+def search_terms(q):
+    """Split a query into lower-cased terms; a phone number stays one term"""
+    q = (q or "").strip().lower()
+    if not q:
+        return []
+    compact = re.sub(r"[\s\-()]", "", q)
+    if re.fullmatch(r"\+?\d+", compact):
+        return [compact.lstrip("+")]
+    return [t for t in q.split() if t]
+
+
+def _like(term):
+    escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def _scan_filter(terms):
+    """Unindexed fallback: every term must appear in one of the columns"""
+    return and_(*[
+        or_(*[func.lower(getattr(Transaction, c)).like(_like(t), escape="\\") for c in SEARCH_COLUMNS])
+        for t in terms
+    ])
+
+
+def _exact_txid_first(q):
+    txid = q.strip().upper()
+    if not txid.startswith("ISA-"):
+        txid = "ISA-" + txid
+    return case((Transaction.transaction_id == txid, 0), else_=1)
+
+
+def build_search_query(q, status=None, use_index=True, candidates=None):
+    """
+    Transaction query filtered and ranked for `q` (most relevant first).
+
+    On SQLite, `candidates` (rows the caller will page through) bounds the
+    FTS5 scan to the newest max(RANK_WINDOW, candidates) matches, walked in
+    rowid order, so a fragment that matches most of the table doesn't
+    compute bm25() for every row.
+    """
+    terms = search_terms(q)
+    query = Transaction.query
+    if status:
+        query = query.filter(Transaction.status == status)
+    if not terms:
+        return query.order_by(Transaction.timestamp.desc())
+
+    indexed = use_index and all(len(t) >= MIN_TRIGRAM for t in terms)
+    dialect = db.engine.dialect.name
+
+    if indexed and dialect == "postgresql":
+        doc = literal_column(SEARCH_DOC_SQL)
+        query = query.filter(and_(*[doc.like(_like(t), escape="\\") for t in terms]))
+        return query.order_by(
+            _exact_txid_first(q),
+            func.word_similarity(" ".join(terms), doc).desc(),
+            Transaction.timestamp.desc(),
+        )
+
+    if indexed and dialect == "sqlite" and _has_fts():
+        # Each term is a quoted trigram phrase; FTS5 ANDs them
+        match = " ".join('"' + t.replace('"', '""') + '"' for t in terms)
+        sql = f"SELECT rowid AS id, rank FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :match"
+        params = {"match": match}
+        if candidates and not status:
+            sql += " ORDER BY rowid DESC LIMIT :window"
+            params["window"] = max(RANK_WINDOW, candidates)
+        hits = text(sql).bindparams(**params).columns(id=Integer, rank=Float).subquery("hits")
+        query = query.join(hits, hits.c.id == Transaction.id)
+        return query.order_by(_exact_txid_first(q), hits.c.rank, Transaction.timestamp.desc())
+
+    return query.filter(_scan_filter(terms)).order_by(_exact_txid_first(q), Transaction.timestamp.desc())
+
+
+def search_transactions(q, status=None, page=1, per_page=50, use_index=True):
+    """
+    One page of ranked results: (transactions, has_next).
+    Fetches per_page + 1 rows instead of counting every match.
+    """
+    page = max(int(page or 1), 1)
+    rows = (build_search_query(q, status, use_index, candidates=page * per_page + 1)
+            .limit(per_page + 1)
+            .offset((page - 1) * per_page)
+            .all())
+    return rows[:per_page], len(rows) > per_page
+
+
+def autocomplete(q, limit=10):
+    """Compact dicts for the search-as-you-type dropdown"""
+    if len((q or "").strip()) < 2:
+        return []
+    rows, _ = search_transactions(q, per_page=limit)
+    return [
+        {
+            "transaction_id": tx.transaction_id,
+            "sender_name": tx.sender_name,
+            "sender_phone": tx.sender_phone,
+            "receiver_name": tx.receiver_name,
+            "receiver_phone": tx.receiver_phone,
+            "amount_local": float(tx.amount_local),
+            "currency_code": tx.currency_code,
+            "status": tx.status,
+            "timestamp": tx.timestamp.isoformat() if tx.timestamp else None,
+        }
+        for tx in rows
+    ]
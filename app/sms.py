@@ -6,43 +6,33 @@ from flask import current_app
 logger = logging.getLogger(__name__)
 
 
-from twilio_sms_service import TwilioSMSService
+from .aws_sns import send_transaction_notification
+from .providers import registry
+from .phones import to_e164
+
+
+def get_sms_service():
+    """Pooled Twilio service, created on first send (see app.providers)"""
+    return registry.get("twilio")
 
-service = TwilioSMSService()
 
 def send_sms(to_number: str, message: str):
     """
     Signature unchanged. Drop-in replacement for ClickSend.
     """
-    return service.send_sms(to_number, message)
+    with registry.timed("twilio") as call:
+        result = get_sms_service().send_sms(to_number, message)
+        call.ok = bool(result.get("success"))
+    return result
 
 def clean_phone_number(phone: str) -> str:
     """
-    Clean and format phone number for ClickSend
-
-    Args:
-        phone: Raw phone number
-
-    Returns:
-        str: Cleaned phone number with country code
+    Phone number in E.164 for display in SMS text (see app/phones.py).
+    Numbers that can't be normalized are returned unchanged.
     """
     if not phone:
         return ""
-
-    # Remove all non-digit characters
-    cleaned = ''.join(filter(str.isdigit, phone))
-
-    # Handle South African numbers
-    if cleaned.startswith('0'):
-        cleaned = '27' + cleaned[1:]  # Replace leading 0 with 27
-    elif not cleaned.startswith('27') and len(cleaned) == 9:
-        cleaned = '27' + cleaned  # Add 27 prefix for 9-digit numbers
-
-    # Add + prefix for international format
-    if cleaned and not cleaned.startswith('+'):
-        cleaned = '+' + cleaned
-
-    return cleaned
+    return to_e164(phone) or phone
 
 
 def build_sms_template(
@@ -114,7 +104,7 @@ def send_transaction_sms_notification(transaction, agent_name=None):
 
     # Get agent name if not provided
     if not agent_name and transaction.agent_id:
-        from models import User
+        from .models import User
         agent = User.query.get(transaction.agent_id)
         agent_name = agent.full_name if agent else f"Agent #{transaction.agent_id}"
 
@@ -131,13 +121,13 @@ def send_transaction_sms_notification(transaction, agent_name=None):
     )
 
     # Send SMS
-    sms_result = send_sms(transaction.receiver_phone, sms_message)
+    sms_result = send_sms(transaction.receiver_phone_e164 or transaction.receiver_phone, sms_message)
 
     # Send SNS notification about SMS
     try:
         if sms_result.get("success"):
             # Send success notification to SNS
-            sms_notification_id = sns_client.send_transaction_notification(
+            sms_notification_id = send_transaction_notification(
                 transaction=transaction,
                 action='sms_sent_success',
                 agent_id=transaction.agent_id,
@@ -146,7 +136,7 @@ def send_transaction_sms_notification(transaction, agent_name=None):
             logger.info(f"✅ SMS success SNS notification: {sms_notification_id}")
         else:
             # Send failure notification to SNS
-            sms_notification_id = sns_client.send_transaction_notification(
+            sms_notification_id = send_transaction_notification(
                 transaction=transaction,
                 action='sms_sent_failed',
                 agent_id=transaction.agent_id,
@@ -0,0 +1,167 @@
+# app/snapshots.py
+"""
+End-of-day close: freezes a past day's transaction totals per agent,
+branch and currency (daily_snapshots) plus the closing dollar balance
+(day_closes), so reports on closed periods never scan transactions.
+
+    flask close-day                        # every past day not closed yet
+    flask close-day 2026-10-18
+    flask close-day 2026-10-18 --reopen
+
+The scheduler runs close_open_days() every hour. A write that lands on a
+closed day (a backdated insert, an edit, a delete, or completing an old
+transaction, which moves it to today) reopens that day in the same
+database transaction (see app.reports); the next close freezes it again.
+"""
+import os
+from datetime import datetime, time, timedelta
+
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError
+
+from . import db
+from .cache import SettingStamp
+from .models import DailySnapshot, DayClose, DollarBalance, DollarBalanceLog, Transaction
+from .money import Money
+
+# Bumped whenever closed or past-day totals change; part of app.reports' cache keys
+report_generation = SettingStamp("reports_changed_at", ttl=float(os.environ.get("REPORT_GENERATION_TTL", 5)))
+
+
+def day_bounds(day):
+    """[start, end) datetimes of a calendar day: a range the timestamp index can serve"""
+    start = datetime.combine(day, time.min)
+    return start, start + timedelta(days=1)
+
+
+def closing_balance(day):
+    """Dollar balance at the end of day, from dollar_balance_logs"""
+    _, end = day_bounds(day)
+    log = DollarBalanceLog
+    balance = db.session.execute(
+        select(log.new_balance).where(log.timestamp < end)
+        .order_by(log.timestamp.desc(), log.id.desc()).limit(1)
+    ).scalar()
+    if balance is None:
+        # Nothing logged by then: the balance before the next change, else today's
+        balance = db.session.execute(
+            select(log.previous_balance).where(log.timestamp >= end)
+            .order_by(log.timestamp, log.id).limit(1)
+        ).scalar()
+    if balance is None:
+        balance = db.session.execute(select(DollarBalance.current_balance).limit(1)).scalar()
+    return balance if balance is not None else Money.zero()
+
+
+def close_day(day, closed_by=None):
+    """Freeze one past day; closing it again replaces the snapshot. Returns the DayClose."""
+    if day >= datetime.utcnow().date():
+        raise ValueError(f"{day} is still open: only past days can be closed")
+
+    # Claim the day before touching daily_snapshots: a concurrent close either
+    # waits on the locked day_closes row (then replaces this close's rows) or
+    # fails inserting it with IntegrityError, never interleaving its snapshot
+    close = db.session.execute(
+        select(DayClose).where(DayClose.day == day).with_for_update()
+        .execution_options(populate_existing=True)
+    ).scalar()
+    if close is None:
+        close = DayClose(day=day)
+        db.session.add(close)
+        db.session.flush()
+
+    start, end = day_bounds(day)
+    rows = db.session.execute(
+        select(
+            Transaction.agent_id, Transaction.branch_id, Transaction.currency_code,
+            func.count(Transaction.id).label('count'),
+            func.coalesce(func.sum(Transaction.amount_local), 0).label('total_local'),
+            func.coalesce(func.sum(Transaction.amount_foreign), 0).label('total_foreign'),
+        ).where(
+            Transaction.timestamp >= start, Transaction.timestamp < end
+        ).group_by(Transaction.agent_id, Transaction.branch_id, Transaction.currency_code)
+    ).all()
+
+    db.session.execute(DailySnapshot.__table__.delete().where(DailySnapshot.day == day))
+    db.session.add_all(
+        DailySnapshot(day=day, agent_id=row.agent_id, branch_id=row.branch_id, currency_code=row.currency_code,
+                      transaction_count=row.count, total_local=row.total_local, total_foreign=row.total_foreign)
+        for row in rows
+    )
+
+    close.transaction_count = sum(row.count for row in rows)
+    close.total_local = sum((row.total_local for row in rows), Money.zero())
+    close.total_foreign = sum((row.total_foreign for row in rows), Money.zero())
+    close.closing_dollar_balance = closing_balance(day)
+    close.closed_at = datetime.utcnow()
+    close.closed_by = closed_by
+    report_generation.bump(db.session.connection())
+    db.session.commit()
+    return close
+
+
+def open_days():
+    """Past days since the first transaction that aren't closed, oldest first"""
+    first = db.session.execute(select(func.min(Transaction.timestamp))).scalar()
+    if first is None:
+        return []
+    day = first.date()
+    closed = set(db.session.execute(select(DayClose.day).where(DayClose.day >= day)).scalars())
+    yesterday = datetime.utcnow().date() - timedelta(days=1)
+    days = []
+    while day <= yesterday:
+        if day not in closed:
+            days.append(day)
+        day += timedelta(days=1)
+    return days
+
+
+def close_open_days(closed_by=None, limit=None):
+    """Close every open past day (at most limit of them). Returns the days closed."""
+    closed = []
+    for day in open_days()[:limit]:
+        try:
+            close_day(day, closed_by)
+        except IntegrityError:
+            db.session.rollback()  # another process closed it first
+            continue
+        closed.append(day)
+    return closed
+
+
+def reopen_days(connection, days):
+    """Drop the close of each day; runs on the caller's connection and transaction"""
+    days = list(days)
+    if not days:
+        return
+    closes = DayClose.__table__
+    if connection.execute(closes.delete().where(closes.c.day.in_(days))).rowcount:
+        # Snapshot rows are only read for closed days: skip this when none were
+        connection.execute(DailySnapshot.__table__.delete().where(DailySnapshot.__table__.c.day.in_(days)))
+    report_generation.bump(connection)
+
+
+def closed_window():
+    """
+    [first, end) of the unbroken run of closed days starting at the earliest
+    close, or None. first is None when no transaction predates it.
+    """
+    days = db.session.execute(select(DayClose.day).order_by(DayClose.day)).scalars().all()
+    if not days:
+        return None
+    end = first = days[0]
+    for day in days:
+        if day != end:
+            break
+        end += timedelta(days=1)
+    earlier = db.session.execute(
+        select(Transaction.id).where(Transaction.timestamp < datetime.combine(first, time.min)).limit(1)
+    ).first()
+    return (first if earlier else None), end
+
+
+def day_breakdown(day):
+    """A closed day's snapshot rows, largest total first"""
+    return db.session.execute(
+        select(DailySnapshot).where(DailySnapshot.day == day).order_by(DailySnapshot.total_local.desc())
+    ).scalars().all()
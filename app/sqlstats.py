@@ -0,0 +1,191 @@
+# app/sqlstats.py
+"""
+Per-request SQL statement counting and timing.
+
+Every statement run during a request is counted and timed through the
+SQLAlchemy cursor events. The totals go out in a Server-Timing header
+(visible in the browser dev tools), the last requests are kept for
+/admin/api/sql-stats, and a statement repeated N_PLUS_ONE_THRESHOLD or
+more times in one request is logged as a likely N+1.
+
+QUERY_BUDGETS caps the statements a hot route may issue. They are
+benchmark limits only: benchmarks/bench_routes.py fails when a route goes
+over its budget, while production requests are counted but never checked.
+A change that needs a route to issue more statements raises its budget in
+the same commit, with the reason next to the number.
+
+Disable with SQL_STATS=false.
+"""
+import os
+import threading
+import time
+from collections import deque, defaultdict
+
+from flask import g, has_app_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+N_PLUS_ONE_THRESHOLD = int(os.environ.get("SQL_N_PLUS_ONE_THRESHOLD", 5))
+RECENT_REQUESTS = 200
+
+# endpoint -> max statements per request in bench_routes (not enforced at runtime)
+QUERY_BUDGETS = {
+    "agent.dashboard": 3,
+    "agent.available_transactions": 3,
+    "agent.view_transaction": 2,
+    "agent.pick_transaction": 6,  # + reopening the old day the pick moves the transaction from
+    "agent.complete_transaction": 10,  # + reopening the old day completion moves the transaction from
+    "admin.dashboard": 8,
+    "admin.transactions": 3,
+    "admin.view_transaction": 2,
+    # + customer upserts for sender and receiver; + one reload of the committed
+    # transaction for each SNS message built from it (assigned, SMS sent)
+    "admin.create_transaction": 15,
+    "admin.reports_main": 5,
+    "admin.reports_daily": 5,
+    "admin.reports_monthly": 4,
+    "admin.reports_yearly": 4,
+    "admin.dashboard_balance": 2,
+    "admin.get_dollar_balance": 3,
+}
+
+
+class RequestQueries:
+    """Statements seen during one request"""
+    __slots__ = ("count", "total_s", "statements")
+
+    def __init__(self):
+        self.count = 0
+        self.total_s = 0.0
+        self.statements = defaultdict(lambda: [0, 0.0])  # sql -> [count, seconds]
+
+    def record(self, statement, seconds):
+        self.count += 1
+        self.total_s += seconds
+        entry = self.statements[statement]
+        entry[0] += 1
+        entry[1] += seconds
+
+    def repeated(self, threshold=N_PLUS_ONE_THRESHOLD):
+        """Statements executed at least `threshold` times (likely N+1)"""
+        return sorted(
+            ((sql, n, s) for sql, (n, s) in self.statements.items() if n >= threshold),
+            key=lambda row: -row[1]
+        )
+
+    def report(self, endpoint, status):
+        return {
+            "endpoint": endpoint,
+            "status": status,
+            "queries": self.count,
+            "db_ms": round(self.total_s * 1000, 2),
+            "repeated": [
+                {"sql": sql[:300], "count": n, "ms": round(s * 1000, 2)}
+                for sql, n, s in self.repeated()
+            ],
+        }
+
+
+class SQLStats:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._recent = deque(maxlen=RECENT_REQUESTS)
+        self._by_endpoint = {}
+        self.enabled = False
+
+    def _current(self):
+        if not has_app_context():
+            return None
+        return g.get("_sql_queries")
+
+    # --- engine events (registered once, for every engine) ---
+
+    def _before_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if context is not None and self._current() is not None:
+            context._sqlstats_start = time.perf_counter()
+
+    def _after_execute(self, conn, cursor, statement, parameters, context, executemany):
+        queries = self._current()
+        started = getattr(context, "_sqlstats_start", None)
+        if queries is not None and started is not None:
+            queries.record(statement, time.perf_counter() - started)
+
+    # --- request hooks ---
+
+    def _start_request(self):
+        g._sql_queries = RequestQueries()
+
+    def _finish_request(self, response):
+        queries = g.pop("_sql_queries", None)
+        if queries is None:
+            return response
+        endpoint = request.endpoint or request.path
+        report = queries.report(endpoint, response.status_code)
+
+        response.headers.add(
+            "Server-Timing", f'db;dur={report["db_ms"]};desc="{queries.count} queries"'
+        )
+        if report["repeated"]:
+            top = report["repeated"][0]
+            from flask import current_app
+            current_app.logger.warning(
+                f"Possible N+1 in {endpoint}: {top['count']}x {top['sql'][:120]}"
+            )
+
+        with self._lock:
+            self._recent.append(report)
+            agg = self._by_endpoint.setdefault(endpoint, {"requests": 0, "queries": 0, "max_queries": 0,
+                                                           "db_ms": 0.0})
+            agg["requests"] += 1
+            agg["queries"] += queries.count
+            agg["db_ms"] += report["db_ms"]
+            agg["max_queries"] = max(agg["max_queries"], queries.count)
+        return response
+
+    # --- reading ---
+
+    def recent(self, limit=50):
+        with self._lock:
+            return list(self._recent)[-limit:]
+
+    def last(self):
+        with self._lock:
+            return self._recent[-1] if self._recent else None
+
+    def by_endpoint(self):
+        with self._lock:
+            result = {}
+            for endpoint, agg in self._by_endpoint.items():
+                result[endpoint] = {
+                    "requests": agg["requests"],
+                    "avg_queries": round(agg["queries"] / agg["requests"], 2),
+                    "max_queries": agg["max_queries"],
+                    "avg_db_ms": round(agg["db_ms"] / agg["requests"], 2),
+                    "budget": QUERY_BUDGETS.get(endpoint),
+                }
+            return result
+
+    def reset(self):
+        with self._lock:
+            self._recent.clear()
+            self._by_endpoint = {}
+
+    def init_app(self, app):
+        if not self.enabled:
+            event.listen(Engine, "before_cursor_execute", self._before_execute)
+            event.listen(Engine, "after_cursor_execute", self._after_execute)
+            self.enabled = True
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+
+
+def over_budget(endpoint, queries):
+    """Message when `queries` exceeds the endpoint's budget, else None"""
+    budget = QUERY_BUDGETS.get(endpoint)
+    if budget is not None and queries > budget:
+        return f"{endpoint}: {queries} queries, budget {budget}"
+    return None
+
+
+sql_stats = SQLStats()
@@ -0,0 +1,62 @@
+// customer_autocomplete.js - fill sender/receiver name and phone from the customer directory
+//
+// Inputs opt in with data-customer-party="sender|receiver" and
+// data-customer-field="name|phone"; the form carries data-customer-url.
+(function () {
+    const form = document.querySelector('[data-customer-url]');
+    if (!form) return;
+    const url = form.dataset.customerUrl;
+
+    function fieldsFor(party) {
+        return {
+            name: form.querySelector(`[data-customer-party="${party}"][data-customer-field="name"]`),
+            phone: form.querySelector(`[data-customer-party="${party}"][data-customer-field="phone"]`)
+        };
+    }
+
+    form.querySelectorAll('[data-customer-party]').forEach(function (input) {
+        const menu = document.createElement('div');
+        menu.className = 'list-group position-absolute shadow-sm d-none';
+        menu.style.zIndex = 1050;
+        input.parentNode.style.position = 'relative';
+        input.parentNode.appendChild(menu);
+        input.setAttribute('autocomplete', 'off');
+
+        let timer = null;
+        let seq = 0;
+
+        input.addEventListener('input', function () {
+            clearTimeout(timer);
+            const q = input.value.trim();
+            if (q.length < 2) { menu.classList.add('d-none'); return; }
+            timer = setTimeout(function () {
+                const mine = ++seq;
+                fetch(url + '?q=' + encodeURIComponent(q))
+                    .then(r => r.json())
+                    .then(data => {
+                        if (mine !== seq) return; // a newer keystroke won
+                        menu.innerHTML = '';
+                        (data.customers || []).forEach(function (c) {
+                            const item = document.createElement('button');
+                            item.type = 'button';
+                            item.className = 'list-group-item list-group-item-action py-1 small';
+                            item.textContent = c.name + ' · ' + c.phone;
+                            item.addEventListener('mousedown', function (e) {
+                                e.preventDefault();
+                                const fields = fieldsFor(input.dataset.customerParty);
+                                if (fields.name) fields.name.value = c.name;
+                                if (fields.phone) {
+                                    fields.phone.value = c.phone;
+                                    fields.phone.dispatchEvent(new Event('change'));
+                                }
+                                menu.classList.add('d-none');
+                            });
+                            menu.appendChild(item);
+                        });
+                        menu.classList.toggle('d-none', menu.children.length === 0);
+                    });
+            }, 150);
+        });
+        input.addEventListener('blur', function () { menu.classList.add('d-none'); });
+    });
+})();
@@ -1,23 +1,32 @@
 # twilio_sms_service.py
 
 import os
-from twilio.rest import Client
+
+from .phones import is_e164, to_e164
 
 class TwilioSMSService:
     """Emergency Twilio SMS replacement"""
 
-    def __init__(self):
+    def __init__(self, http_client=None):
+        # Imported here: twilio.rest is slow to import and only needed
+        # once the first SMS goes out
+        from twilio.rest import Client
+
+        # http_client: pooled TwilioHttpClient from app.providers
         self.client = Client(
             os.getenv("TWILIO_ACCOUNT_SID"),
-            os.getenv("TWILIO_AUTH_TOKEN")
+            os.getenv("TWILIO_AUTH_TOKEN"),
+            http_client=http_client
         )
         self.sms_number = os.getenv("TWILIO_SMS_NUMBER")
+        self.http_session = getattr(http_client, "session", None)
 
     def send_sms(self, to_number: str, message: str) -> dict:
         """Drop-in replacement for old send_sms"""
         try:
-            # Normalize South African numbers to E.164
-            to_number = self.normalize_number(to_number)
+            # Callers pass the stored *_phone_e164 value; only raw input is re-parsed
+            if not is_e164(to_number):
+                to_number = self.normalize_number(to_number)
 
             msg = self.client.messages.create(
                 body=message,
@@ -39,11 +48,7 @@ class TwilioSMSService:
 
     @staticmethod
     def normalize_number(number: str) -> str:
-        number = number.strip().replace(" ", "")
-        if number.startswith("0"):
-            return "+27" + number[1:]
-        if number.startswith("27"):
-            return "+" + number
-        if number.startswith("+"):
-            return number
-        raise ValueError(f"Invalid phone number format: {number}")
+        normalized = to_e164(number)
+        if not normalized:
+            raise ValueError(f"Invalid phone number format: {number}")
+        return normalized
@@ -2,11 +2,15 @@ import os
 from flask import g, session, redirect
 from functools import wraps
 from datetime import datetime, timedelta
-import requests
+
+from sqlalchemy import event, inspect, select
 
 # Remove SQLite imports and add SQLAlchemy
 from . import db
+from .cache import SettingStamp, TTLCache
 from .models import Setting, ExchangeRate, DollarBalance, User
+from .money import Money
+from .providers import registry, http_session
 
 
 def get_current_user():
@@ -31,6 +35,50 @@ def require_role(role):
     return decorator
 
 
+# Bumped when a user is added, deleted or changes role; keys the cached roles
+users_changed = SettingStamp("users_changed_at", ttl=float(os.environ.get("USER_ROLE_CHECK_SECONDS", 5)))
+user_roles = TTLCache("user_roles", ttl=3600, maxsize=4096)
+
+
+def cached_role(user_id):
+    """The user's current role, or None if deleted; re-read after users_changed is bumped"""
+    return user_roles.get_or_set(
+        (users_changed.value(), user_id),
+        lambda: db.session.execute(select(User.role).where(User.id == user_id)).scalar())
+
+
+def require_session_role(role):
+    """
+    require_role for hot paths: the session's role must match and still be
+    the user's role in the database, read from a per-worker cache instead of
+    a user lookup per request. A demotion or deletion takes effect within
+    USER_ROLE_CHECK_SECONDS.
+    """
+    def decorator(f):
+        @wraps(f)
+        def wrapped(*args, **kwargs):
+            user_id = session.get('user_id')
+            if not user_id or session.get('role') != role or cached_role(user_id) != role:
+                return redirect("/login")
+            return f(*args, **kwargs)
+
+        return wrapped
+
+    return decorator
+
+
+@event.listens_for(User, "after_insert")
+@event.listens_for(User, "after_delete")
+def _user_added_or_removed(mapper, connection, target):
+    users_changed.bump(connection)
+
+
+@event.listens_for(User, "after_update")
+def _user_changed(mapper, connection, target):
+    if inspect(target).attrs.role.history.has_changes():
+        users_changed.bump(connection)
+
+
 # --- settings & rate helpers ---
 
 def get_setting(key):
@@ -69,7 +117,8 @@ def get_latest_rate(from_currency="USD", to_currency="ZAR"):
 def fetch_rate_from_api(from_currency="USD", to_currency="ZAR"):
     """Fetch rate from external API"""
     url = f"https://api.exchangerate.host/latest?base={from_currency}&symbols={to_currency}"
-    resp = requests.get(url, timeout=8)
+    with registry.timed("rates"):
+        resp = http_session().get(url, timeout=8)
     resp.raise_for_status()
     data = resp.json()
     if "rates" in data and to_currency in data["rates"]:
@@ -122,7 +171,7 @@ def get_dollar_balance():
     """Get current dollar balance"""
     balance = DollarBalance.query.first()
     if not balance:
-        balance = DollarBalance(current_balance=0.00)
+        balance = DollarBalance(current_balance=Money.zero())
         db.session.add(balance)
         db.session.commit()
     return balance
@@ -130,6 +179,7 @@ def get_dollar_balance():
 
 def update_dollar_balance(new_balance):
     """Update dollar balance"""
+    new_balance = Money.of(new_balance)
     balance = DollarBalance.query.first()
     if not balance:
         balance = DollarBalance(current_balance=new_balance)
@@ -0,0 +1,151 @@
+# benchmarks/bench_customers.py
+"""
+Customer autocomplete benchmark: in-memory prefix index vs database fallback.
+
+    python benchmarks/bench_customers.py --scale 1000000
+    python benchmarks/bench_customers.py --database-url postgresql://localhost/hawala_bench
+
+Bulk-loads --scale synthetic customers, builds app.customers.CustomerIndex
+and times name and phone prefix lookups of 2-6 characters through the
+index, the database range-scan fallback and the /admin/api/customers
+endpoint. Exits non-zero when the index p99 is over --p99-budget-ms or
+p95 regresses more than --tolerance over
+benchmarks/baselines/customers-<dialect>-<scale>.json.
+
+--database-url drops and recreates every table: use a scratch database.
+"""
+import argparse
+import os
+import random
+import resource
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.common import make_app, seed, login, summarize, compare_to_baseline  # noqa: E402
+
+
+def load_customers(app, count, seed_value=7):
+    """Synthetic customers straight into the table; returns a sample of (name, phone)"""
+    from app import db
+    from app.customers import normalize_name
+    from app.datagen import BulkLoader, FIRST_NAMES, LAST_NAMES
+    from app.phones import to_e164
+
+    rng = random.Random(seed_value)
+    now = datetime.utcnow()
+    sample = []
+
+    def rows():
+        seen = set()
+        while len(seen) < count:
+            name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+            if rng.random() < 0.7:
+                phone = to_e164(f"0{rng.choice('678')}{rng.randint(10_000_000, 99_999_999)}")
+            else:
+                phone = f"+26377{rng.randint(1_000_000, 9_999_999)}"
+            key = normalize_name(name)
+            if (phone, key) in seen:
+                continue
+            seen.add((phone, key))
+            if len(sample) < 5000 and rng.random() < 0.01:
+                sample.append((name, phone))
+            yield name, key, phone, int(rng.paretovariate(1.5)), now, now
+
+    with app.app_context():
+        BulkLoader(db.engine).load(
+            "customers",
+            ("name", "name_key", "phone_e164", "transaction_count", "last_seen_at", "created_at"),
+            rows(),
+        )
+    return sample
+
+
+def sample_queries(sample, n, seed_value=11):
+    """Prefixes people actually type: names and local/international phone digits"""
+    rng = random.Random(seed_value)
+    queries = []
+    for i in range(n):
+        name, phone = rng.choice(sample)
+        length = rng.randint(2, 6)
+        if i % 2 == 0:
+            queries.append(("name", name[:length]))
+        elif phone.startswith("+27"):
+            queries.append(("phone", ("0" + phone[3:])[:length + 2]))
+        else:
+            queries.append(("phone", phone[:length + 3]))
+    return queries
+
+
+def rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Customer autocomplete benchmark")
+    parser.add_argument("--scale", type=int, default=1000000, help="customers to load")
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--db-queries", type=int, default=200, help="queries timed against the database fallback")
+    parser.add_argument("--database-url", help="scratch database (default: temporary SQLite file)")
+    parser.add_argument("--p99-budget-ms", type=float, default=5.0)
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args()
+
+    app = make_app(args.database_url)
+    ids = seed(app, transactions=200, agents=5, branches=2)
+    started = time.perf_counter()
+    sample = load_customers(app, args.scale)
+    print(f"Loaded {args.scale} customers in {time.perf_counter() - started:.1f}s")
+
+    from app import db
+    from app.customers import customer_index, search_customers_db
+    with app.app_context():
+        dialect = db.engine.dialect.name
+        rss_before = rss_mb()
+        started = time.perf_counter()
+        customer_index.build()
+        print(f"Built index over {len(customer_index)} customers in {time.perf_counter() - started:.1f}s "
+              f"(peak RSS +{rss_mb() - rss_before:.0f} MB)")
+
+    queries = sample_queries(sample, args.queries)
+    results = {}
+    with app.app_context():
+        for label, lookup, subset in (("index", customer_index.search, queries),
+                                      ("database", search_customers_db, queries[:args.db_queries])):
+            samples = {}
+            for kind, q in subset:
+                t0 = time.perf_counter()
+                lookup(q, 10)
+                samples.setdefault(kind, []).append(time.perf_counter() - t0)
+            for kind, values in samples.items():
+                results[f"{label}.{kind}"] = summarize(values, sum(values))
+
+    client = app.test_client()
+    login(client, ids["admin_id"], "admin")
+    samples = []
+    for _, q in queries[:500]:
+        t0 = time.perf_counter()
+        client.get("/admin/api/customers", query_string={"q": q})
+        samples.append(time.perf_counter() - t0)
+    results["endpoint"] = summarize(samples, sum(samples))
+
+    for name, r in sorted(results.items()):
+        print(f"{name:16s} p50 {r['p50_ms']:8.3f} ms  p95 {r['p95_ms']:8.3f} ms  "
+              f"p99 {r['p99_ms']:8.3f} ms  n={r['n']}")
+
+    failures = [f"{name}: p99 {r['p99_ms']:.2f} ms over the {args.p99_budget_ms} ms budget"
+                for name, r in results.items()
+                if name.startswith("index.") and r["p99_ms"] > args.p99_budget_ms]
+    tracked = {k: v for k, v in results.items() if not k.startswith("database.")}
+    failures += compare_to_baseline(f"customers-{dialect}-{args.scale}", tracked,
+                                    tolerance=args.tolerance, update=args.update_baseline)
+    for failure in failures:
+        print(f"REGRESSION {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,172 @@
+# benchmarks/bench_export.py
+"""
+Streaming export benchmark: throughput and memory of app.exports.
+
+    python benchmarks/bench_export.py                    # 10M transactions
+    python benchmarks/bench_export.py --scale 500000     # quick run
+    python benchmarks/bench_export.py --database-url postgresql://localhost/hawala_bench
+
+Bulk-loads --scale synthetic transactions spread over a year, then
+exports them as CSV, JSONL and gzipped CSV, plus one CSV export of the
+first tenth of the year, and the /admin/export endpoint. Reports rows/s,
+MB/s and the peak RSS growth of each export. Exits non-zero when the
+full export needs more than --flat-mb memory beyond the tenth (memory
+must not grow with row count) or when rows/s regresses more than
+--tolerance below benchmarks/baselines/export-<dialect>-<scale>.json.
+
+--database-url drops and recreates every table: use a scratch database.
+"""
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.common import make_app, seed, login, compare_to_baseline  # noqa: E402
+
+PAGE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def rss_bytes():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * PAGE
+
+
+class PeakRSS:
+    """Samples RSS every few ms while active; .growth is peak minus start"""
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.growth = 0
+
+    def __enter__(self):
+        self._start = self._peak = rss_bytes()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            self._peak = max(self._peak, rss_bytes())
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self._peak = max(self._peak, rss_bytes())
+        self.growth = self._peak - self._start
+
+
+def load_transactions(app, count, end, seed_value=3):
+    """Synthetic transactions evenly spread over the 365 days before `end`"""
+    from app import db
+    from app.datagen import BulkLoader, FIRST_NAMES, LAST_NAMES
+
+    rng = random.Random(seed_value)
+    start = end - timedelta(days=365)
+    step = timedelta(days=365) / count
+    statuses = ("completed",) * 7 + ("pending",) * 2 + ("cancelled",)
+    columns = ("transaction_id", "sender_name", "sender_phone", "sender_phone_e164", "receiver_name",
+               "receiver_phone", "receiver_phone_e164", "amount_local", "amount_foreign", "currency_code",
+               "status", "timestamp", "payment_method", "available_to_all", "notes")
+
+    def rows():
+        for i in range(count):
+            local = int(rng.lognormvariate(7.5, 0.9)) * 100
+            phone = f"+2782{rng.randint(1_000_000, 9_999_999)}"
+            yield (f"ISA-EXP{i:011d}", f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}", phone, phone,
+                   f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}", "+263771234567", "+263771234567",
+                   local, local * 100 // 1850, "ZAR", rng.choice(statuses), start + step * i, "cash",
+                   False, None)
+
+    with app.app_context():
+        BulkLoader(db.engine, chunk_size=50000).load("transactions", columns, rows())
+
+
+def time_export(app, label, expected_rows, **kwargs):
+    from app.exports import export_chunks
+
+    with app.app_context():
+        written = 0
+        with PeakRSS() as mem:
+            t0 = time.perf_counter()
+            for chunk in export_chunks("transactions", **kwargs):
+                written += len(chunk)
+            elapsed = time.perf_counter() - t0
+    result = {
+        "rows": expected_rows,
+        "seconds": round(elapsed, 2),
+        "rows_per_s": round(expected_rows / elapsed),
+        "mb_per_s": round(written / 1e6 / elapsed, 1),
+        "mb": round(written / 1e6, 1),
+        "rss_growth_mb": round(mem.growth / 1e6, 1),
+    }
+    print(f"{label:14s} {result['rows']:>10} rows  {result['seconds']:7.1f} s  {result['rows_per_s']:>9} rows/s  "
+          f"{result['mb_per_s']:6.1f} MB/s  {result['mb']:8.1f} MB out  RSS +{result['rss_growth_mb']} MB")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Streaming export benchmark")
+    parser.add_argument("--scale", type=int, default=10_000_000, help="transactions to export")
+    parser.add_argument("--database-url", help="scratch database (default: temporary SQLite file)")
+    parser.add_argument("--flat-mb", type=float, default=32.0,
+                        help="max extra RSS growth of the full export over the 1/10 export")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args()
+
+    app = make_app(args.database_url)
+    ids = seed(app, transactions=0, agents=2, branches=1)
+    end = datetime(2026, 1, 1)
+    started = time.perf_counter()
+    load_transactions(app, args.scale, end)
+    print(f"Loaded {args.scale} transactions in {time.perf_counter() - started:.1f}s")
+
+    from app import db
+    with app.app_context():
+        dialect = db.engine.dialect.name
+
+    tenth_end = end - timedelta(days=365) + timedelta(days=36.5)
+    results = {
+        "csv_tenth": time_export(app, "csv (1/10)", args.scale // 10, fmt="csv", end=tenth_end),
+        "csv": time_export(app, "csv", args.scale, fmt="csv"),
+        "jsonl": time_export(app, "jsonl", args.scale, fmt="jsonl"),
+        "csv_gzip": time_export(app, "csv.gz", args.scale, fmt="csv", gzip=True),
+    }
+
+    client = app.test_client()
+    login(client, ids["admin_id"], "admin")
+    written = 0
+    with PeakRSS() as mem:
+        t0 = time.perf_counter()
+        response = client.get("/admin/export/transactions.csv", headers={"Accept-Encoding": "gzip"}, buffered=False)
+        for chunk in response.response:
+            written += len(chunk)
+        response.close()
+        elapsed = time.perf_counter() - t0
+    results["endpoint_gzip"] = {"rows": args.scale, "seconds": round(elapsed, 2),
+                                "rows_per_s": round(args.scale / elapsed), "rss_growth_mb": round(mem.growth / 1e6, 1)}
+    print(f"{'endpoint gzip':14s} {args.scale:>10} rows  {elapsed:7.1f} s  {results['endpoint_gzip']['rows_per_s']:>9} "
+          f"rows/s  {written / 1e6:8.1f} MB out  RSS +{results['endpoint_gzip']['rss_growth_mb']} MB")
+
+    failures = []
+    extra = results["csv"]["rss_growth_mb"] - results["csv_tenth"]["rss_growth_mb"]
+    if extra > args.flat_mb:
+        failures.append(f"memory grows with row count: full export +{extra:.1f} MB over the 1/10 export")
+
+    # Lower rows/s is worse: track seconds per million rows against the baseline
+    tracked = {k: {"s_per_m_rows": round(v["seconds"] / v["rows"] * 1e6, 3)} for k, v in results.items()}
+    failures += compare_to_baseline(f"export-{dialect}-{args.scale}", tracked, metric="s_per_m_rows",
+                                    tolerance=args.tolerance, update=args.update_baseline)
+    for failure in failures:
+        print(f"REGRESSION {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
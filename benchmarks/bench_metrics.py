@@ -0,0 +1,116 @@
+# benchmarks/bench_metrics.py
+"""
+Hot-path cost of app.metrics.
+
+    python benchmarks/bench_metrics.py
+    python benchmarks/bench_metrics.py --update-baseline
+
+Times counter.inc(), histogram.observe() and cache_hit() per call, the
+per-request overhead of the metrics hooks (same route with METRICS on and
+off), and a full /metrics render. Exits non-zero when any figure regresses
+more than --tolerance over benchmarks/baselines/metrics.json.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.common import compare_to_baseline, make_app, login, seed, percentile  # noqa: E402
+
+
+def per_call_ns(fn, n):
+    start = time.perf_counter_ns()
+    for _ in range(n):
+        fn()
+    return round((time.perf_counter_ns() - start) / n, 1)
+
+
+def ops(n):
+    from app.metrics import Registry
+
+    registry = Registry()
+    counter = registry.counter("bench_total", "", ("route",))
+    histogram = registry.histogram("bench_seconds", "", ("endpoint", "method", "status"))
+    labels = ("admin.dashboard", "GET", 200)
+
+    results = {
+        "counter_inc": per_call_ns(lambda: counter.inc(("a",)), n),
+        "histogram_observe": per_call_ns(lambda: histogram.observe(0.042, labels), n),
+        "cache_hit": per_call_ns(lambda: registry.cache_hit("bench"), n),
+    }
+
+    # A realistic label spread before rendering
+    for i in range(60):
+        for status in (200, 302, 500):
+            histogram.observe(0.01 * (i % 7), (f"endpoint_{i}", "GET", status))
+    start = time.perf_counter()
+    body = registry.render()
+    results["render_us"] = round((time.perf_counter() - start) * 1e6, 1)
+    results["render_lines"] = body.count("\n")
+    return results
+
+
+def request_overhead(requests):
+    """Median latency of a cheap route with the metrics hooks on vs off"""
+    app = make_app()
+    ids = seed(app, transactions=100, agents=2, branches=1)
+
+    from app import create_app
+
+    clients = {}
+    for enabled in (False, True):
+        os.environ["METRICS"] = "true" if enabled else "false"
+        client = create_app(fast_boot=True).test_client()
+        login(client, ids["admin_id"], "admin")
+        clients[enabled] = client
+
+    # Alternate small batches so drift (GC, caches, CPU boost) hits both sides
+    samples = {False: [], True: []}
+    for _ in range(max(requests // 50, 1)):
+        for enabled, client in clients.items():
+            for _ in range(50):
+                t0 = time.perf_counter()
+                client.get("/admin/api/dashboard-balance")
+                samples[enabled].append(time.perf_counter() - t0)
+
+    off = percentile(samples[False], 50) * 1000
+    on = percentile(samples[True], 50) * 1000
+    return {"request_off_ms": round(off, 4), "request_on_ms": round(on, 4),
+            "request_overhead_us": round((on - off) * 1000, 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Metrics hot-path microbenchmark")
+    parser.add_argument("--n", type=int, default=200000, help="calls per operation")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--tolerance", type=float, default=0.5)
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args()
+
+    results = ops(args.n)
+    with open(os.devnull, "w") as devnull:
+        stdout, sys.stdout = sys.stdout, devnull
+        try:
+            results.update(request_overhead(args.requests))
+        finally:
+            sys.stdout = stdout
+
+    for name in ("counter_inc", "histogram_observe", "cache_hit"):
+        print(f"{name:20s} {results[name]:8.1f} ns/call")
+    print(f"{'render':20s} {results['render_us']:8.1f} us ({results['render_lines']} lines)")
+    print(f"{'request overhead':20s} {results['request_overhead_us']:8.1f} us "
+          f"({results['request_off_ms']:.3f} -> {results['request_on_ms']:.3f} ms median)")
+
+    tracked = {name: {"value": results[name]}
+               for name in ("counter_inc", "histogram_observe", "cache_hit", "render_us")}
+    failures = compare_to_baseline("metrics", tracked, metric="value",
+                                   tolerance=args.tolerance, update=args.update_baseline)
+    for failure in failures:
+        print(f"REGRESSION {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
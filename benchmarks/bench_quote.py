@@ -0,0 +1,143 @@
+# benchmarks/bench_quote.py
+"""
+Quote API benchmark: latency of app.quotes and /admin/api/quote.
+
+    python benchmarks/bench_quote.py
+    python benchmarks/bench_quote.py --requests 5000 --batch 1000
+
+Times single quotes and --batch item batches (mixed currencies and
+branches) through app.quotes.quote_items and the JSON endpoint, against
+the old per-request ExchangeRate query + Money arithmetic for reference.
+Exits non-zero when the single-quote p99 of quote_items is over
+--p99-budget-ms, when an endpoint request runs any SQL statement (the hot
+path must not touch the database), or when p95 regresses more than
+--tolerance over benchmarks/baselines/quote-<dialect>.json.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# The rate table, fee schedules and cached user roles re-check their change
+# markers every few seconds; keep those queries out of the timed loop
+os.environ.setdefault("RATE_TABLE_CHECK_SECONDS", "3600")
+os.environ.setdefault("FEE_SCHEDULE_CHECK_SECONDS", "3600")
+os.environ.setdefault("USER_ROLE_CHECK_SECONDS", "3600")
+
+from benchmarks.common import make_app, seed, login, summarize, compare_to_baseline  # noqa: E402
+
+
+def make_items(n, branch_ids, rng):
+    return [{"amount": f"{rng.randint(5000, 5_000_000) / 100:.2f}",
+             "currency": rng.choice(("USD", "USD", "USD", "ZAR")),
+             "branch_id": rng.choice(branch_ids + [None])} for _ in range(n)]
+
+
+def legacy_quote(item):
+    """What admin.transaction_quote did per request: a rate query plus Money arithmetic"""
+    from flask import current_app
+    from app.models import ExchangeRate
+    from app.money import Money
+
+    amount_local = Money.parse(item["amount"])
+    pct = float(current_app.config.get("FEE_PERCENT", 0.01))
+    flat = Money.of(current_app.config.get("FEE_FLAT", 10.0))
+    subtotal = amount_local + amount_local * pct + flat
+    exchange_rate = ExchangeRate.query.filter_by(
+        from_currency=item["currency"], to_currency="ZAR").order_by(ExchangeRate.updated_at.desc()).first()
+    rate = float(exchange_rate.rate) if exchange_rate else 1.0
+    return subtotal, amount_local / rate
+
+
+def timed(fn, args_list):
+    samples = []
+    for args in args_list:
+        t0 = time.perf_counter()
+        fn(*args)
+        samples.append(time.perf_counter() - t0)
+    return summarize(samples, sum(samples))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Quote API benchmark")
+    parser.add_argument("--requests", type=int, default=2000, help="timed calls per case")
+    parser.add_argument("--batch", type=int, default=500, help="items per batch call")
+    parser.add_argument("--database-url", help="scratch database (default: temporary SQLite file)")
+    parser.add_argument("--p99-budget-ms", type=float, default=1.0)
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args()
+
+    app = make_app(args.database_url)
+    ids = seed(app, transactions=100, agents=3, branches=3)
+
+    from app import db
+    from app.models import Branch, ExchangeRate
+    from app.pricing import rate_table
+    from app.quotes import quote_items
+    from app.sqlstats import sql_stats
+
+    rng = random.Random(5)
+    with app.app_context():
+        dialect = db.engine.dialect.name
+        db.session.add(ExchangeRate(from_currency="USD", to_currency="ZAR", rate=18.4321, source="bench"))
+        branches = db.session.query(Branch).all()
+        branches[0].rate_override = 18.1
+        db.session.commit()
+        branch_ids = [b.id for b in branches]
+        rate_table.refresh(force=True)
+
+    singles = [(make_items(1, branch_ids, rng),) for _ in range(args.requests)]
+    batches = [(make_items(args.batch, branch_ids, rng),) for _ in range(max(args.requests // 20, 20))]
+
+    results = {}
+    with app.test_request_context():
+        quote_items(singles[0][0])  # warm-up
+        results["quote_items.single"] = timed(quote_items, singles)
+        results[f"quote_items.batch{args.batch}"] = timed(quote_items, batches)
+        legacy = timed(legacy_quote, [(items[0],) for (items,) in singles])
+        # Batch the old way: one rate query and Money arithmetic per item
+        legacy_batch = timed(lambda items: [legacy_quote(item) for item in items], batches[:5])
+
+    client = app.test_client()
+    login(client, ids["admin_id"], "admin")
+    statements = 0
+    for name, calls in (("endpoint.single", [items[0] for (items,) in singles]),
+                        (f"endpoint.batch{args.batch}", [{"items": items} for (items,) in batches])):
+        client.post("/admin/api/quote", json=calls[0])  # warm-up
+        samples = []
+        for payload in calls:
+            t0 = time.perf_counter()
+            response = client.post("/admin/api/quote", json=payload)
+            samples.append(time.perf_counter() - t0)
+            assert response.status_code == 200, response.get_data(as_text=True)
+            statements = max(statements, sql_stats.last()["queries"])
+        results[name] = summarize(samples, sum(samples))
+
+    for name, r in results.items():
+        print(f"{name:24s} p50 {r['p50_ms']:8.3f} ms  p95 {r['p95_ms']:8.3f} ms  p99 {r['p99_ms']:8.3f} ms  "
+              f"n={r['n']}")
+    print(f"{'legacy.single':24s} p50 {legacy['p50_ms']:8.3f} ms  p95 {legacy['p95_ms']:8.3f} ms  "
+          f"(ExchangeRate query + Money per quote)")
+    per_item = results[f"quote_items.batch{args.batch}"]["p50_ms"] / args.batch * 1000
+    legacy_item = legacy_batch["p50_ms"] / args.batch * 1000
+    print(f"batch of {args.batch}: {per_item:.1f} us/item vs {legacy_item:.1f} us/item the old way")
+    print(f"SQL statements per endpoint request: {statements}")
+
+    failures = []
+    single = results["quote_items.single"]
+    if single["p99_ms"] > args.p99_budget_ms:
+        failures.append(f"quote_items.single: p99 {single['p99_ms']:.3f} ms over the {args.p99_budget_ms} ms budget")
+    if statements:
+        failures.append(f"/admin/api/quote ran {statements} SQL statement(s) on the hot path")
+    failures += compare_to_baseline(f"quote-{dialect}", results,
+                                    tolerance=args.tolerance, update=args.update_baseline)
+    for failure in failures:
+        print(f"REGRESSION {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,100 @@
+# benchmarks/bench_render.py
+"""
+Per-row template rendering cost: 10k transaction rows.
+
+    python benchmarks/bench_render.py
+    python benchmarks/bench_render.py --rows 20000 --repeat 5
+
+Renders --rows transactions (loaded once, so no SQL is timed) through
+admin/transactions.html, and through a row template that runs the
+app.filters filters on every cell (format_date, time_ago, format_phone,
+format_currency, truncate), as the report and log pages do. Also times
+each filter on its own over the same values.
+
+Exits non-zero when a p95 regresses more than --tolerance over
+benchmarks/baselines/render-<dialect>.json.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.common import make_app, seed, summarize, compare_to_baseline  # noqa: E402
+
+ROW_TEMPLATE = """\
+{% for tx in txs %}<tr>
+<td>{{ tx.timestamp|format_date }}</td><td>{{ tx.timestamp|format_date('%Y-%m-%d') }}</td>
+<td>{{ tx.timestamp|time_ago }}</td><td>{{ tx.sender_name|truncate(12) }}</td>
+<td>{{ tx.sender_phone|format_phone }}</td><td>{{ tx.receiver_phone|format_phone }}</td>
+<td>{{ tx.amount_local|format_currency }}</td><td>{{ tx.amount_foreign|format_currency('USD') }}</td>
+</tr>
+{% endfor %}"""
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return summarize(samples, sum(samples))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-row template rendering benchmark")
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5, help="timed renders per case")
+    parser.add_argument("--database-url", help="scratch database (default: temporary SQLite file)")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args()
+
+    app = make_app(args.database_url)
+    ids = seed(app, transactions=args.rows, agents=10, branches=3)
+
+    from flask import render_template, session
+    from app import db
+    from app.filters import FILTERS
+    from app.models import Transaction
+
+    results = {}
+    with app.test_request_context("/admin/transactions"):
+        session.update(user_id=ids["admin_id"], role="admin", username="admin")
+        dialect = db.engine.dialect.name
+        txs = Transaction.query.order_by(Transaction.id.desc()).limit(args.rows).all()
+        n = len(txs)
+        rows = app.jinja_env.from_string(ROW_TEMPLATE)
+
+        render_template("admin/transactions.html", txs=txs[:10], page=1, has_next=False)  # compile
+        rows.render(txs=txs[:10])
+        results["transactions.html"] = timed(
+            lambda: render_template("admin/transactions.html", txs=txs, page=1, has_next=False), args.repeat)
+        results["filter_rows"] = timed(lambda: rows.render(txs=txs), args.repeat)
+
+        cells = {
+            "format_date": [tx.timestamp for tx in txs],
+            "time_ago": [tx.timestamp for tx in txs],
+            "format_phone": [tx.sender_phone for tx in txs],
+            "format_currency": [tx.amount_local for tx in txs],
+            "truncate": [tx.sender_name for tx in txs],
+        }
+        for name, values in cells.items():
+            fn = FILTERS[name]
+            results[f"filter.{name}"] = timed(lambda: [fn(v) for v in values], args.repeat)
+
+    print(f"{n} rows, {args.repeat} renders each")
+    for name, r in results.items():
+        per_row = r["p50_ms"] / max(n, 1) * 1000
+        print(f"  {name:24s} p50 {r['p50_ms']:9.2f} ms  p95 {r['p95_ms']:9.2f} ms  {per_row:7.2f} us/row")
+
+    failures = compare_to_baseline(f"render-{dialect}", results,
+                                   tolerance=args.tolerance, update=args.update_baseline)
+    for failure in failures:
+        print(f"REGRESSION {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
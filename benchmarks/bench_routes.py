@@ -0,0 +1,179 @@
+# benchmarks/bench_routes.py
+"""
+In-process latency benchmark for the hot routes, using the Flask test
+client against a seeded database and stand-in providers.
+
+    python benchmarks/bench_routes.py --scale 10000
+    python benchmarks/bench_routes.py --database-url postgresql://localhost/hawala_bench
+    python benchmarks/bench_routes.py --scale 10000 --update-baseline
+
+Prints p50/p95/p99, requests/second and SQL statements per request for
+each route and exits non-zero if a route errors (a 4xx/5xx, or a redirect
+that flashes a danger/warning message, which is how the form views report
+a failed POST), goes over its query
+budget (app.sqlstats.QUERY_BUDGETS) or its p95 regresses more than
+--tolerance over the baseline in
+benchmarks/baselines/routes-<dialect>-<scale>.json.
+
+--database-url drops and recreates every table: use a scratch database.
+"""
+import argparse
+import contextlib
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.common import make_app, seed, login, summarize, compare_to_baseline  # noqa: E402
+from app.sqlstats import sql_stats, over_budget  # noqa: E402
+
+
+def build_routes(app, ids):
+    """(name, role, method, path_fn(i), form_fn(i)) for every benchmarked route"""
+    from app.models import Transaction
+
+    with app.app_context():
+        available = [t for (t,) in Transaction.query.with_entities(Transaction.transaction_id).filter_by(
+            available_to_all=True, status="pending", agent_id=None
+        ).all()]
+        sample = [t for (t,) in Transaction.query.with_entities(Transaction.transaction_id).filter(
+            Transaction.completed_by.isnot(None)
+        ).limit(100).all()]
+
+    def pick_path(i):
+        # Each iteration picks a different available transaction
+        txid = available[i % len(available)] if available else "ISA-NONE"
+        return f"/agent/pick/{txid}"
+
+    def view_path(prefix):
+        return lambda i: f"{prefix}/{sample[i % len(sample)] if sample else 'ISA-NONE'}"
+
+    def create_form(i):
+        return {
+            "confirmed": "true",
+            "sender_name": f"Bench Sender {i}",
+            "sender_phone": "0821234567",
+            "receiver_name": f"Bench Receiver {i}",
+            "receiver_phone": "263771234567",
+            "amount_local": "1500.00",
+            "currency_code": "ZAR",
+            "available_to_all": "1" if i % 2 else "0",
+            "agent_id": str(ids["agent_ids"][i % len(ids["agent_ids"])]),
+            "payment_method": "cash",
+        }
+
+    static = lambda path: (lambda i: path)  # noqa: E731
+    return [
+        ("agent.dashboard", "agent", "GET", static("/agent/dashboard"), None),
+        ("agent.available_transactions", "agent", "GET", static("/agent/available"), None),
+        ("agent.pick_transaction", "agent", "POST", pick_path, None),
+        ("agent.view_transaction", "agent", "GET", view_path("/agent/view"), None),
+        ("admin.dashboard", "admin", "GET", static("/admin/dashboard"), None),
+        ("admin.transactions", "admin", "GET", static("/admin/transactions"), None),
+        ("admin.view_transaction", "admin", "GET", view_path("/admin/transactions"), None),
+        ("admin.create_transaction", "admin", "POST", static("/admin/transactions/create"), create_form),
+        ("admin.reports_main", "admin", "GET", static("/admin/reports"), None),
+        ("admin.reports_daily", "admin", "GET", static("/admin/reports/daily"), None),
+        ("admin.reports_monthly", "admin", "GET", static("/admin/reports/monthly"), None),
+        ("admin.reports_yearly", "admin", "GET", static("/admin/reports/yearly"), None),
+        ("admin.dashboard_balance", "admin", "GET", static("/admin/api/dashboard-balance"), None),
+        ("admin.get_dollar_balance", "admin", "GET", static("/admin/api/dollar_balance"), None),
+    ]
+
+
+FAILURE_FLASHES = ("danger", "warning")
+
+
+def failed(client, resp):
+    """An error status, or a redirect carrying a failure flash (consumed here)"""
+    if resp.status_code >= 400:
+        return True
+    if not 300 <= resp.status_code < 400:
+        return False
+    with client.session_transaction() as sess:
+        flashes = sess.pop("_flashes", [])
+    return any(category in FAILURE_FLASHES for category, _ in flashes)
+
+
+def run_route(app, ids, route, requests, warmup):
+    name, role, method, path_fn, form_fn = route
+    client = app.test_client()
+    if role == "admin":
+        login(client, ids["admin_id"], "admin")
+    else:
+        login(client, ids["agent_ids"][0], "agent")
+
+    samples = []
+    errors = 0
+    max_queries = 0
+    started = time.perf_counter()
+    for i in range(warmup + requests):
+        path = path_fn(i)
+        data = form_fn(i) if form_fn else None
+        t0 = time.perf_counter()
+        resp = client.open(path, method=method, data=data)
+        elapsed = time.perf_counter() - t0
+        if i == warmup - 1:
+            started = time.perf_counter()
+        error = failed(client, resp)
+        if i < warmup:
+            continue
+        samples.append(elapsed)
+        if error:
+            errors += 1
+        last = sql_stats.last()
+        if last:
+            max_queries = max(max_queries, last["queries"])
+    wall = time.perf_counter() - started
+
+    row = summarize(samples, wall)
+    row["errors"] = errors
+    row["queries"] = max_queries
+    return row
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-route latency benchmark")
+    parser.add_argument("--scale", type=int, default=1000, help="transactions to seed")
+    parser.add_argument("--requests", type=int, default=200, help="measured requests per route")
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--database-url", help="scratch database (default: temporary SQLite file)")
+    parser.add_argument("--routes", help="comma-separated route names to run")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args()
+
+    app = make_app(args.database_url)
+    ids = seed(app, transactions=args.scale)
+
+    routes = build_routes(app, ids)
+    if args.routes:
+        wanted = set(args.routes.split(","))
+        routes = [r for r in routes if r[0] in wanted]
+
+    results = {}
+    # The views print debug output on every request; keep it off the terminal
+    with open(os.devnull, "w") as devnull:
+        for route in routes:
+            with contextlib.redirect_stdout(devnull):
+                results[route[0]] = run_route(app, ids, route, args.requests, args.warmup)
+            r = results[route[0]]
+            print(f"{route[0]:32s} p50 {r['p50_ms']:8.2f} ms  p95 {r['p95_ms']:8.2f} ms  "
+                  f"p99 {r['p99_ms']:8.2f} ms  {r['rps']:8.1f} req/s  queries {r['queries']:3d}  errors {r['errors']}")
+
+    with app.app_context():
+        from app import db
+        dialect = db.engine.dialect.name
+
+    failures = [f"{name}: {r['errors']} failed requests" for name, r in results.items() if r["errors"]]
+    failures += [msg for msg in (over_budget(name, r["queries"]) for name, r in results.items()) if msg]
+    failures += compare_to_baseline(f"routes-{dialect}-{args.scale}", results,
+                                    tolerance=args.tolerance, update=args.update_baseline)
+    for failure in failures:
+        print(f"REGRESSION {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,114 @@
+# benchmarks/bench_search.py
+"""
+Transaction search benchmark: indexed (pg_trgm / FTS5) vs LIKE scan.
+
+    python benchmarks/bench_search.py --scale 1000000
+    python benchmarks/bench_search.py --database-url postgresql://localhost/hawala_bench --scale 2000000
+
+Seeds --scale transactions with app.datagen, builds the search index and
+times ranked first-page searches and the autocomplete endpoint for a mix
+of name, phone and transaction-id fragments. Exits non-zero when the
+indexed p95 regresses more than --tolerance over
+benchmarks/baselines/search-<dialect>-<scale>.json.
+
+--database-url drops and recreates every table: use a scratch database.
+"""
+import argparse
+import contextlib
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.common import make_app, seed, login, summarize, compare_to_baseline  # noqa: E402
+
+
+def sample_queries(app, n):
+    """Fragments of real rows: name parts, phone digits, txid tails, and a 2-char term"""
+    from app.models import Transaction
+
+    with app.app_context():
+        rows = Transaction.query.order_by(Transaction.id).limit(n).all()
+    queries = []
+    for i, tx in enumerate(rows):
+        kind = i % 4
+        if kind == 0:
+            queries.append(("name", tx.sender_name.split()[-1][:5]))
+        elif kind == 1:
+            queries.append(("phone", (tx.sender_phone or "0821234567")[2:8]))
+        elif kind == 2:
+            queries.append(("txid", tx.transaction_id[-6:]))
+        else:
+            queries.append(("name_two_terms", tx.receiver_name.lower()))
+    return queries
+
+
+def time_search(app, queries, use_index):
+    from app.search import search_transactions
+
+    samples = {}
+    with app.app_context():
+        for kind, q in queries:
+            t0 = time.perf_counter()
+            search_transactions(q, per_page=50, use_index=use_index)
+            samples.setdefault(kind, []).append(time.perf_counter() - t0)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Transaction search benchmark")
+    parser.add_argument("--scale", type=int, default=200000, help="transactions to seed")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--scan-queries", type=int, default=20, help="queries timed without the index")
+    parser.add_argument("--database-url", help="scratch database (default: temporary SQLite file)")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args()
+
+    app = make_app(args.database_url)
+    started = time.perf_counter()
+    ids = seed(app, transactions=args.scale, agents=50, branches=10)
+    print(f"Seeded {args.scale} transactions in {time.perf_counter() - started:.1f}s")
+
+    from app import db
+    from app.search import create_search_index
+    with app.app_context():
+        started = time.perf_counter()
+        create_search_index()
+        print(f"Built search index in {time.perf_counter() - started:.1f}s")
+        dialect = db.engine.dialect.name
+
+    queries = sample_queries(app, args.queries)
+    results = {}
+    for label, use_index, subset in (("indexed", True, queries), ("scan", False, queries[:args.scan_queries])):
+        t0 = time.perf_counter()
+        samples = time_search(app, subset, use_index)
+        wall = time.perf_counter() - t0
+        for kind, values in samples.items():
+            results[f"{label}.{kind}"] = summarize(values, sum(values))
+        print(f"{label:8s} {len(subset)} queries in {wall:.2f}s")
+
+    client = app.test_client()
+    login(client, ids["admin_id"], "admin")
+    samples = []
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        for _, q in queries:
+            t0 = time.perf_counter()
+            client.get("/admin/api/transactions/search", query_string={"q": q[:4]})
+            samples.append(time.perf_counter() - t0)
+    results["autocomplete"] = summarize(samples, sum(samples))
+
+    for name, r in sorted(results.items()):
+        print(f"{name:28s} p50 {r['p50_ms']:9.2f} ms  p95 {r['p95_ms']:9.2f} ms  n={r['n']}")
+
+    tracked = {k: v for k, v in results.items() if not k.startswith("scan.")}
+    failures = compare_to_baseline(f"search-{dialect}-{args.scale}", tracked,
+                                   tolerance=args.tolerance, update=args.update_baseline)
+    for failure in failures:
+        print(f"REGRESSION {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
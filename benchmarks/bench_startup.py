@@ -0,0 +1,114 @@
+# benchmarks/bench_startup.py
+"""
+Import-time and create_app() startup benchmark.
+
+Each sample runs in a fresh interpreter (that is what a gunicorn worker or
+a `flask` CLI call pays), against a throwaway SQLite database:
+
+    python benchmarks/bench_startup.py                    # compare to baseline
+    python benchmarks/bench_startup.py --update-baseline  # record new baseline
+
+Exits non-zero when a median regresses more than --tolerance over
+benchmarks/baselines/startup.json, or when fast boot imports a provider
+SDK (boto3/twilio) that should only load on first use.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE = os.path.join(ROOT, "benchmarks", "baselines", "startup.json")
+
+LAZY_MODULES = ("boto3", "botocore", "twilio")
+
+CHILD = r"""
+import json, sys, time
+t0 = time.perf_counter()
+import app
+t1 = time.perf_counter()
+application = app.create_app(fast_boot={fast_boot})
+t2 = time.perf_counter()
+print("@@" + json.dumps({{
+    "import_s": t1 - t0,
+    "create_app_s": t2 - t1,
+    "lazy_loaded": [m for m in {lazy!r} if m in sys.modules],
+}}))
+"""
+
+
+def run_once(fast_boot, db_path):
+    env = dict(os.environ)
+    env["DATABASE_URL"] = f"sqlite:///{db_path}"
+    env["RUN_SCHEDULER"] = "false"
+    env.pop("RAILWAY_ENVIRONMENT", None)
+    code = CHILD.format(fast_boot=fast_boot, lazy=LAZY_MODULES)
+    out = subprocess.run(
+        [sys.executable, "-c", code], cwd=ROOT, env=env,
+        capture_output=True, text=True, check=True
+    ).stdout
+    line = [l for l in out.splitlines() if l.startswith("@@")][-1]
+    return json.loads(line[2:])
+
+
+def measure(fast_boot, repeat):
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        run_once(fast_boot, db_path)  # warm-up: creates the schema
+        samples = [run_once(fast_boot, db_path) for _ in range(repeat)]
+
+    return {
+        "import_s": statistics.median(s["import_s"] for s in samples),
+        "create_app_s": statistics.median(s["create_app_s"] for s in samples),
+        "lazy_loaded": sorted({m for s in samples for m in s["lazy_loaded"]}),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown (0.25 = 25%%)")
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args()
+
+    results = {
+        "fast": measure(True, args.repeat),
+        "full": measure(False, args.repeat),
+    }
+
+    for mode, r in results.items():
+        print(f"{mode:5s} import {r['import_s'] * 1000:8.1f} ms   "
+              f"create_app {r['create_app_s'] * 1000:8.1f} ms   "
+              f"provider SDKs loaded: {', '.join(r['lazy_loaded']) or 'none'}")
+
+    failures = []
+    if results["fast"]["lazy_loaded"]:
+        failures.append(f"fast boot imported {results['fast']['lazy_loaded']}")
+
+    if args.update_baseline or not os.path.exists(BASELINE):
+        os.makedirs(os.path.dirname(BASELINE), exist_ok=True)
+        with open(BASELINE, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Baseline written to {BASELINE}")
+        baseline = {}
+    else:
+        with open(BASELINE) as f:
+            baseline = json.load(f)
+
+    for mode in ("fast", "full"):
+        for key in ("import_s", "create_app_s"):
+            old = baseline.get(mode, {}).get(key)
+            new = results[mode][key]
+            if old and new > old * (1 + args.tolerance):
+                failures.append(f"{mode}.{key}: {new * 1000:.1f} ms vs baseline {old * 1000:.1f} ms")
+
+    for failure in failures:
+        print(f"REGRESSION {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,147 @@
+# benchmarks/bench_templates.py
+"""
+Template rendering benchmark: cold-worker first render and steady state.
+
+    python benchmarks/bench_templates.py
+    python benchmarks/bench_templates.py --repeat 7 --renders 500
+
+Pages: the admin dashboard and create-transaction screens, which extend
+admin/base_admin.html.
+
+cold    each sample is a fresh interpreter (a new gunicorn worker) timing
+        its first GET of each page, with the Jinja bytecode cache off, on
+        but empty (the first worker after a deploy) and on and populated
+        (every later worker and restart)
+steady  in-process template render time only (Flask's render signals, no
+        view or SQL time), with {% cache %} fragments off and on
+
+Exits non-zero when a steady-state p95 regresses more than --tolerance
+over benchmarks/baselines/templates-<dialect>.json.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.common import ROOT, make_app, seed, login, summarize, compare_to_baseline  # noqa: E402
+
+PAGES = {
+    "dashboard": "/admin/dashboard",
+    "create_transaction": "/admin/transactions/create",
+}
+
+CHILD = r"""
+import json, sys, time
+sys.path.insert(0, {root!r})
+from benchmarks.common import make_app, login
+app = make_app({url!r}, reset=False)
+client = app.test_client()
+login(client, {admin_id!r}, "admin")
+out = {{}}
+for name, path in {pages!r}.items():
+    t0 = time.perf_counter()
+    assert client.get(path).status_code == 200
+    out[name] = time.perf_counter() - t0
+print("@@" + json.dumps(out))
+"""
+
+
+def first_renders(database_url, admin_id, cache_dir):
+    """First-request seconds per page in a fresh interpreter"""
+    env = dict(os.environ, JINJA_CACHE_DIR=cache_dir)
+    code = CHILD.format(root=ROOT, url=database_url, admin_id=admin_id, pages=PAGES)
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env,
+                         capture_output=True, text=True, check=True).stdout
+    line = [l for l in out.splitlines() if l.startswith("@@")][-1]
+    return json.loads(line[2:])
+
+
+def cold(database_url, admin_id, repeat):
+    """{mode: {page: median first-request ms}}"""
+    samples = {"no_bytecode_cache": [], "empty_bytecode_cache": [], "warm_bytecode_cache": []}
+    for _ in range(repeat):
+        samples["no_bytecode_cache"].append(first_renders(database_url, admin_id, ""))
+        with tempfile.TemporaryDirectory() as cache_dir:
+            samples["empty_bytecode_cache"].append(first_renders(database_url, admin_id, cache_dir))
+            samples["warm_bytecode_cache"].append(first_renders(database_url, admin_id, cache_dir))
+    return {mode: {page: statistics.median(s[page] for s in runs) * 1000 for page in PAGES}
+            for mode, runs in samples.items()}
+
+
+def steady(app, client, renders):
+    """{'<page>.<fragments off|on>': summary} of pure render time"""
+    from flask import before_render_template, template_rendered
+
+    started = []
+    rendered = []
+
+    def before(sender, template, context, **extra):
+        started.append(time.perf_counter())
+
+    def after(sender, template, context, **extra):
+        rendered.append(time.perf_counter() - started.pop())
+
+    before_render_template.connect(before, app)
+    template_rendered.connect(after, app)
+    results = {}
+    fragments = app.jinja_env.fragment_cache
+    try:
+        for label, cache in (("fragments_off", None), ("fragments_on", fragments)):
+            app.jinja_env.fragment_cache = cache
+            for name, path in PAGES.items():
+                client.get(path)  # warm-up: compile, fill fragments
+                del rendered[:]
+                for _ in range(renders):
+                    client.get(path)
+                results[f"{name}.{label}"] = summarize(list(rendered), sum(rendered))
+    finally:
+        app.jinja_env.fragment_cache = fragments
+        before_render_template.disconnect(before, app)
+        template_rendered.disconnect(after, app)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Template rendering benchmark")
+    parser.add_argument("--repeat", type=int, default=5, help="fresh-interpreter samples per cold mode")
+    parser.add_argument("--renders", type=int, default=300, help="timed renders per page and mode")
+    parser.add_argument("--database-url", help="scratch database (default: temporary SQLite file)")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args()
+
+    app = make_app(args.database_url)
+    ids = seed(app, transactions=500, agents=10, branches=5)
+    database_url = os.environ["DATABASE_URL"]
+
+    from app import db
+    with app.app_context():
+        dialect = db.engine.dialect.name
+
+    client = app.test_client()
+    login(client, ids["admin_id"], "admin")
+    results = steady(app, client, args.renders)
+    first = cold(database_url, ids["admin_id"], args.repeat)
+
+    print("cold worker, first request (ms, median):")
+    for mode, pages in first.items():
+        print(f"  {mode:22s} " + "  ".join(f"{page} {ms:8.2f}" for page, ms in pages.items()))
+    print("steady state, template render only:")
+    for name, r in results.items():
+        print(f"  {name:34s} p50 {r['p50_ms']:7.3f} ms  p95 {r['p95_ms']:7.3f} ms  n={r['n']}")
+
+    failures = compare_to_baseline(f"templates-{dialect}", results,
+                                   tolerance=args.tolerance, update=args.update_baseline)
+    for failure in failures:
+        print(f"REGRESSION {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
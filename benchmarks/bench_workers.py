@@ -0,0 +1,244 @@
+# benchmarks/bench_workers.py
+"""
+Worker-model benchmark: sync vs gthread vs gevent on the routes that wait
+on providers (admin.create_transaction sends an SNS notification and an
+SMS; agent.complete_transaction sends an SMS).
+
+    python benchmarks/bench_workers.py
+    python benchmarks/bench_workers.py --latency 0.3 --concurrency 64 --workers 2
+    python benchmarks/bench_workers.py --database-url postgresql://localhost/hawala_bench
+
+For each WORKER_PROFILE it starts real gunicorn workers from
+gunicorn_conf.py on benchmarks.standin_app, whose providers make a real
+HTTP round trip to a local latency-injecting server (benchmarks.standins),
+then drives each route with --concurrency client threads for --duration
+seconds. Reports requests/s and latency per profile; exits non-zero when
+a profile has errors or its p95 regresses more than --tolerance over
+benchmarks/baselines/workers-<dialect>.json.
+
+--database-url drops and recreates every table: use a scratch database.
+"""
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.common import ROOT, make_app, seed, summarize, compare_to_baseline  # noqa: E402
+
+PROFILES = ("sync", "gthread", "gevent")
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_for(url, timeout=30.0, proc=None):
+    import requests
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc is not None and proc.poll() is not None:
+            raise RuntimeError(f"{url}: server exited with {proc.returncode}")
+        try:
+            requests.get(url, timeout=5, allow_redirects=False)
+            return
+        except requests.RequestException:
+            time.sleep(0.1)
+    raise RuntimeError(f"{url} did not come up in {timeout}s")
+
+
+def session_cookie(app, user_id, role):
+    """Signed Flask session cookie, the same one auth.login would set"""
+    return app.session_interface.get_signing_serializer(app).dumps({"user_id": user_id, "role": role})
+
+
+def prepare(database_url):
+    """Seed the database; returns (env for gunicorn, cookies, completable txids, dialect)"""
+    app = make_app(database_url)
+    ids = seed(app, transactions=2000, agents=10, branches=3)
+
+    from app import db
+    from app.models import Transaction
+    with app.app_context():
+        dialect = db.engine.dialect.name
+        if dialect == "sqlite":
+            # Readers don't block the writer across worker processes
+            db.session.execute(db.text("PRAGMA journal_mode=WAL"))
+            db.session.commit()
+        agent_id = ids["agent_ids"][0]
+        txids = [t for (t,) in db.session.query(Transaction.transaction_id)
+                 .filter(Transaction.status == "pending").limit(5000)]
+        database_url = str(db.engine.url.render_as_string(hide_password=False))
+
+    cookies = {
+        "admin": session_cookie(app, ids["admin_id"], "admin"),
+        "agent": session_cookie(app, agent_id, "agent"),
+    }
+    return {"DATABASE_URL": database_url, "SECRET_KEY": app.secret_key}, cookies, txids, dialect
+
+
+def routes(txids):
+    def create(i):
+        return "/admin/transactions/create", {
+            "confirmed": "true",
+            "sender_name": f"Worker Bench {i}",
+            "sender_phone": "0821234567",
+            "receiver_name": f"Worker Receiver {i}",
+            "receiver_phone": "263771234567",
+            "amount_local": "1500.00",
+            "currency_code": "ZAR",
+            "available_to_all": "1",
+            "agent_id": "",
+            "payment_method": "cash",
+        }
+
+    def complete(i):
+        return f"/agent/complete/{txids[i % len(txids)]}", {}
+
+    return [("admin.create_transaction", "admin", create), ("agent.complete_transaction", "agent", complete)]
+
+
+def drive(base_url, cookie, request_for, concurrency, duration):
+    """Closed-loop load: each client thread sends its next request as soon as the last one returns"""
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    counter = iter(range(10 ** 9))
+    lock = threading.Lock()
+    samples, errors = [], []
+    stop_at = time.monotonic() + duration
+
+    def client():
+        http = requests.Session()
+        http.mount("http://", HTTPAdapter(pool_maxsize=1))
+        http.cookies.set("session", cookie)
+        while time.monotonic() < stop_at:
+            with lock:
+                i = next(counter)
+            path, form = request_for(i)
+            t0 = time.perf_counter()
+            try:
+                r = http.post(base_url + path, data=form, allow_redirects=False, timeout=60)
+                ok = r.status_code < 400 and not r.headers.get("Location", "").endswith("/login")
+            except requests.RequestException:
+                ok = False
+            elapsed = time.perf_counter() - t0
+            with lock:
+                (samples if ok else errors).append(elapsed)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - started
+    result = summarize(samples, wall)
+    result["errors"] = len(errors)
+    return result
+
+
+def run_profile(profile, args, env, cookies, route_list):
+    port = free_port()
+    worker_env = dict(os.environ, **env)
+    worker_env.update(
+        WORKER_PROFILE=profile,
+        WEB_CONCURRENCY=str(args.workers),
+        GUNICORN_THREADS=str(args.threads),
+        GEVENT_WORKER_CONNECTIONS=str(args.connections),
+        STANDIN_URL=args.standin_url,
+        STANDIN_LATENCY=str(args.latency),
+        FAST_BOOT="true",
+        RUN_SCHEDULER="false",
+        GUNICORN_TIMEOUT="120",
+    )
+    worker_env.pop("RAILWAY_ENVIRONMENT", None)
+    log = open(os.path.join(args.log_dir, f"gunicorn-{profile}.log"), "w")
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn_conf.py", "-b", f"127.0.0.1:{port}",
+         "benchmarks.standin_app:app"],
+        cwd=ROOT, env=worker_env, stdout=log, stderr=subprocess.STDOUT,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        wait_for(base_url + "/login", proc=proc)
+        results = {}
+        for name, role, request_for in route_list:
+            drive(base_url, cookies[role], request_for, args.concurrency, min(args.duration, 2.0))  # warm-up
+            results[name] = drive(base_url, cookies[role], request_for, args.concurrency, args.duration)
+        return results
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+        log.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="gunicorn worker profile benchmark")
+    parser.add_argument("--profiles", default=",".join(PROFILES))
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds per provider call")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--threads", type=int, default=8, help="gthread threads per worker")
+    parser.add_argument("--connections", type=int, default=100, help="gevent green threads per worker")
+    parser.add_argument("--concurrency", type=int, default=32, help="concurrent clients")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per route and profile")
+    parser.add_argument("--database-url", help="scratch database (default: temporary SQLite file)")
+    parser.add_argument("--log-dir", default=None, help="where gunicorn logs go (default: next to the database)")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args()
+
+    env, cookies, txids, dialect = prepare(args.database_url)
+    if dialect == "sqlite" and not args.log_dir:
+        args.log_dir = os.path.dirname(env["DATABASE_URL"].replace("sqlite:///", ""))
+    args.log_dir = args.log_dir or "."
+    route_list = routes(txids)
+
+    port = free_port()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.standins", "--port", str(port), "--latency", str(args.latency)],
+        cwd=ROOT,
+    )
+    args.standin_url = f"http://127.0.0.1:{port}/"
+    try:
+        wait_for(args.standin_url, proc=server)
+        results = {}
+        for profile in args.profiles.split(","):
+            print(f"--- {profile}")
+            for route, r in run_profile(profile, args, env, cookies, route_list).items():
+                results[f"{profile}.{route}"] = r
+                print(f"{route:28s} {r['rps']:8.1f} req/s  p50 {r['p50_ms']:8.1f} ms  "
+                      f"p95 {r['p95_ms']:8.1f} ms  errors {r['errors']}")
+    finally:
+        server.terminate()
+        server.wait()
+
+    print(f"\nprovider latency {args.latency * 1000:.0f} ms, {args.workers} workers, "
+          f"{args.concurrency} clients, gunicorn logs in {args.log_dir}")
+    for route, _, _ in route_list:
+        base = results.get(f"sync.{route}", {}).get("rps")
+        for profile in args.profiles.split(","):
+            r = results.get(f"{profile}.{route}")
+            if r and base:
+                print(f"{route:28s} {profile:8s} {r['rps'] / base:6.1f}x sync throughput")
+
+    failures = [f"{key}: {r['errors']} failed requests" for key, r in results.items() if r["errors"]]
+    failures += compare_to_baseline(f"workers-{dialect}", results,
+                                    tolerance=args.tolerance, update=args.update_baseline)
+    for failure in failures:
+        print(f"REGRESSION {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
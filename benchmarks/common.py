@@ -0,0 +1,113 @@
+# benchmarks/common.py
+"""Shared setup for the benchmark scripts: app, seeded database, stats, baselines."""
+import json
+import math
+import os
+import statistics
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_DIR = os.path.join(ROOT, "benchmarks", "baselines")
+
+# Add the project root to the Python path (same as init_db.py)
+sys.path.insert(0, ROOT)
+
+
+def make_app(database_url=None, latency=0.0, reset=True):
+    """
+    Build a fast-boot app against `database_url` (a fresh temporary SQLite
+    file by default) with every provider replaced by a local stand-in.
+
+    reset=True drops and recreates all tables - never point it at a
+    database you care about.
+    """
+    if not database_url:
+        tmp = tempfile.mkdtemp(prefix="hawala-bench-")
+        database_url = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+    os.environ["DATABASE_URL"] = database_url
+    os.environ["RUN_SCHEDULER"] = "false"
+    os.environ.setdefault("SECRET_KEY", "bench-secret")
+
+    from app import create_app, db
+    from benchmarks import standins
+
+    app = create_app(fast_boot=True)
+    app.config["TESTING"] = True
+    if reset:
+        with app.app_context():
+            db.drop_all()
+            db.create_all()
+    standins.install(latency)
+    return app
+
+
+def seed(app, transactions=1000, agents=10, branches=3, seed_value=42):
+    """
+    Deterministic dataset from app.datagen: admin, agents, branches, rate
+    history, a balance and `transactions` rows with a realistic status mix.
+    Returns {"admin_id": .., "agent_ids": [..], ...}.
+    """
+    from app.datagen import generate
+
+    with app.app_context():
+        return generate(transactions=transactions, agents=agents, branches=branches,
+                        days=400, seed=seed_value)
+
+
+def login(client, user_id, role):
+    """Put a user in the session the way auth.login does"""
+    with client.session_transaction() as sess:
+        sess["user_id"] = user_id
+        sess["role"] = role
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = math.ceil(pct / 100.0 * len(ordered))
+    return ordered[max(0, min(len(ordered), rank) - 1)]
+
+
+def summarize(samples, wall_s):
+    """p50/p95/p99 in ms plus requests per second"""
+    return {
+        "n": len(samples),
+        "p50_ms": round(percentile(samples, 50) * 1000, 3),
+        "p95_ms": round(percentile(samples, 95) * 1000, 3),
+        "p99_ms": round(percentile(samples, 99) * 1000, 3),
+        "mean_ms": round(statistics.fmean(samples) * 1000, 3) if samples else 0.0,
+        "rps": round(len(samples) / wall_s, 1) if wall_s else 0.0,
+    }
+
+
+def baseline_path(name):
+    return os.path.join(BASELINE_DIR, f"{name}.json")
+
+
+def compare_to_baseline(name, results, metric="p95_ms", tolerance=0.25, update=False):
+    """
+    Compare {key: {metric: value}} against the stored baseline.
+    Writes the baseline when missing or update=True. Returns a list of
+    regression messages (empty when everything is within tolerance).
+    """
+    path = baseline_path(name)
+    if update or not os.path.exists(path):
+        os.makedirs(BASELINE_DIR, exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print(f"Baseline written to {path}")
+        return []
+
+    with open(path) as f:
+        baseline = json.load(f)
+
+    failures = []
+    for key, row in results.items():
+        old = baseline.get(key, {}).get(metric)
+        new = row.get(metric)
+        if old and new is not None and new > old * (1 + tolerance):
+            failures.append(f"{key}: {metric} {new} vs baseline {old} (+{(new / old - 1) * 100:.0f}%)")
+    return failures
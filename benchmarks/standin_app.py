@@ -0,0 +1,15 @@
+# benchmarks/standin_app.py
+"""
+WSGI entry point for bench_workers.py: the real app, with every provider
+replaced by a stand-in that calls the latency server at STANDIN_URL.
+
+    STANDIN_URL=http://127.0.0.1:8765/ gunicorn -c gunicorn_conf.py benchmarks.standin_app:app
+"""
+import os
+
+from app import create_app
+from benchmarks import standins
+
+app = create_app(fast_boot=True)
+# Installed per worker: the registry drops overrides after fork, so don't --preload
+standins.install(float(os.environ.get("STANDIN_LATENCY", 0.2)), os.environ["STANDIN_URL"])
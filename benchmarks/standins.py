@@ -0,0 +1,154 @@
+# benchmarks/standins.py
+"""
+Local stand-ins for the external providers, installed through
+app.providers.registry.override() so benchmarks never touch the network.
+An optional latency (seconds) simulates a slow provider.
+
+With a latency server URL the stand-ins make a real HTTP round trip to
+serve_latency() instead of sleeping in-process, so the wait is socket
+I/O exactly like a Twilio/SNS call (blocking under sync workers,
+cooperative under gevent):
+
+    python -m benchmarks.standins --port 8765 --latency 0.2
+"""
+import argparse
+import itertools
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+class _Latency:
+
+    def __init__(self, latency=0.0, url=None):
+        self.latency = latency
+        self.url = url
+        self.calls = 0
+        self._http = None
+        if url:
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            self._http = requests.Session()
+            self._http.mount("http://", HTTPAdapter(pool_maxsize=256))
+
+    def _wait(self):
+        self.calls += 1
+        if self._http is not None:
+            self._http.get(self.url, params={"latency": self.latency}, timeout=30).raise_for_status()
+        elif self.latency:
+            time.sleep(self.latency)
+
+
+class StandInSMS(_Latency):
+    """Same interface as TwilioSMSService"""
+
+    _ids = itertools.count(1)
+
+    def send_sms(self, to_number, message):
+        self._wait()
+        sid = f"SMSTANDIN{next(self._ids):08d}"
+        return {"success": True, "message_id": sid, "status": "queued", "raw_response": {"sid": sid}}
+
+
+class StandInSNS(_Latency):
+    """The boto3 SNS client calls the app makes (publish, publish_batch), nothing more"""
+
+    _ids = itertools.count(1)
+
+    def publish(self, **kwargs):
+        self._wait()
+        return {"MessageId": f"sns-standin-{next(self._ids)}"}
+
+    def publish_batch(self, TopicArn=None, PublishBatchRequestEntries=()):
+        self._wait()
+        return {"Successful": [{"Id": e["Id"], "MessageId": f"sns-standin-{next(self._ids)}"}
+                               for e in PublishBatchRequestEntries], "Failed": []}
+
+
+class _Response:
+    status_code = 200
+
+    def __init__(self, payload):
+        self._payload = payload
+
+    def json(self):
+        return self._payload
+
+    def raise_for_status(self):
+        pass
+
+
+class StandInHTTP(_Latency):
+    """Answers every rate API with a fixed USD/ZAR rate"""
+
+    def __init__(self, latency=0.0, url=None, rate=18.5):
+        super().__init__(latency, url)
+        self.rate = rate
+
+    def get(self, url, **kwargs):
+        self._wait()
+        return _Response({"rates": {"ZAR": self.rate}, "quotes": {"USDZAR": self.rate}, "success": True})
+
+    def request(self, method, url, **kwargs):
+        return self.get(url, **kwargs)
+
+
+def install(latency=0.0, url=None):
+    """Replace every provider client with a stand-in; returns them by name"""
+    from app.providers import registry
+
+    standins = {
+        "twilio": StandInSMS(latency, url),
+        "sns": StandInSNS(latency, url),
+        "http": StandInHTTP(latency, url),
+    }
+    for name, client in standins.items():
+        registry.override(name, client)
+    return standins
+
+
+class _LatencyHandler(BaseHTTPRequestHandler):
+    """GET /?latency=<seconds>: sleep, then answer 200 {}"""
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real providers
+
+    def do_GET(self):
+        params = parse_qs(urlparse(self.path).query)
+        delay = float(params.get("latency", [self.server.default_latency])[0])
+        if delay:
+            time.sleep(delay)
+        body = b"{}"
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class _LatencyServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 512
+
+
+def serve_latency(port=0, latency=0.0, background=False):
+    """Latency-injecting HTTP server (a thread per connection); returns it with .url set"""
+    server = _LatencyServer(("127.0.0.1", port), _LatencyHandler)
+    server.default_latency = latency
+    server.url = f"http://127.0.0.1:{server.server_address[1]}/"
+    if background:
+        threading.Thread(target=server.serve_forever, name="latency-server", daemon=True).start()
+    else:
+        server.serve_forever()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Latency-injecting provider stand-in server")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds per call unless ?latency= is given")
+    args = parser.parse_args()
+    serve_latency(args.port, args.latency)
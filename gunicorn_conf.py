@@ -0,0 +1,89 @@
+# gunicorn_conf.py
+"""
+Gunicorn settings: `gunicorn -c gunicorn_conf.py run:app` (see Procfile).
+
+WORKER_PROFILE picks the worker model:
+
+  sync     one request per process at a time (gunicorn's default). A
+           request waiting on Twilio/SNS/a rate API holds its process.
+  gthread  GUNICORN_THREADS OS threads per process.
+  gevent   GEVENT_WORKER_CONNECTIONS green threads per process. Sockets are
+           monkey-patched, so requests/boto3/twilio calls yield to other
+           requests, and psycopg2 waits cooperatively via psycogreen.
+
+Workers default to WEB_CONCURRENCY and the port to PORT (gunicorn reads
+both itself). app/dbpool.py sizes each worker's connection pool from the
+same variables, so the profile and the pool always agree.
+
+Request state is already per green thread / OS thread: Flask-SQLAlchemy
+scopes db.session to the app context, which lives in a contextvar that
+gevent makes greenlet-local, and the provider clients in app/providers.py
+are built once per process under a lock and are safe to share.
+"""
+import os
+
+# Read .env the way app/__init__.py does, before any setting below, so the
+# worker model here and the pool sizing in app/dbpool.py see the same values
+if not os.environ.get("RAILWAY_ENVIRONMENT") and not os.environ.get("RAILWAY_PROJECT_NAME"):
+    from dotenv import load_dotenv
+
+    load_dotenv(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".env"))
+
+PROFILES = ("sync", "gthread", "gevent")
+
+profile = os.environ.get("WORKER_PROFILE", "sync").strip().lower()
+if profile not in PROFILES:
+    raise RuntimeError(f"WORKER_PROFILE must be one of {', '.join(PROFILES)}, not {profile!r}")
+
+worker_class = profile
+if profile == "gthread":
+    threads = int(os.environ.get("GUNICORN_THREADS", 4))
+elif profile == "gevent":
+    worker_connections = int(os.environ.get("GEVENT_WORKER_CONNECTIONS", 100))
+
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 30))
+graceful_timeout = int(os.environ.get("GUNICORN_GRACEFUL_TIMEOUT", 20))
+keepalive = 5
+preload_app = os.environ.get("GUNICORN_PRELOAD", "false").lower() in ("1", "true", "yes", "on")
+accesslog = os.environ.get("GUNICORN_ACCESS_LOG") or None
+errorlog = "-"
+
+
+def build_assets(server):
+    """Fingerprint and precompress static files before workers read the manifest (app/assets.py)"""
+    from app.assets import build
+
+    static_folder = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app", "static")
+    try:
+        manifest, _ = build(static_folder)
+    except OSError as e:
+        server.log.warning(f"Static assets not built, serving them unhashed: {e}")
+        return
+    server.log.info(f"Built {len(manifest)} hashed static assets")
+
+
+def on_starting(server):
+    build_assets(server)
+
+
+def on_reload(server):
+    # HUP: the new workers load the app again, and must see this deploy's assets.
+    # A preloaded app (GUNICORN_PRELOAD) loaded before on_starting: assets.init_app
+    # rebuilds a manifest older than the static files itself.
+    build_assets(server)
+
+
+def post_fork(server, worker):
+    if profile != "gevent":
+        return
+    # Cooperative psycopg2: queries wait on the gevent hub instead of blocking
+    # the whole worker. Must run before the worker opens its first connection.
+    try:
+        from psycogreen.gevent import patch_psycopg
+    except ImportError:
+        server.log.warning("psycogreen is not installed: PostgreSQL queries will block gevent workers")
+        return
+    try:
+        patch_psycopg()
+    except ImportError:
+        pass  # no psycopg2 (SQLite): nothing to patch